@@ -1,53 +1,83 @@
-import pandas as pd
-import requests
-import time
-
-# 1. Get the list of top 10 chains by TVL
-chains_url = "https://api.llama.fi/v2/chains"
-all_chains = requests.get(chains_url).json()
-top_10_chains = sorted(all_chains, key=lambda x: x.get('tvl', 0), reverse=True)[:10]
-chain_slugs = [c['name'].lower().replace(" ", "-") for c in top_10_chains]
-
-# 2. Fetch Global Total Fees History (Market-wide)
-print("Fetching global market fee history...")
-total_fees_url = "https://api.llama.fi/overview/fees?excludeTotalDataChart=false"
-global_res = requests.get(total_fees_url).json()
-global_chart = global_res.get('totalDataChart', [])
-
-# Initialize Master DF with Global Total
-master_df = pd.DataFrame(global_chart, columns=['timestamp', 'Market_Total_Fees'])
-master_df['date'] = pd.to_datetime(master_df['timestamp'], unit='s')
-master_df.set_index('date', inplace=True)
-master_df.drop(columns=['timestamp'], inplace=True)
-
-# 3. Loop through Top 10 Chains and join them to the Master DF
-print(f"Fetching history for: {', '.join(chain_slugs)}")
-for slug in chain_slugs:
-    try:
-        fee_url = f"https://api.llama.fi/overview/fees/{slug}?excludeTotalDataChart=false"
-        res = requests.get(fee_url).json()
-        chart_data = res.get('totalDataChart', [])
-        
-        if chart_data:
-            temp_df = pd.DataFrame(chart_data, columns=['timestamp', slug])
-            temp_df['date'] = pd.to_datetime(temp_df['timestamp'], unit='s')
-            temp_df.set_index('date', inplace=True)
-            master_df = master_df.join(temp_df[[slug]], how='left')
-        
-        time.sleep(0.2)
-    except Exception as e:
-        print(f"Skipping {slug}: {e}")
-
-# 4. Data Cleaning & Calculations
-master_df = master_df.fillna(0)
-
-# Calculate "Other" = Total - Sum(Top 10)
-# We sum across the columns we just added (the chain slugs)
-master_df['Other_Chains'] = master_df['Market_Total_Fees'] - master_df[chain_slugs].sum(axis=1)
-
-# Ensure 'Other' isn't negative due to rounding or API data lags
-master_df['Other_Chains'] = master_df['Other_Chains'].clip(lower=0)
-
-# Reorder columns to put Total and Other at the end
-final_cols = chain_slugs + ['Other_Chains', 'Market_Total_Fees']
-master_df = master_df[final_cols]
+import os
+import sys
+import heapq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import schemas
+from fetch_data import CHAINS_URL, cached_json, chain_slug, get_json, pmap, script
+from timeseries import TimeSeriesFrame, align
+
+# --- CONFIGURATION ---
+NAME = "fees_by_chain"  # run_scripts.py name
+TOP  = 10
+TOTAL_FEES_URL = "https://api.llama.fi/overview/fees?excludeTotalDataChart=false"
+CHAIN_FEES_URL = "https://api.llama.fi/overview/fees/{slug}?excludeTotalDataChart=false"
+FILENAME = "fees_by_chain.csv"
+
+
+def fee_history(url, name):
+    """One 'name' frame from an overview/fees response (empty on failure)."""
+    res = get_json(url, parse=schemas.FEES)
+    return TimeSeriesFrame.from_points(res['totalDataChart'] if res else [], name)
+
+
+def save_fees(result, out_dir):
+    master, chain_slugs = result
+
+    # 4. Data Cleaning & Calculations
+    master_df = master.to_pandas(fill=0)
+
+    # Calculate "Other" = Total - Sum(Top 10)
+    # We sum across the columns we just added (the chain slugs)
+    master_df['Other_Chains'] = master_df['Market_Total_Fees'] - master_df[chain_slugs].sum(axis=1)
+
+    # Ensure 'Other' isn't negative due to rounding or API data lags
+    master_df['Other_Chains'] = master_df['Other_Chains'].clip(lower=0)
+
+    # Reorder columns to put Total and Other at the end
+    final_cols = chain_slugs + ['Other_Chains', 'Market_Total_Fees']
+    master_df = master_df[final_cols]
+
+    path = os.path.join(out_dir, FILENAME)
+    master_df.to_csv(path)
+    print(f"Saved to: {path}")
+    print(master_df.tail())
+
+
+def top_slugs(all_chains):
+    # The top TOP chains by TVL
+    top_chains = heapq.nlargest(TOP, all_chains, key=lambda x: x['tvl'] or 0)
+    return [chain_slug(c['name']) for c in top_chains]
+
+
+def plan_requests():
+    # One request per chain, known once /v2/chains is in the cache
+    all_chains = cached_json(CHAINS_URL, parse=schemas.CHAINS)
+    if all_chains is None:
+        return [(TOTAL_FEES_URL, None, ""),
+                (CHAIN_FEES_URL, None, f"top {TOP} chains, once /v2/chains is known")]
+    return [(TOTAL_FEES_URL, None, "")] + [
+        (CHAIN_FEES_URL.format(slug=slug), None, "") for slug in top_slugs(all_chains)
+    ]
+
+
+@script(NAME, deps=["chains"], output=save_fees, plan=plan_requests)
+def fees_by_chain(all_chains):
+    """Daily fees of the 10 largest chains, the rest and the market total."""
+    # 1. Get the list of top 10 chains by TVL
+    chain_slugs = top_slugs(all_chains)
+
+    # 2. Fetch Global Total Fees History (Market-wide)
+    print("Fetching global market fee history...")
+    global_fees = fee_history(TOTAL_FEES_URL, 'Market_Total_Fees')
+
+    # 3. Fetch the Top 10 Chains (concurrent, cached; see fetch_data.py) and
+    # align them all onto the global date index in one pass
+    print(f"Fetching history for: {', '.join(chain_slugs)}")
+    chain_fees = pmap(lambda slug: fee_history(CHAIN_FEES_URL.format(slug=slug), slug), chain_slugs)
+    return align([global_fees] + chain_fees, on=global_fees.days), chain_slugs
+
+
+if __name__ == "__main__":
+    import run_scripts
+    sys.exit(run_scripts.main([NAME]))
@@ -1,24 +1,60 @@
-import requests
-import pandas as pd
+import os
+import sys
 
-DUNE_API_KEY = "RFMOcmSflJvpo2iYn40WMETlR9cN58pm"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import schemas
+from fetch_data import DUNE_API_KEY, get_json, script
+from timeseries import DAY_SECONDS, TimeSeriesFrame, align, str_to_day
+
+# --- CONFIGURATION ---
+NAME     = "stablecoin_active_addresses"  # run_scripts.py name
 QUERY_ID = 6706569  # <-- replace with your actual query ID from step 3
+URL      = f"https://api.dune.com/api/v1/query/{QUERY_ID}/results"
+FILENAME = "stablecoin_active_senders_daily.csv"
+# The API key is read from the DUNE_API_KEY environment variable (see fetch_data.py)
+
+
+def save_active_senders(frame, out_dir):
+    if not len(frame):
+        print("No data returned.")
+        return
+    df = frame.to_pandas(fill=0).astype(int)
+    df.index.name = "day"
+
+    path = os.path.join(out_dir, FILENAME)
+    df.to_csv(path)
+    print(df)
+    print(f"Saved to: {path}")
+
+
+@script(NAME, output=save_active_senders,
+        plan=lambda: [(URL, {"limit": 10000}, "")] if DUNE_API_KEY else [])
+def active_senders():
+    """Daily active senders per stablecoin on Ethereum (Dune)."""
+    if not DUNE_API_KEY:
+        print("DUNE_API_KEY not set - skipping active addresses")
+        return TimeSeriesFrame()
+
+    res = get_json(
+        URL,
+        headers={"X-Dune-Api-Key": DUNE_API_KEY},
+        params={"limit": 10000},
+        parse=schemas.DUNE_DAILY_ACTIVE_ADDRESSES,
+    )
+    rows = res["result"]["rows"] if res else []
+
+    # Pivot to day x stablecoin, summing duplicate rows
+    by_coin = {}
+    for row in rows:
+        days = by_coin.setdefault(row["stablecoin"], {})
+        day  = str_to_day(row["day"])
+        days[day] = days.get(day, 0) + row["active_senders"]
+    return align([
+        TimeSeriesFrame.from_points(((d * DAY_SECONDS, v) for d, v in days.items()), coin)
+        for coin, days in sorted(by_coin.items())
+    ], 'outer')
+
 
-resp = requests.get(
-    f"https://api.dune.com/api/v1/query/{QUERY_ID}/results",
-    headers={"X-Dune-Api-Key": DUNE_API_KEY},
-    params={"limit": 10000}
-)
-resp.raise_for_status()
-
-rows = resp.json()["result"]["rows"]
-df = pd.DataFrame(rows)
-df["day"] = pd.to_datetime(df["day"]).dt.date
-df = df.pivot_table(
-    index="day", columns="stablecoin",
-    values="active_senders", aggfunc="sum"
-).fillna(0).astype(int)
-df.index = pd.DatetimeIndex(df.index)
-df = df.sort_index()
-
-print(df)
\ No newline at end of file
+if __name__ == "__main__":
+    import run_scripts
+    sys.exit(run_scripts.main([NAME]))
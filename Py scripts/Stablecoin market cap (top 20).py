@@ -5,66 +5,88 @@ Created on Wed Feb 11 15:20:24 2026
 @author: ROB8341
 """
 
-import pandas as pd
-from defillama_sdk import DefiLlama
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import schemas
+from fetch_data import cached_json, get_json, pmap, script
+from timeseries import TimeSeriesFrame, align
+
+# --- CONFIGURATION ---
+NAME     = "stablecoin_market_cap"  # run_scripts.py name
+LIMIT    = 20
+FILENAME = "stablecoin_market_cap_top20.xlsx"
+STABLECOINS_URL = "https://stablecoins.llama.fi/stablecoins"
+COIN_URL        = "https://stablecoins.llama.fi/stablecoin/{id}"
+
+
+def top_assets_of(stablecoins, limit):
+    pegged_assets = stablecoins['peggedAssets'] if stablecoins else []
+    return [a for a in pegged_assets if a['id']][:limit]
+
+
+def plan_requests():
+    # One request per coin, known once /stablecoins is in the cache
+    stablecoins = cached_json(STABLECOINS_URL, parse=schemas.STABLECOINS)
+    coins = ([(COIN_URL.format(id=a['id']), None, a['name']) for a in top_assets_of(stablecoins, LIMIT)]
+             if stablecoins is not None else
+             [(COIN_URL, None, f"top {LIMIT} of /stablecoins, once it is known")])
+    return [(STABLECOINS_URL, None, "")] + coins + [
+        ("https://stablecoins.llama.fi/stablecoincharts/all", None, ""),
+    ]
 
-# Initialize client
-client = DefiLlama()
 
 def get_stablecoin_data(limit=20):
-    """Fetches top stablecoin data and merges into a single DataFrame."""
-    stablecoins = client.stablecoins.getStablecoins()
-    pegged_assets = stablecoins.get('peggedAssets', [])
-    
+    """Fetches top stablecoin data; returns one frame per coin."""
+    stablecoins = get_json(STABLECOINS_URL, parse=schemas.STABLECOINS)
+
     # 1. Get the list of top coin IDs and their names
-    top_assets = pegged_assets[:limit]
-    
-    main_df = None
-
-    for asset in top_assets:
-        coin_id = asset['id']
-        coin_name = asset.get('name', f"coin_{coin_id}")
-        
-        # Fetch individual history
-        data = client.stablecoins.getStablecoin(coin_id)
-        tokens = data.get("tokens", [])
-        
-        if not tokens:
-            continue
-            
-        # Create temp DataFrame for this coin
-        temp_df = pd.DataFrame([
-            {"date": pd.to_datetime(t["date"], unit='s'), coin_name: t["circulating"]["peggedUSD"]}
-            for t in tokens
-        ])
-        
-        # Merge logic
-        if main_df is None:
-            main_df = temp_df
-        else:
-            main_df = pd.merge(main_df, temp_df, on='date', how='outer')
-
-    return main_df.sort_values('date').fillna(0)
-
-# --- Execution ---
-coin_df = get_stablecoin_data(limit=20)
-
-# 2. Add Total Market Cap
-total_list = client.stablecoins.getAllCharts()
-total_map = {pd.to_datetime(item["date"], unit='s'): item["totalCirculating"]["peggedUSD"] for item in total_list}
-
-coin_df['Total_Market'] = coin_df['date'].map(total_map).fillna(0)
-
-# 3. Calculate 'Others'
-# Difference between Total_Market and the sum of all individual coin columns
-coin_cols = coin_df.columns.difference(['date', 'Total_Market'])
-coin_df['Others'] = (coin_df['Total_Market'] - coin_df[coin_cols].sum(axis=1)).clip(lower=0)
-
-# 4. Final Formatting
-coin_df = coin_df.set_index('date')
-
-'''
-# 5. Export to Excel
-output_path = r'C:\Users\ROB8341\OneDrive - Robeco Nederland B.V\Blockchain dashboard\Py\data.xlsx'
-coin_df.to_excel(output_path)
-'''
+    top_assets = top_assets_of(stablecoins, limit)
+
+    # Fetch individual histories (concurrent, cached; see fetch_data.py)
+    def coin_history(asset):
+        data = get_json(COIN_URL.format(id=asset['id']), parse=schemas.STABLECOIN)
+        # Collect this coin's series; all coins are aligned once at the end
+        return TimeSeriesFrame.from_points(
+            ((t["date"], t["circulating"]["peggedUSD"]) for t in data["tokens"]) if data else [],
+            asset['name'],
+        )
+
+    return [f for f in pmap(coin_history, top_assets) if len(f)]
+
+
+def export_market_caps(coins, out_dir):
+    coin_df = coins.to_pandas(fill=0)
+    coin_df.index.name = 'date'
+
+    # 3. Calculate 'Others'
+    # Difference between Total_Market and the sum of all individual coin columns
+    coin_cols = coin_df.columns.difference(['Total_Market'])
+    coin_df['Others'] = (coin_df['Total_Market'] - coin_df[coin_cols].sum(axis=1)).clip(lower=0)
+
+    # 4. Export to Excel
+    output_path = os.path.join(out_dir, FILENAME)
+    coin_df.to_excel(output_path)
+    print(f"Saved to: {output_path}")
+
+
+@script(NAME, output=export_market_caps, plan=plan_requests)
+def stablecoin_market_caps():
+    """Market cap history of the 20 largest stablecoins, others and total."""
+    coin_frames = get_stablecoin_data(limit=LIMIT)
+    coin_days = sorted(set().union(*(f.days for f in coin_frames)))
+
+    # 2. Add Total Market Cap on the coins' dates, in the same single alignment
+    total_list = get_json("https://stablecoins.llama.fi/stablecoincharts/all", parse=schemas.STABLECOIN_CHART) or []
+    total = TimeSeriesFrame.from_points(
+        ((item["date"], item["totalCirculatingUSD"]["peggedUSD"] or item["totalCirculating"]["peggedUSD"])
+         for item in total_list),
+        'Total_Market',
+    )
+    return align(coin_frames + [total], on=coin_days)
+
+
+if __name__ == "__main__":
+    import run_scripts
+    sys.exit(run_scripts.main([NAME]))
@@ -1,64 +1,65 @@
-import requests
-import pandas as pd
-import time
-from datetime import datetime
+import os
+import sys
+import heapq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fetch_data import script
+from protocol_history import iter_histories, plan_histories
+from timeseries import DailyGroupSum
 
 # --- CONFIGURATION ---
+NAME = "tvl_by_name"  # run_scripts.py name
 LIMIT = 20  # Number of top protocols to fetch
 FILENAME = "defillama_wide_format.csv"
 
-print(f"--- Fetching Top {LIMIT} Protocols ---")
 
-# 1. Fetch protocol list and sort by TVL (Handling NoneType)
-list_url = "https://api.llama.fi/protocols"
-response = requests.get(list_url, timeout=30)
-protocols = response.json()
+def save_wide(wide, out_dir):
+    # 3. "Wide" DataFrame: Rows = Dates, Columns = Protocols
+    df_wide = wide.to_pandas()
+
+    # 4. Final Cleaning
+    df_wide = df_wide.sort_index(axis=1)
+    df_wide = df_wide.fillna(0)  # Fill missing dates with 0 TVL
+
+    # Save and Display
+    path = os.path.join(out_dir, FILENAME)
+    df_wide.to_csv(path)
+    print("\n--- DONE ---")
+    print(f"Wide DataFrame created: {df_wide.shape[0]} rows x {df_wide.shape[1]} columns")
+    print(f"Saved to: {path}")
+
+    # Look at the last few rows in the console
+    print(df_wide.tail())
 
-top_protocols = sorted(
-    protocols, 
-    key=lambda x: x.get('tvl') if x.get('tvl') is not None else 0, 
-    reverse=True
-)[:LIMIT]
 
-all_data = []
+def select_top(protocols):
+    # The top LIMIT of the shared protocol list by TVL (None counts as 0),
+    # without sorting the whole list
+    return heapq.nlargest(
+        LIMIT,
+        protocols,
+        key=lambda x: x['tvl'] if x['tvl'] is not None else 0
+    )
 
-# 2. Fetch historical data for each protocol
-for i, proto in enumerate(top_protocols):
-    name = proto.get('name')
-    slug = proto.get('slug')
-    
-    try:
-        res = requests.get(f"https://api.llama.fi/protocol/{slug}", timeout=20)
-        if res.status_code == 200:
-            hist_tvl = res.json().get('tvl', [])
-            for entry in hist_tvl:
-                all_data.append({
-                    'date': datetime.fromtimestamp(entry['date']).strftime('%Y-%m-%d'),
-                    'protocol': name,
-                    'tvl': entry.get('totalLiquidityUSD', 0)
-                })
-            print(f"[{i+1}/{LIMIT}] Processed: {name}")
-        time.sleep(0.2)
-    except Exception as e:
-        print(f"Error fetching {name}: {e}")
 
-# 3. Create initial "Long" DataFrame
-df_long = pd.DataFrame(all_data)
+@script(NAME, deps=["protocol_list"], output=save_wide,
+        plan=lambda: plan_histories(select_top, f"top {LIMIT} protocols"))
+def tvl_by_name(protocols):
+    """TVL history of the 20 largest protocols, one column each."""
+    print(f"--- Fetching Top {LIMIT} Protocols ---")
 
-# 4. Pivot to "Wide" Format: Rows = Dates, Columns = Protocols
-# We use pivot_table with 'first' to handle any potential duplicate date entries
-df_wide = df_long.pivot_table(index='date', columns='protocol', values='tvl', aggfunc='first')
+    # 1. Select the top LIMIT of the shared protocol list by TVL
+    top_protocols = select_top(protocols)
 
-# 5. Final Cleaning
-df_wide.index = pd.to_datetime(df_wide.index)
-df_wide = df_wide.sort_index()
-df_wide = df_wide.fillna(0)  # Fill missing dates with 0 TVL
+    # 2. Fetch historical data for each protocol (concurrent, cached in the
+    # history store; see protocol_history.py) and fold each history into a
+    # date x protocol matrix as it arrives
+    by_protocol = DailyGroupSum()
+    for proto, frame in iter_histories(top_protocols):
+        by_protocol.add(proto['name'], frame, 'tvl')
+    return by_protocol.to_frame()
 
-# Save and Display
-df_wide.to_csv(FILENAME)
-print("\n--- DONE ---")
-print(f"Wide DataFrame created: {df_wide.shape[0]} rows x {df_wide.shape[1]} columns")
-print(f"Saved to: {FILENAME}")
 
-# Look at the last few rows in the console
-print(df_wide.tail())
\ No newline at end of file
+if __name__ == "__main__":
+    import run_scripts
+    sys.exit(run_scripts.main([NAME]))
@@ -1,77 +1,60 @@
-import requests
-import pandas as pd
-import matplotlib.pyplot as plt
-import time
+import os
+import sys
 
-def get_stablecoin_volume_data():
-    print("--- Fetching Stablecoin Daily Data ---")
-    
-    # Get USDT and USDC data
-    coins = {
-        'tether': 'USDT',
-        'usd-coin': 'USDC'
-    }
-    
-    stable_volumes = {}
-    
-    for coin_id, coin_name in coins.items():
-        print(f"Syncing Volume: {coin_name}")
-        try:
-            url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart?vs_currency=usd&days=365&interval=daily"
-            res = requests.get(url).json()
-            
-            if 'error' in res:
-                print(f"  API Error: {res['error']}")
-                continue
-            
-            if 'total_volumes' in res and res['total_volumes']:
-                vols = res['total_volumes']
-                print(f"  Got {len(vols)} volume data points")
-                
-                temp_df = pd.DataFrame(vols, columns=['timestamp', coin_name])
-                temp_df['date'] = pd.to_datetime(temp_df['timestamp'], unit='ms').dt.date
-                
-                # Average any duplicate date entries
-                stable_volumes[coin_name] = temp_df.groupby('date')[coin_name].mean()
-            else:
-                print(f"No volume data found")
-            
-            time.sleep(2.5)
-        except Exception as e:
-            print(f"  Error: {e}")
-    
-    if not stable_volumes:
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fetch_data import script
+from timeseries import TimeSeriesFrame
+
+NAME = "transaction_volume_daily"  # run_scripts.py name
+
+
+def plot_daily_volume(frame, out_dir):
+    import matplotlib.pyplot as plt
+
+    if not len(frame):
         print("No data collected!")
-        return None
-    
-    df = pd.DataFrame(stable_volumes).fillna(0)
-    
-    # Add Total column
-    df['Total'] = df['USDT'] + df['USDC']
-    
-    print(f"\nDate range: {df.index.min()} to {df.index.max()}")
-    print(f"Shape: {df.shape}")
-    
-    return df
+        return
+    df_stables = frame.to_pandas(fill=0)
 
-# Run and Plot
-df_stables = get_stablecoin_volume_data()
-if df_stables is not None:
-    plt.figure(figsize=(12, 7))
+    print(f"\nDate range: {df_stables.index.min()} to {df_stables.index.max()}")
+    print(f"Shape: {df_stables.shape}")
+
+    fig = plt.figure(figsize=(12, 7))
     plot_cols = ['USDT', 'USDC']
-    
-    plt.stackplot(df_stables.index, 
-                  [df_stables[c] for c in plot_cols], 
-                  labels=plot_cols, 
+
+    plt.stackplot(df_stables.index,
+                  [df_stables[c] for c in plot_cols],
+                  labels=plot_cols,
                   alpha=0.8)
-    
+
     plt.title('Daily Stablecoin Volume: USDT vs USDC (Last 365 Days)', fontsize=14, fontweight='bold')
     plt.ylabel('24h Volume (USD)')
     plt.xlabel('Date')
     plt.legend(loc='upper left', fontsize='medium')
     plt.grid(alpha=0.3)
     plt.tight_layout()
-    plt.show()
-    
+
+    path = os.path.join(out_dir, "transaction_volume_daily.png")
+    fig.savefig(path)
+    plt.close(fig)
+    print(f"Chart saved as '{path}'")
+
     print("\nLatest Stablecoin Volume Breakdown:")
-    print(df_stables.tail())
\ No newline at end of file
+    print(df_stables.tail())
+
+
+@script(NAME, deps=["volume"], output=plot_daily_volume)
+def daily_volume(vol):
+    """Daily CoinGecko volume of USDT and USDC over the last 365 days."""
+    # The dashboard's "volume" node already keeps these series in the history
+    # store (newest first), so no request of its own is needed.
+    frame = TimeSeriesFrame(vol["_tvd_days"][::-1])
+    frame['USDT']  = vol["tvd_usdt"][::-1]
+    frame['USDC']  = vol["tvd_usdc"][::-1]
+    frame['Total'] = vol["tvd_total"][::-1]
+    return frame
+
+
+if __name__ == "__main__":
+    import run_scripts
+    sys.exit(run_scripts.main([NAME]))
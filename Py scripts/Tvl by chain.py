@@ -5,68 +5,91 @@ Created on Wed Feb 11 17:39:44 2026
 @author: ROB8341
 """
 
+import os
+import sys
+import heapq
 
-import requests
-import pandas as pd
-import matplotlib.pyplot as plt
-import time
-
-# 1. Identify Top 20 Chains by Current TVL
-print("Fetching top 20 chains list...")
-chains_url = "https://api.llama.fi/v2/chains"
-all_chains = requests.get(chains_url).json()
-
-# Sort by current TVL and extract names/slugs
-top_20 = sorted(all_chains, key=lambda x: x.get('tvl', 0), reverse=True)[:20]
-chain_map = {c['name'].lower().replace(" ", "-"): c['name'] for c in top_20}
-chain_slugs = list(chain_map.keys())
-
-# 2. Fetch Historical TVL for each chain
-master_df = pd.DataFrame()
-
-print(f"Downloading history for {len(chain_slugs)} chains...")
-for slug in chain_slugs:
-    try:
-        url = f"https://api.llama.fi/v2/historicalChainTvl/{slug}"
-        res = requests.get(url)
-        if res.status_code == 200:
-            data = res.json()
-            df = pd.DataFrame(data)
-            df['date'] = pd.to_datetime(df['date'], unit='s')
-            df.set_index('date', inplace=True)
-            df.columns = [chain_map[slug]] # Use clean display name
-            
-            # Merge into master DataFrame
-            master_df = master_df.join(df, how='outer') if not master_df.empty else df
-        time.sleep(0.1) # Respect API limits
-    except Exception as e:
-        print(f"Skipping {slug} due to error: {e}")
-
-# 3. Data Cleanup
-master_df = master_df.fillna(0).sort_index()
-# Slice to last 12 months for a cleaner visual
-plot_df = master_df.tail(365) 
-
-# 4. Create the Stacked Area Chart
-plt.figure(figsize=(15, 8))
-plt.stackplot(plot_df.index, plot_df.T, labels=plot_df.columns, alpha=0.8)
-
-# Formatting
-plt.title('Top 20 Blockchain Chains: TVL Market Share (Last 12 Months)', fontsize=16, fontweight='bold')
-plt.ylabel('Total Value Locked (USD)', fontsize=12)
-plt.xlabel('Date', fontsize=12)
-plt.legend(loc='center left', bbox_to_anchor=(1, 0.5), title="Chains", fontsize=9)
-plt.grid(axis='y', alpha=0.3, linestyle='--')
-
-# Format Y-axis to Billions/Millions
-def format_currency(x, pos):
-    if x >= 1e9: return f'${x*1e-9:.1f}B'
-    return f'${x*1e-6:.0f}M'
-
-plt.gca().yaxis.set_major_formatter(plt.FuncFormatter(format_currency))
-
-plt.tight_layout()
-plt.savefig('top_20_chains_tvl_stacked.png')
-master_df.to_csv('top_20_chains_tvl_data.csv')
-
-print("Success! Chart saved as 'top_20_chains_tvl_stacked.png' and data saved to CSV.")
\ No newline at end of file
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import schemas
+from fetch_data import (CHAINS_URL, cached_json, chain_index, chain_slug, chain_tvl_url,
+                        fetch_chain_tvl_histories, script)
+from timeseries import align
+
+# --- CONFIGURATION ---
+NAME = "tvl_by_chain"  # run_scripts.py name
+TOP  = 20
+
+
+def plot_chain_tvl(master, out_dir):
+    import matplotlib.pyplot as plt
+
+    master_df = master.to_pandas(fill=0)
+    # Slice to last 12 months for a cleaner visual
+    plot_df = master_df.tail(365)
+
+    # 4. Create the Stacked Area Chart
+    fig = plt.figure(figsize=(15, 8))
+    plt.stackplot(plot_df.index, plot_df.T, labels=plot_df.columns, alpha=0.8)
+
+    # Formatting
+    plt.title('Top 20 Blockchain Chains: TVL Market Share (Last 12 Months)', fontsize=16, fontweight='bold')
+    plt.ylabel('Total Value Locked (USD)', fontsize=12)
+    plt.xlabel('Date', fontsize=12)
+    plt.legend(loc='center left', bbox_to_anchor=(1, 0.5), title="Chains", fontsize=9)
+    plt.grid(axis='y', alpha=0.3, linestyle='--')
+
+    # Format Y-axis to Billions/Millions
+    def format_currency(x, pos):
+        if x >= 1e9: return f'${x*1e-9:.1f}B'
+        return f'${x*1e-6:.0f}M'
+
+    plt.gca().yaxis.set_major_formatter(plt.FuncFormatter(format_currency))
+
+    plt.tight_layout()
+    chart = os.path.join(out_dir, 'top_20_chains_tvl_stacked.png')
+    data  = os.path.join(out_dir, 'top_20_chains_tvl_data.csv')
+    fig.savefig(chart)
+    plt.close(fig)
+    master_df.to_csv(data)
+
+    print(f"Success! Chart saved as '{chart}' and data saved to '{data}'.")
+
+
+def plan_requests():
+    # One request per chain, known once /v2/chains is in the cache
+    all_chains = cached_json(CHAINS_URL, parse=schemas.CHAINS)
+    if all_chains is None:
+        return [("https://api.llama.fi/v2/historicalChainTvl/{chain}", None,
+                 f"top {TOP} chains, once /v2/chains is known")]
+    index = chain_index(all_chains)
+    urls  = [chain_tvl_url(chain_slug(c['name']), index) for c in select_top(all_chains)]
+    return [(url, None, "") for url in urls if url]
+
+
+def select_top(all_chains):
+    return heapq.nlargest(TOP, all_chains, key=lambda x: x['tvl'] or 0)
+
+
+@script(NAME, deps=["chains"], output=plot_chain_tvl, plan=plan_requests)
+def top_chains_tvl(all_chains):
+    """TVL history of the 20 largest chains, stacked (last 12 months)."""
+    # 1. Identify Top 20 Chains by Current TVL (the /v2/chains list comes
+    # from the shared "chains" node, which also refreshes the slug index)
+    top_20 = select_top(all_chains)
+    chain_map = {chain_slug(c['name']): c['name'] for c in top_20}
+    chain_slugs = list(chain_map.keys())
+
+    # 2. Fetch Historical TVL for each chain (concurrent, cached; see fetch_data.py)
+    print(f"Downloading history for {len(chain_slugs)} chains...")
+    histories = fetch_chain_tvl_histories(chain_slugs)
+
+    # 3. Align all chains onto one date index in a single pass (no join per chain)
+    return align(
+        [histories[slug].rename({'tvl': chain_map[slug]}) for slug in chain_slugs],  # Use clean display name
+        'outer',
+    )
+
+
+if __name__ == "__main__":
+    import run_scripts
+    sys.exit(run_scripts.main([NAME]))
@@ -0,0 +1,310 @@
+"""
+benchmark.py  –  End-to-end timings of the dashboard refresh on fixed data.
+Starts replay_server.py on a free local port (recorded fixtures, else its
+synthetic responses pinned to BENCH_TODAY), points fetch_data at it with the
+response cache and history store switched off, and measures:
+  - fetch:   fetch_all() wall time, time per pipeline node, requests sent,
+             response bytes received
+  - compute: build_correlations and build_fee_efficiency on the fetched inputs
+  - render:  build_tiles, encode_payload, json.dumps of the payload and the
+             page itself (generate_dashboard.render, inline and --split)
+Compute and render phases report the median of --repeat runs plus a
+tracemalloc peak from one extra run; output sizes are bytes written.
+
+Results are saved to .bench/<timestamp>.json and .bench/latest.json.  When a
+baseline exists (.bench/baseline.json, written by --save-baseline) each metric
+is compared with it and anything worse by more than the tolerance is flagged;
+the exit status is then 1.
+
+Usage:
+  python benchmark.py [--repeat 5] [--scale 1] [--latency 0] [--fixtures DIR]
+                      [--save-baseline] [--baseline PATH] [--tolerance 0.15]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR  = os.path.join(SCRIPT_DIR, ".bench")
+sys.path.insert(0, SCRIPT_DIR)
+
+# ── Config ────────────────────────────────────────────────────────────────────
+BENCH_TODAY = "2026-01-01"   # last day of the synthetic histories
+
+# Relative slowdown / growth tolerated before a metric is flagged.  Timings
+# also get an absolute allowance so millisecond phases don't flag on noise.
+TIME_TOLERANCE = 0.15
+TIME_NOISE_S   = 0.005
+SIZE_TOLERANCE = 0.02    # bytes, request counts
+MEM_TOLERANCE  = 0.10    # *_kb peaks
+
+# Reported but never flagged: nodes run concurrently, so their individual
+# times depend on thread scheduling more than on their own code.
+INFO_PREFIXES = ("fetch.node.",)
+
+
+# ── Replay server ─────────────────────────────────────────────────────────────
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_replay(opts):
+    """Launches replay_server.py; returns (process, base URL)."""
+    port = _free_port()
+    cmd  = [sys.executable, os.path.join(SCRIPT_DIR, "replay_server.py"),
+            "--port", str(port), "--today", BENCH_TODAY, "--scale", str(opts.scale)]
+    if opts.fixtures:
+        cmd += ["--fixtures", opts.fixtures]
+    if opts.latency:
+        cmd += ["--latency", opts.latency]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return proc, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("replay server did not start")
+
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+def measure(fn, repeat):
+    """(median seconds, tracemalloc peak bytes, last result) of fn()."""
+    times = []
+    for _ in range(repeat):
+        t0     = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak, result
+
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, f))
+               for root, _, files in os.walk(path) for f in files)
+
+
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:     # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def bench_fetch(fetch_data, metrics):
+    """Runs fetch_all() once with per-node timers and request counters;
+    returns (data, captured compute inputs)."""
+    lock    = threading.Lock()
+    traffic = {"requests": 0, "bytes_in": 0}
+    inputs  = {}
+
+    def on_response(r, *args, **kwargs):
+        with lock:
+            traffic["requests"] += 1
+            traffic["bytes_in"] += len(r.content)
+
+    def timed(name, fn):
+        def run(*args):
+            inputs[name] = (fn, args)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                metrics[f"fetch.node.{name}_s"] = time.perf_counter() - t0
+        return run
+
+    for name, spec in fetch_data.NODES.items():
+        spec["fn"] = timed(name, spec["fn"])
+    fetch_data.sess.hooks["response"].append(on_response)
+
+    t0   = time.perf_counter()
+    data = fetch_data.fetch_all()
+    metrics["fetch.wall_s"]   = time.perf_counter() - t0
+    metrics["fetch.requests"] = traffic["requests"]
+    metrics["fetch.bytes_in"] = traffic["bytes_in"]
+    return data, inputs
+
+
+def bench_compute(inputs, metrics, repeat):
+    for label, node_name in (("build_correlations",   "correlations"),
+                             ("build_fee_efficiency", "fee_efficiency")):
+        fn, args = inputs[node_name]
+        secs, peak, _ = measure(lambda: fn(*args), repeat)
+        metrics[f"{label}.wall_s"]  = secs
+        metrics[f"{label}.peak_kb"] = peak // 1024
+
+
+def bench_render(data, metrics, repeat):
+    import generate_dashboard
+    from jsonstream import dumps
+    from payload import encode_payload
+    from tiles import build_tiles
+
+    plain = {k: v for k, v in data.items() if k not in ("_last_update", "_daily", "_stale", "_broken")}
+
+    secs, peak, _ = measure(lambda: build_tiles(data["_daily"]), repeat)
+    metrics["build_tiles.wall_s"]  = secs
+    metrics["build_tiles.peak_kb"] = peak // 1024
+
+    secs, peak, encoded = measure(lambda: encode_payload(plain), repeat)
+    metrics["encode_payload.wall_s"]  = secs
+    metrics["encode_payload.peak_kb"] = peak // 1024
+
+    secs, peak, text = measure(lambda: dumps(encoded), repeat)
+    metrics["json_dumps.wall_s"]    = secs
+    metrics["json_dumps.peak_kb"]   = peak // 1024
+    metrics["json_dumps.bytes_out"] = len(text.encode("utf-8"))
+
+    # Inline pages still write their daily tiles; bytes_out is the page itself.
+    with tempfile.TemporaryDirectory() as tmp:
+        inline = lambda: generate_dashboard.render(data, out_dir=tmp)
+        secs, peak, (html, _) = measure(inline, repeat)
+    metrics["render.wall_s"]    = secs
+    metrics["render.peak_kb"]   = peak // 1024
+    metrics["render.bytes_out"] = len(html.encode("utf-8"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        split = lambda: generate_dashboard.render(data, split=True, out_dir=tmp)
+        secs, peak, (html, _) = measure(split, repeat)
+        metrics["render_split.wall_s"]    = secs
+        metrics["render_split.peak_kb"]   = peak // 1024
+        metrics["render_split.bytes_out"] = len(html.encode("utf-8")) + _dir_bytes(tmp)
+
+
+# ── Results ───────────────────────────────────────────────────────────────────
+def _git_rev():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save_results(report, baseline_path, save_baseline):
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    paths = [os.path.join(BENCH_DIR, f"{stamp}.json"), os.path.join(BENCH_DIR, "latest.json")]
+    if save_baseline:
+        paths.append(baseline_path)
+    for path in paths:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results: {paths[0]}")
+    if save_baseline:
+        print(f"Baseline saved: {baseline_path}")
+
+
+def compare(metrics, baseline, tolerance):
+    """Prints metric / baseline / change; returns the regressed metric names."""
+    regressions = []
+    print(f"\n  {'metric':<38} {'baseline':>12} {'now':>12} {'change':>8}")
+    for key in sorted(metrics):
+        now, old = metrics[key], baseline.get(key)
+        if now is None or old is None:
+            print(f"  {key:<38} {'-':>12} {_fmt(key, now):>12}")
+            continue
+        change = (now - old) / old if old else 0.0
+        if key.startswith(INFO_PREFIXES):
+            worse = False
+        elif key.endswith("_s"):
+            worse = now > old * (1 + tolerance) + TIME_NOISE_S
+        elif key.endswith("_kb"):
+            worse = now > old * (1 + MEM_TOLERANCE)
+        else:
+            worse = now > old * (1 + SIZE_TOLERANCE)
+        flag = "  REGRESSION" if worse else ""
+        print(f"  {key:<38} {_fmt(key, old):>12} {_fmt(key, now):>12} {change:>+7.1%}{flag}")
+        if worse:
+            regressions.append(key)
+    return regressions
+
+
+def _fmt(key, value):
+    if value is None:
+        return "-"
+    if key.endswith("_s"):
+        return f"{value * 1000:,.1f} ms"
+    return f"{value:,}"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark fetch, compute and render on fixed fixtures.")
+    p.add_argument("--repeat",        type=int,   default=5, help="runs per compute/render phase")
+    p.add_argument("--scale",         type=float, default=1.0, help="replay payload size factor")
+    p.add_argument("--latency",                   default="", help="replay latency per host (seconds)")
+    p.add_argument("--fixtures",                  default=None, help="replay fixture directory")
+    p.add_argument("--baseline",                  default=os.path.join(BENCH_DIR, "baseline.json"))
+    p.add_argument("--save-baseline", action="store_true")
+    p.add_argument("--tolerance",     type=float, default=TIME_TOLERANCE, help="allowed relative slowdown")
+    opts = p.parse_args(argv)
+
+    proc, base = start_replay(opts)
+    # Read by fetch_data / http_cache / history_store at import time.
+    os.environ["DASHBOARD_API_BASE"]   = base
+    os.environ["DASHBOARD_NO_CACHE"]   = "1"
+    os.environ["DASHBOARD_NO_HISTORY"] = "1"
+    try:
+        import fetch_data
+
+        metrics      = {}
+        data, inputs = bench_fetch(fetch_data, metrics)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print("Benchmarking compute and render...")
+    bench_compute(inputs, metrics, opts.repeat)
+    bench_render(data, metrics, opts.repeat)
+    metrics["process.peak_rss_kb"] = _peak_rss_kb()
+
+    report = {
+        "meta": {
+            "time":     time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git":      _git_rev(),
+            "python":   platform.python_version(),
+            "platform": platform.platform(),
+            "scale":    opts.scale,
+            "repeat":   opts.repeat,
+            "latency":  opts.latency,
+            "fixtures": opts.fixtures,
+        },
+        "metrics": metrics,
+    }
+
+    regressions = []
+    if os.path.exists(opts.baseline) and not opts.save_baseline:
+        with open(opts.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nCompared with baseline from {baseline['meta'].get('time')} ({baseline['meta'].get('git')}):")
+        regressions = compare(metrics, baseline["metrics"], opts.tolerance)
+    else:
+        compare(metrics, {}, opts.tolerance)
+
+    save_results(report, opts.baseline, opts.save_baseline)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
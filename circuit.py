@@ -0,0 +1,65 @@
+"""
+circuit.py  –  Per-host circuit breakers for fetch_data.
+A host whose attempts keep failing at the connection level (timeouts,
+refused or reset connections, a firewall dropping the request) or with
+gateway errors (502/503/504) is given up on for the rest of the run once
+FAILURE_THRESHOLD attempts in a row have failed.  fetch_data then answers
+every further request to it from the response cache — the last good copy,
+marked stale — instead of waiting out more timeouts and back-off sleeps.
+A plain 500 from one endpoint doesn't count: it says nothing about the host.
+"""
+
+import os
+import threading
+
+# ── Config ────────────────────────────────────────────────────────────────────
+FAILURE_THRESHOLD = int(os.environ.get("DASHBOARD_BREAKER_FAILURES", "3"))
+HOST_FAILURES     = (502, 503, 504)   # statuses that count against the host
+
+
+class CircuitBreaker:
+    """Consecutive-failure counter for one host; open = stop sending."""
+
+    def __init__(self, host, threshold=FAILURE_THRESHOLD):
+        self.host      = host
+        self.threshold = threshold
+        self.failures  = 0
+        self.open      = False
+        self._lock     = threading.Lock()
+
+    def record(self, status):
+        """Counts one attempt (status None = no response).  Returns True
+        when this attempt is the one that opened the breaker."""
+        with self._lock:
+            if status is not None and status not in HOST_FAILURES:
+                self.failures = 0
+                return False
+            self.failures += 1
+            if not self.open and self.failures >= self.threshold:
+                self.open = True
+                return True
+            return False
+
+
+class Breakers:
+    """CircuitBreaker per host for the current run."""
+
+    def __init__(self, threshold=FAILURE_THRESHOLD):
+        self.threshold = threshold
+        self._hosts    = {}
+        self._lock     = threading.Lock()
+
+    def get(self, host):
+        with self._lock:
+            b = self._hosts.get(host)
+            if b is None:
+                b = self._hosts[host] = CircuitBreaker(host, self.threshold)
+            return b
+
+    def reset(self):
+        with self._lock:
+            self._hosts.clear()
+
+    def open_hosts(self):
+        with self._lock:
+            return sorted(h for h, b in self._hosts.items() if b.open)
@@ -0,0 +1,69 @@
+"""
+downsample.py  –  Shape-preserving thinning of chart series to a point budget.
+Largest-Triangle-Three-Buckets (LTTB): the axis is cut into budget − 2
+buckets and each bucket keeps the point forming the largest triangle with the
+point kept in the previous bucket and the average of the next one.  Spikes
+survive (they make large triangles) while flat stretches collapse, and the
+number of points sent is fixed by the budget, not by the history length.
+
+Several series that share one date axis (a stacked chart, or all fee series
+on fee_dates) are thinned together: each series is scaled to 0..1 and the
+triangle areas are summed, so one set of indices serves them all.
+"""
+
+
+def lttb_indices(xs, series, budget):
+    """Indices (ascending) of `budget` points of the axis `xs` for the given
+    list of y series (None = missing).  The first and last points are kept."""
+    size = len(xs)
+    if budget >= size or budget < 3:
+        return list(range(size))
+
+    scaled = []
+    for ys in series:
+        valid = [v for v in ys if v is not None]
+        if not valid:
+            continue
+        lo, hi = min(valid), max(valid)
+        span   = (hi - lo) or 1.0
+        scaled.append([None if v is None else (v - lo) / span for v in ys])
+
+    every = (size - 2) / (budget - 2)
+    out   = [0]
+    a     = 0
+    for b in range(budget - 2):
+        start = int(b * every) + 1
+        end   = int((b + 1) * every) + 1
+        nxt   = range(end, min(int((b + 2) * every) + 1, size))
+
+        avg_x  = sum(xs[i] for i in nxt) / len(nxt)
+        avg_ys = []
+        for ys in scaled:
+            vals = [ys[i] for i in nxt if ys[i] is not None]
+            avg_ys.append(sum(vals) / len(vals) if vals else None)
+
+        ax         = xs[a]
+        best, area = start, -1.0
+        for j in range(start, end):
+            total = 0.0
+            for ys, avg_y in zip(scaled, avg_ys):
+                ya, yj = ys[a], ys[j]
+                if ya is None or yj is None or avg_y is None:
+                    continue
+                total += abs((ax - avg_x) * (yj - ya) - (ax - xs[j]) * (avg_y - ya))
+            if total > area:
+                best, area = j, total
+        out.append(best)
+        a = best
+    out.append(size - 1)
+    return out
+
+
+def downsample_frame(frame, budget, names=None):
+    """Frame (oldest-first) thinned to `budget` rows by LTTB over `names`
+    (all columns by default)."""
+    if len(frame) <= budget:
+        return frame
+    names = names or frame.names
+    idx   = lttb_indices(frame.days, [frame[n] for n in names], budget)
+    return frame.take(idx)
@@ -8,13 +8,31 @@ Fetches all blockchain dashboard data directly from public APIs:
 """
 
 import os
+import sys
+import json
+import heapq
 import math
 import time
-from datetime import datetime, timezone
+import threading
+import traceback
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import quote, urlsplit
 
 import requests
 
+import http_cache
+import history_store
+import instrument
+from circuit import Breakers
+from throttle import Throttles, retry_after_seconds
+from downsample import downsample_frame
+import schemas
+from jsonstream import iter_array, loads
+from schemas import SchemaError
+from rolling import rolling_mean
+from timeseries import TimeSeriesFrame, align, day_to_str, str_to_day, ts_to_day
+
 # ── Config ────────────────────────────────────────────────────────────────────
 DUNE_API_KEY   = os.environ.get("DUNE_API_KEY", "")
 DUNE_QUERY_ID  = "6707340"
@@ -29,95 +47,382 @@ BINANCE_MAP = {
     "arbitrum": "ETH",
 }
 
+# Thread-pool width for independent fetchers and per-chain requests.
+# FETCH_WORKERS=1 restores the old one-after-another behaviour.
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", "8"))
+
+# Per-host limits: (max requests in flight, requests per second, burst).
+# Each host has an adaptive token bucket (throttle.py): the rate here is the
+# starting point, it speeds up on successes and halves on 429 / Retry-After,
+# and the learned rate carries over to the next run.  Different hosts run in
+# parallel.  DASHBOARD_RATE_LIMITS="api.coingecko.com=0.5:1,..." overrides
+# rate:burst per host.
+HOST_LIMITS = {
+    "api.llama.fi":         (4, 10.0, 4),
+    "stablecoins.llama.fi": (3, 10.0, 3),
+    "api.binance.com":      (4, 20.0, 4),
+    "api.coingecko.com":    (1, 0.67, 1),
+    "api.dune.com":         (1, 5.0,  1),
+}
+DEFAULT_HOST_LIMIT = (2, 5.0, 2)
+
+for _item in filter(None, os.environ.get("DASHBOARD_RATE_LIMITS", "").split(",")):
+    _host, _, _spec = _item.partition("=")
+    _inflight, _, _burst = HOST_LIMITS.get(_host, DEFAULT_HOST_LIMIT)
+    _rate, _, _new_burst = _spec.partition(":")
+    HOST_LIMITS[_host] = (_inflight, float(_rate), int(_new_burst or _burst))
+
+# DASHBOARD_API_BASE=http://127.0.0.1:8765 sends every request to a replay
+# server (replay_server.py) as <base>/<host><path>.  Cache keys, TTLs and the
+# host limits above still go by the real URL.
+API_BASE = os.environ.get("DASHBOARD_API_BASE", "").rstrip("/")
+
+# History windows rebuilt from the local history store on every run.
+KLINE_DAYS  = 3000   # Binance daily closes
+VOLUME_DAYS = 365    # CoinGecko daily volumes
+
+CORR_WINDOW = 90     # days in the rolling correlation window
+
+# Points per chart axis after LTTB downsampling (see downsample.py); shorter
+# series are sent in full.
+POINT_BUDGET = {
+    "stablecoins":  600,   # sc_dates
+    "tvl":          600,   # tvl_dates
+    "total_tvl":    500,   # total_tvl_dates
+    "fees":         600,   # fee_dates
+    "correlations": 800,   # corr_dates
+}
+
 sess = requests.Session()
 sess.headers.update({"User-Agent": "blockchain-dashboard/1.0"})
+_adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=16)
+sess.mount("https://", _adapter)
+sess.mount("http://",  _adapter)
+
+
+# 4xx answers that can change without the URL changing; every other 4xx fails
+# the request at once instead of being retried.
+RETRYABLE_4XX = (408, 425, 429)
+# Of the failing ones, those remembered in the negative cache (not auth
+# errors, which a new API key fixes).
+NEGATIVE_STATUSES = (400, 404, 405, 410, 414, 422)
+
+# ── Concurrency ───────────────────────────────────────────────────────────────
+THROTTLE_STATE = os.path.join(http_cache.CACHE_DIR, "throttle.json")
+
+throttles = Throttles(HOST_LIMITS, DEFAULT_HOST_LIMIT)
+throttles.load_state(THROTTLE_STATE)
+
+
+breakers = Breakers()
+
+# Responses served from the cache after their host failed: url → age (s).
+_stale      = {}
+_stale_lock = threading.Lock()
+# Responses that no longer match their schema, with no good cached copy to
+# serve instead: url → error.  Their sections render without data.
+_broken = {}
+
+
+def host_gate(url):
+    """The throttle for url's host (see throttle.py)."""
+    return throttles.get(urlsplit(url).hostname or "")
+
+
+def save_throttle_state():
+    """Keeps this run's learned rates for the next one; reports 429s."""
+    for host, (rate, throttled) in sorted(throttles.rates().items()):
+        if throttled:
+            print(f"  {host}: rate-limited {throttled}x, now {rate:.2f} req/s")
+    if http_cache.ENABLED and not http_cache.OFFLINE:
+        throttles.save_state(THROTTLE_STATE)
+
+
+def pmap(fn, items, workers=None):
+    """Map fn over items on a thread pool, preserving input order."""
+    items   = list(items)
+    workers = min(workers or FETCH_WORKERS, len(items))
+    if workers <= 1:
+        return [fn(x) for x in items]
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(fn, items))
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
-def get_json(url, params=None, headers=None, retries=3, timeout=30):
+_inflight      = {}
+_inflight_lock = threading.Lock()
+
+
+def get_json(url, params=None, headers=None, retries=3, timeout=30, parse=loads):
+    """GET url and return parsed JSON (None on failure).  `parse` turns the
+    raw body into the result: the endpoint's Schema (see schemas.py) or a
+    streaming parse of it (jsonstream.iter_array).  A body that doesn't match its schema is never
+    cached or retried: the last good cached copy is served as stale, and
+    without one the request fails like any other (None), is logged as an
+    ERROR and listed by broken_sources() for the page to flag.
+    Identical concurrent calls are coalesced: the first caller sends the
+    request and the others wait for its result, which all callers share
+    and must treat as read-only."""
+    key = (http_cache.cache_key(url, params)[0], parse)
+    with _inflight_lock:
+        call   = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = Future()
+    if not leader:
+        started = time.perf_counter()
+        data    = call.result()
+        instrument.record_request(url, latency=time.perf_counter() - started, cache="coalesced")
+        return data
+    try:
+        data = _fetch_json(url, params, headers, retries, timeout, parse)
+        call.set_result(data)
+        return data
+    except BaseException as exc:
+        call.set_exception(exc)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def api_url(url):
+    """The URL actually requested: `url` itself, or its API_BASE rewrite."""
+    if not API_BASE:
+        return url
+    parts = urlsplit(url)
+    return f"{API_BASE}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+def _fetch_json(url, params, headers, retries, timeout, parse=loads):
+    cache  = http_cache.get_cache()
+    cached = cache.lookup(url, params) if cache else None
+    if cached and (cached["fresh"] or http_cache.OFFLINE):
+        try:
+            data = parse(cached["body"])
+        except SchemaError:
+            cached = None           # stored before the schema changed: download again
+        else:
+            instrument.record_request(url, cache="fresh" if cached["fresh"] else "offline")
+            return data
+    known_bad = cache.lookup_negative(url, params) if cache else None
+    if known_bad:
+        instrument.record_request(url, known_bad, cache="negative", error=f"HTTP {known_bad} (cached)")
+        return None
+    if http_cache.OFFLINE:
+        print(f"  WARN: offline and not cached: {url}")
+        instrument.record_request(url, cache="offline", error="not cached")
+        return None
+
+    # Stale entry: ask the server whether it changed instead of re-downloading.
+    headers = dict(headers or {})
+    if cached and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached["last_modified"]:
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    # Timings for the instrument record: response wait, gate queueing, back-off.
+    stats   = {"latency": 0.0, "queued": 0.0, "slept": 0.0, "cache": "miss" if cache else "disabled"}
+    gate    = host_gate(url)
+    breaker = breakers.get(urlsplit(url).hostname or "")
     for attempt in range(retries):
+        if breaker.open:
+            return _fail(url, cached, f"{breaker.host} circuit open", None, attempt, stats, parse)
+        r = None
         try:
-            r = sess.get(url, params=params, headers=headers, timeout=timeout)
+            queued = time.perf_counter()
+            with gate:
+                sent = time.perf_counter()
+                stats["queued"] += sent - queued
+                try:
+                    r = sess.get(api_url(url), params=params, headers=headers, timeout=timeout)
+                finally:
+                    stats["latency"] += time.perf_counter() - sent
+                    _record_attempt(breaker, r)
+            retry_after = retry_after_seconds(r.headers.get("Retry-After"))
+            gate.feedback(r.status_code, retry_after)
+            if r.status_code == 304 and cached:
+                cache.refresh(cached)
+                stats["cache"] = "revalidated"
+                instrument.record_request(url, 304, retries=attempt, **stats)
+                return parse(cached["body"])
+            if 400 <= r.status_code < 500 and r.status_code not in RETRYABLE_4XX:
+                print(f"  WARN: {r.status_code} for {url} - not retrying")
+                if cache and r.status_code in NEGATIVE_STATUSES:
+                    cache.store_negative(url, params, r.status_code)
+                instrument.record_request(
+                    url, r.status_code, retries=attempt, error=f"HTTP {r.status_code}", **stats,
+                )
+                return None
             r.raise_for_status()
-            return r.json()
+            data = parse(r.content)
+            if cache:
+                cache.store(
+                    url, params, r.content,
+                    r.headers.get("ETag"), r.headers.get("Last-Modified"),
+                )
+            instrument.record_request(url, r.status_code, nbytes=len(r.content), retries=attempt, **stats)
+            return data
+        except SchemaError as exc:
+            # After a 304 the body that failed is the cached one: nothing to fall back on.
+            fallback = cached if r.status_code != 304 else None
+            data = _fail(url, fallback, f"schema: {exc}", r, attempt, stats, parse)
+            if data is None:
+                print(f"  ERROR: {url} no longer matches its schema - {exc}")
+                with _stale_lock:
+                    _broken[url] = str(exc)
+            return data
         except Exception as exc:
-            if attempt == retries - 1:
-                print(f"  WARN: failed {url}: {exc}")
-                return None
-            time.sleep(2 ** attempt)
+            if attempt == retries - 1 or breaker.open:
+                return _fail(url, cached, exc, r, attempt, stats, parse)
+            # After a 429 (or 503 + Retry-After) the host throttle holds every
+            # request to that host until it may retry; other failures back off.
+            if r is None or not (r.status_code == 429 or (r.status_code == 503 and retry_after is not None)):
+                time.sleep(2 ** attempt)
+                stats["slept"] += 2 ** attempt
+
+
+def _record_attempt(breaker, r):
+    if breaker.record(r.status_code if r is not None else None):
+        print(f"  WARN: {breaker.host} failed {breaker.failures} times in a row - "
+              f"skipping it for the rest of this run")
+
+
+def _fail(url, cached, error, r, attempt, stats, parse):
+    """Final answer for a request that got no usable response: the last good
+    cached copy (recorded as stale), else None."""
+    status = r.status_code if r is not None else None
+    try:
+        data = parse(cached["body"]) if cached else None
+    except SchemaError:
+        data = None                 # the cached copy doesn't match either
+    if data is not None:
+        print(f"  WARN: {error} - using cached copy from {cached['age'] / 3600:.1f}h ago: {url}")
+        with _stale_lock:
+            _stale[url] = cached["age"]
+        stats = dict(stats, cache="stale")
+        instrument.record_request(url, status, retries=attempt, error=str(error), **stats)
+        return data
+    print(f"  WARN: failed {url}: {error}")
+    instrument.record_request(url, status, retries=attempt, error=str(error), **stats)
+    return None
+
+
+def broken_sources():
+    """[{host, endpoint, error}] for responses that failed their schema this run."""
+    with _stale_lock:
+        items = sorted(_broken.items())
+    return [
+        {"host": urlsplit(u).hostname, "endpoint": urlsplit(u).path, "error": err}
+        for u, err in items
+    ]
+
+
+def stale_sources():
+    """[{host, endpoint, age_hours}] for responses served stale this run."""
+    with _stale_lock:
+        items = sorted(_stale.items())
+    return [
+        {"host": urlsplit(u).hostname, "endpoint": urlsplit(u).path, "age_hours": round(age / 3600, 1)}
+        for u, age in items
+    ]
 
 
-def ts_to_date(ts):
-    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime("%Y-%m-%d")
+def rolling7(vals, mask=None):
+    """7-day rolling average (assumes vals ordered oldest→newest).
+    Zero and None days (or days unset in `mask`) are left out of the average."""
+    return rolling_mean(vals, 7, mask=mask, skip_zero=True)
 
 
-def rolling7(vals):
-    """7-day rolling average (assumes vals ordered oldest→newest)."""
-    out = []
-    for i in range(len(vals)):
-        window = [v for v in vals[max(0, i - 6): i + 1] if v is not None and v != 0]
-        out.append(sum(window) / len(window) if window else None)
+def pct_change(vals):
+    """Day-over-day % changes; None where either day is missing or zero."""
+    out = [None]
+    for i in range(1, len(vals)):
+        if vals[i] is not None and vals[i - 1]:
+            out.append((vals[i] - vals[i - 1]) / vals[i - 1])
+        else:
+            out.append(None)
+    return out
+
+
+def rolling_corr_pct(xp, yp, windows=(90,), min_pairs=20):
+    """Rolling Pearson correlation of two % change series for several windows
+    in one pass.  The value at i covers the pairs in [i - window, i).
+
+    Each window keeps running sums of x, y, x², y² and xy over its valid
+    pairs (both sides non-None); a pair is added as it enters and subtracted
+    as it leaves, so every output is O(1).  As in rolling.RollingWindow, the
+    sums are rebuilt with math.fsum once per window length, and whenever a
+    leaving pair dwarfs what is left, so cancellation error can't turn a
+    flat window's zero variance into noise.  Returns {window: [corr, ...]}."""
+    n     = len(xp)
+    valid = [a is not None and b is not None for a, b in zip(xp, yp)]
+    out   = {w: [None] * n for w in windows}
+    sums  = {w: [0, 0.0, 0.0, 0.0, 0.0, 0.0] for w in windows}   # n, x, y, xx, yy, xy
+
+    for i in range(n):
+        for w in windows:
+            c, sx, sy, sxx, syy, sxy = sums[w]
+            if i >= w and c >= min_pairs:
+                num  = sxy - sx * sy / c
+                vx   = max(sxx - sx * sx / c, 0.0)
+                vy   = max(syy - sy * sy / c, 0.0)
+                den  = math.sqrt(vx * vy)
+                out[w][i] = num / den if den > 1e-10 else None
+
+        for w in windows:
+            acc = sums[w]
+            if valid[i]:
+                a, b = xp[i], yp[i]
+                acc[0] += 1; acc[1] += a; acc[2] += b
+                acc[3] += a * a; acc[4] += b * b; acc[5] += a * b
+            j = i - w
+            rebuild = (i + 1) % w == 0
+            if j >= 0 and valid[j]:
+                a, b = xp[j], yp[j]
+                acc[0] -= 1; acc[1] -= a; acc[2] -= b
+                acc[3] -= a * a; acc[4] -= b * b; acc[5] -= a * b
+                rebuild = rebuild or a * a > 1e3 * abs(acc[3]) or b * b > 1e3 * abs(acc[4])
+            if rebuild:
+                live = [k for k in range(max(j + 1, 0), i + 1) if valid[k]]
+                acc[:] = [
+                    len(live),
+                    math.fsum(xp[k] for k in live),         math.fsum(yp[k] for k in live),
+                    math.fsum(xp[k] * xp[k] for k in live), math.fsum(yp[k] * yp[k] for k in live),
+                    math.fsum(xp[k] * yp[k] for k in live),
+                ]
     return out
 
 
 def rolling_corr(x, y, window=90):
     """Rolling Pearson correlation of % changes (oldest→newest)."""
-    n = len(x)
-
-    def pct(vals):
-        out = [None]
-        for i in range(1, len(vals)):
-            if vals[i] is not None and vals[i - 1]:
-                out.append((vals[i] - vals[i - 1]) / vals[i - 1])
-            else:
-                out.append(None)
-        return out
-
-    xp, yp = pct(x), pct(y)
-    result = [None] * n
-    for i in range(window, n):
-        pairs = [
-            (a, b) for a, b in zip(xp[i - window: i], yp[i - window: i])
-            if a is not None and b is not None
-        ]
-        if len(pairs) < 20:
-            continue
-        xs, ys = zip(*pairs)
-        mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
-        num = sum((a - mx) * (b - my) for a, b in zip(xs, ys))
-        den = math.sqrt(
-            sum((a - mx) ** 2 for a in xs) * sum((b - my) ** 2 for b in ys)
-        )
-        result[i] = num / den if den > 1e-10 else None
-    return result
+    return rolling_corr_pct(pct_change(x), pct_change(y), (window,))[window]
 
 
 # ── Data fetchers ─────────────────────────────────────────────────────────────
 def fetch_stablecoin_overview():
     """Returns (overview_top30, peg_mech_items)."""
     print("  Fetching stablecoin overview...")
-    raw    = get_json("https://stablecoins.llama.fi/stablecoins") or {}
-    assets = raw.get("peggedAssets", [])
-    total_circ = sum(
-        ((a.get("circulating") or {}).get("peggedUSD") or 0) for a in assets
-    )
+    raw    = get_json("https://stablecoins.llama.fi/stablecoins", parse=schemas.STABLECOINS)
+    assets = raw["peggedAssets"] if raw else []
+    total_circ = sum(a["circulating"]["peggedUSD"] for a in assets)
 
     overview = []
     for a in assets:
-        circ       = (a.get("circulating")        or {}).get("peggedUSD") or 0
-        prev_day   = (a.get("circulatingPrevDay")  or {}).get("peggedUSD") or 0
-        prev_week  = (a.get("circulatingPrevWeek") or {}).get("peggedUSD") or 0
-        prev_month = (a.get("circulatingPrevMonth")or {}).get("peggedUSD") or 0
+        circ       = a["circulating"]["peggedUSD"]
+        prev_day   = a["circulatingPrevDay"]["peggedUSD"]
+        prev_week  = a["circulatingPrevWeek"]["peggedUSD"]
+        prev_month = a["circulatingPrevMonth"]["peggedUSD"]
         overview.append({
-            "name":          a.get("name"),
-            "symbol":        a.get("symbol"),
-            "peg_mechanism": a.get("pegMechanism"),
+            "name":          a["name"],
+            "symbol":        a["symbol"],
+            "peg_mechanism": a["pegMechanism"],
             "market_share":  circ / total_circ if total_circ else 0,
             "circulating":   circ,
             "change_1d":     (circ / prev_day   - 1) if prev_day   else 0,
             "change_1w":     (circ / prev_week  - 1) if prev_week  else 0,
             "change_1m":     (circ / prev_month - 1) if prev_month else 0,
-            "peg":           a.get("price"),
+            "peg":           a["price"],
         })
 
     overview.sort(key=lambda x: -(x["circulating"] or 0))
@@ -131,42 +436,45 @@ def fetch_stablecoin_overview():
 
 
 def fetch_stablecoin_market_caps():
-    """Returns (dates, usdt, usdc, others, total, date_usdt_daily, date_usdc_daily).
-    Sampled-every-3 lists are newest-first; daily dicts are keyed by 'YYYY-MM-DD'."""
+    """Returns (dates, usdt, usdc, others, total, usdt_daily, usdc_daily, sc_daily).
+    The downsampled lists are newest-first; usdt/usdc_daily are one-column
+    frames ('mcap') for the correlations, sc_daily holds the full-resolution
+    sc_* series for the zoom tiles."""
     print("  Fetching stablecoin market caps...")
-    total_raw = get_json("https://stablecoins.llama.fi/stablecoincharts/all") or []
-    usdt_raw  = get_json("https://stablecoins.llama.fi/stablecoin/1") or {}
-    usdc_raw  = get_json("https://stablecoins.llama.fi/stablecoin/2") or {}
+    total_raw = get_json("https://stablecoins.llama.fi/stablecoincharts/all", parse=schemas.STABLECOIN_CHART) or []
+    usdt_raw  = get_json("https://stablecoins.llama.fi/stablecoin/1", parse=schemas.STABLECOIN) or {"tokens": []}
+    usdc_raw  = get_json("https://stablecoins.llama.fi/stablecoin/2", parse=schemas.STABLECOIN) or {"tokens": []}
 
-    date_total = {
-        ts_to_date(d["date"]): (
-            (d.get("totalCirculatingUSD") or d.get("totalCirculating") or {}).get("peggedUSD") or 0
-        )
+    total_daily = TimeSeriesFrame.from_points((
+        (d["date"], d["totalCirculatingUSD"]["peggedUSD"] or d["totalCirculating"]["peggedUSD"])
         for d in total_raw
-    }
-    date_usdt = {
-        ts_to_date(t["date"]): ((t.get("circulating") or {}).get("peggedUSD") or 0)
-        for t in usdt_raw.get("tokens", [])
-    }
-    date_usdc = {
-        ts_to_date(t["date"]): ((t.get("circulating") or {}).get("peggedUSD") or 0)
-        for t in usdc_raw.get("tokens", [])
-    }
-
-    all_dates_desc = sorted(date_total.keys(), reverse=True)
-    dates, usdt, usdc, others, total = [], [], [], [], []
-    for i, d in enumerate(all_dates_desc):
-        if i % 3 != 0:
-            continue
-        t = date_total.get(d) or 0
-        u = date_usdt.get(d)  or 0
-        c = date_usdc.get(d)  or 0
-        dates.append(d);  usdt.append(u);   usdc.append(c)
-        others.append(max(0, t - u - c));   total.append(t)
-
-    # Return daily dicts so fetch_all can reuse them for correlations
+    ), "total")
+    usdt_daily = TimeSeriesFrame.from_points((
+        (t["date"], t["circulating"]["peggedUSD"]) for t in usdt_raw["tokens"]
+    ), "mcap")
+    usdc_daily = TimeSeriesFrame.from_points((
+        (t["date"], t["circulating"]["peggedUSD"]) for t in usdc_raw["tokens"]
+    ), "mcap")
+
+    frame = align([
+        total_daily, usdt_daily.rename({"mcap": "usdt"}), usdc_daily.rename({"mcap": "usdc"}),
+    ], on=total_daily.days)
+    daily = TimeSeriesFrame(frame.days)
+    daily["total"]  = [v or 0 for v in frame["total"]]
+    daily["usdt"]   = [v or 0 for v in frame["usdt"]]
+    daily["usdc"]   = [v or 0 for v in frame["usdc"]]
+    daily["others"] = [max(0, t - u - c) for t, u, c in
+                       zip(daily["total"], daily["usdt"], daily["usdc"])]
+    view   = downsample_frame(daily, POINT_BUDGET["stablecoins"]).reversed()
+    total  = view["total"]
+    usdt   = view["usdt"]
+    usdc   = view["usdc"]
+    others = view["others"]
+
+    # Return the daily series so fetch_all can reuse them for correlations
     # without a second API call to stablecoin/1 and stablecoin/2.
-    return dates, usdt, usdc, others, total, date_usdt, date_usdc
+    sc_daily = daily.rename({n: "sc_" + n for n in daily.names})
+    return view.dates(), usdt, usdc, others, total, usdt_daily, usdc_daily, sc_daily
 
 
 def fetch_eth_active_addresses():
@@ -180,210 +488,347 @@ def fetch_eth_active_addresses():
         f"https://api.dune.com/api/v1/query/{DUNE_QUERY_ID}/results",
         headers={"X-Dune-Api-Key": DUNE_API_KEY},
         params={"limit": 10000},
-    ) or {}
-    rows = (raw.get("result") or {}).get("rows", [])
+        parse=schemas.DUNE_ACTIVE_ADDRESSES,
+    )
+    rows = raw["result"]["rows"] if raw else []
 
     by_month = {}
     for row in rows:
-        month  = str(row.get("month", "")).replace(" UTC", "").split(" ")[0][:10]
-        stable = str(row.get("stablecoin", ""))
-        count  = row.get("active_senders", 0)
-        if month not in by_month:
-            by_month[month] = {"USDT": None, "USDC": None}
-        if "USDT" in stable.upper():
-            by_month[month]["USDT"] = count
-        elif "USDC" in stable.upper():
-            by_month[month]["USDC"] = count
-
-    sorted_months = sorted(by_month.keys(), reverse=True)
-    return (
-        sorted_months,
-        [by_month[m].get("USDT") for m in sorted_months],
-        [by_month[m].get("USDC") for m in sorted_months],
-    )
+        month  = row["month"].replace(" UTC", "").split(" ")[0][:10]
+        stable = row["stablecoin"].upper()
+        count  = row["active_senders"]
+        try:
+            day = str_to_day(month)
+        except ValueError:
+            continue
+        slot = by_month.setdefault(day, {"USDT": None, "USDC": None})
+        if "USDT" in stable:
+            slot["USDT"] = count
+        elif "USDC" in stable:
+            slot["USDC"] = count
+
+    frame = TimeSeriesFrame(sorted(by_month))
+    frame["USDT"] = [by_month[d]["USDT"] for d in frame.days]
+    frame["USDC"] = [by_month[d]["USDC"] for d in frame.days]
+    desc = frame.reversed()
+    return desc.dates(), desc["USDT"], desc["USDC"]
+
+
+BINANCE_KLINES_URL = "https://api.binance.com/api/v3/klines"
+
+
+def _kline_closes(klines):
+    return TimeSeriesFrame.from_points(((k[0], float(k[4])) for k in klines), "close", unit=1000)
 
 
 def fetch_binance_prices(ticker):
-    """Returns {date_str: close_price} for up to ~3000 days."""
-    result   = {}
-    end_time = None
-    for _ in range(3):
-        params = {"symbol": f"{ticker}USDT", "interval": "1d", "limit": 1000}
-        if end_time:
-            params["endTime"] = end_time
-        klines = get_json("https://api.binance.com/api/v3/klines", params=params)
-        if not klines:
-            break
-        for k in klines:
-            d = datetime.fromtimestamp(k[0] / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
-            result[d] = float(k[4])
-        end_time = klines[0][0] - 1
-    return result
-
-
-def fetch_fees_and_prices():
+    """Returns a 'close' frame of daily prices for up to ~3000 days.
+    Once the history store holds the ticker, only days from the last stored
+    one onwards are requested (that day is re-read as its candle may have
+    been open)."""
+    store = history_store.get_store()
+    last  = store.last_day("binance", ticker) if store else None
+    url   = BINANCE_KLINES_URL
+
+    pages = []
+    if last is not None:
+        start_time = last * 86_400_000
+        while True:
+            klines = get_json(url, params={
+                "symbol": f"{ticker}USDT", "interval": "1d",
+                "limit": 1000, "startTime": start_time,
+            }, parse=schemas.KLINES)
+            if not klines:
+                break
+            pages.extend(klines)
+            if len(klines) < 1000:
+                break
+            start_time = klines[-1][0] + 1
+    else:
+        end_time = None
+        for _ in range(3):
+            params = {"symbol": f"{ticker}USDT", "interval": "1d", "limit": 1000}
+            if end_time:
+                params["endTime"] = end_time
+            klines = get_json(url, params=params, parse=schemas.KLINES)
+            if not klines:
+                break
+            pages.extend(klines)
+            end_time = klines[0][0] - 1
+
+    result = _kline_closes(pages)
+    if not store:
+        return result
+    store.upsert("binance", ticker, result, "close")
+    newest = store.last_day("binance", ticker)
+    if newest is None:
+        return result
+    return store.load("binance", ticker, since=newest - KLINE_DAYS + 1, name="close")
+
+
+def fetch_prices():
+    """Returns {ticker: 'close' frame} for every ticker in BINANCE_MAP."""
+    print("  Fetching prices from Binance...")
+
+    def _prices(ticker):
+        print(f"    {ticker}...")
+        return fetch_binance_prices(ticker)
+
+    tickers = sorted(set(BINANCE_MAP.values()))
+    return dict(zip(tickers, pmap(_prices, tickers)))
+
+
+def fetch_fees_and_prices(prices=None):
     """
     Returns dict with fee_dates, fee_eth/sol/bsc/btc/tron/base/total,
     fee_eth/sol_price, fee_eth/sol_native.  All lists newest-first, every 3.
     Also returns _btc_price_daily and _eth_price_daily lookup dicts.
+    `prices` is fetch_prices() output; fetched here when not supplied.
     """
     print("  Fetching global fees...")
     global_raw = get_json(
-        "https://api.llama.fi/overview/fees?excludeTotalDataChart=false"
-    ) or {}
-    global_chart = {
-        ts_to_date(row[0]): row[1]
-        for row in global_raw.get("totalDataChart", [])
-    }
+        "https://api.llama.fi/overview/fees?excludeTotalDataChart=false", parse=schemas.FEES,
+    )
+    global_chart = TimeSeriesFrame.from_points(global_raw["totalDataChart"] if global_raw else [], "total")
 
-    chain_fees = {}
-    for chain in CHAINS:
+    def _chain_fees(chain):
         print(f"  Fetching fees for {chain}...")
         raw = get_json(
             f"https://api.llama.fi/overview/fees/{chain}?excludeTotalDataChart=false",
-            timeout=25,
-        ) or {}
-        chain_fees[chain] = {
-            ts_to_date(row[0]): row[1]
-            for row in raw.get("totalDataChart", [])
-        }
-        time.sleep(0.3)
+            timeout=25, parse=schemas.FEES,
+        )
+        return TimeSeriesFrame.from_points(raw["totalDataChart"] if raw else [], chain)
+
+    chain_fees = pmap(_chain_fees, CHAINS)
+    if prices is None:
+        prices = fetch_prices()
+
+    empty = TimeSeriesFrame.from_points([], "close")
+    daily = align(
+        [global_chart] + chain_fees + [
+            prices.get(t, empty).rename({"close": t}) for t in ("ETH", "SOL", "BTC")
+        ],
+        on=global_chart.days,
+    )
 
-    print("  Fetching prices from Binance...")
-    prices = {}
-    for ticker in set(BINANCE_MAP.values()):
-        print(f"    {ticker}...")
-        prices[ticker] = fetch_binance_prices(ticker)
-        time.sleep(0.2)
-
-    all_dates_asc = sorted(global_chart.keys())
-
-    raw_eth   = [chain_fees["ethereum"].get(d) for d in all_dates_asc]
-    raw_sol   = [chain_fees["solana"].get(d)   for d in all_dates_asc]
-    raw_bsc   = [chain_fees["bsc"].get(d)      for d in all_dates_asc]
-    raw_btc   = [chain_fees["bitcoin"].get(d)  for d in all_dates_asc]
-    raw_tron  = [chain_fees["tron"].get(d)     for d in all_dates_asc]
-    raw_base  = [chain_fees["base"].get(d)     for d in all_dates_asc]
-    raw_total = [global_chart.get(d)           for d in all_dates_asc]
-
-    ep_asc = [prices.get("ETH", {}).get(d) for d in all_dates_asc]
-    sp_asc = [prices.get("SOL", {}).get(d) for d in all_dates_asc]
-    bp_asc = [prices.get("BTC", {}).get(d) for d in all_dates_asc]
-
-    avg_eth   = rolling7(raw_eth)
-    avg_sol   = rolling7(raw_sol)
-    avg_bsc   = rolling7(raw_bsc)
-    avg_btc   = rolling7(raw_btc)
-    avg_tron  = rolling7(raw_tron)
-    avg_base  = rolling7(raw_base)
-    avg_total = rolling7(raw_total)
+    def avg(name):
+        return rolling7(*daily.column(name))
+
+    ep_asc = daily["ETH"]
+    sp_asc = daily["SOL"]
+    bp_asc = daily["BTC"]
 
     def safe_div(a, b):
         return a / b if a and b else None
 
-    nat_eth = [safe_div(f, p) for f, p in zip(avg_eth, ep_asc)]
-    nat_sol = [safe_div(f, p) for f, p in zip(avg_sol, sp_asc)]
-    nat_btc = [safe_div(f, p) for f, p in zip(avg_btc, bp_asc)]
-
-    idxs = list(range(0, len(all_dates_asc), 3))
-    def sr(lst): return [lst[i] for i in idxs][::-1]
-
+    out = TimeSeriesFrame(daily.days)
+    for key, chain in [("fee_eth", "ethereum"), ("fee_sol", "solana"), ("fee_bsc", "bsc"),
+                       ("fee_btc", "bitcoin"),  ("fee_tron", "tron"),  ("fee_base", "base"),
+                       ("fee_total", "total")]:
+        out[key] = avg(chain)
+    out["fee_eth_price"]  = ep_asc
+    out["fee_sol_price"]  = sp_asc
+    out["fee_btc_price"]  = bp_asc
+    out["fee_eth_native"] = [safe_div(f, p) for f, p in zip(out["fee_eth"], ep_asc)]
+    out["fee_sol_native"] = [safe_div(f, p) for f, p in zip(out["fee_sol"], sp_asc)]
+    out["fee_btc_native"] = [safe_div(f, p) for f, p in zip(out["fee_btc"], bp_asc)]
+
+    view = downsample_frame(out, POINT_BUDGET["fees"]).reversed()
     return {
-        "fee_dates":       sr(all_dates_asc),
-        "fee_eth":         sr(avg_eth),
-        "fee_sol":         sr(avg_sol),
-        "fee_bsc":         sr(avg_bsc),
-        "fee_btc":         sr(avg_btc),
-        "fee_tron":        sr(avg_tron),
-        "fee_base":        sr(avg_base),
-        "fee_total":       sr(avg_total),
-        "fee_eth_price":   sr(ep_asc),
-        "fee_sol_price":   sr(sp_asc),
-        "fee_btc_price":   sr(bp_asc),
-        "fee_eth_native":  sr(nat_eth),
-        "fee_sol_native":  sr(nat_sol),
-        "fee_btc_native":  sr(nat_btc),
-        # Return full Binance price dicts directly — not indexed by fee dates,
+        "fee_dates": view.dates(),
+        **{name: view[name] for name in out.names},
+        # Return full Binance price series directly — not indexed by fee dates,
         # so correlations work even when fee API calls fail (e.g. corporate firewall)
-        "_btc_price_daily": prices.get("BTC", {}),
-        "_eth_price_daily": prices.get("ETH", {}),
-        "_sol_price_daily": prices.get("SOL", {}),
+        "_btc_price_daily": prices.get("BTC", empty),
+        "_eth_price_daily": prices.get("ETH", empty),
+        "_sol_price_daily": prices.get("SOL", empty),
+        # Every 3rd day (oldest-first), the sampling build_fee_efficiency's
+        # monthly sums have always been based on
+        "_fee_frame":       out.every(3),
+        # Full daily series for the zoom tiles
+        "_fee_daily":       out,
     }
 
 
-def fetch_tvl_data():
-    """Returns dicts for total TVL and per-chain TVL (newest-first)."""
-    print("  Fetching TVL by chain...")
-    chains_raw = get_json("https://api.llama.fi/v2/chains") or []
-    top_chains = sorted(chains_raw, key=lambda x: -(x.get("tvl") or 0))[:10]
-    slugs = [c["name"].lower().replace(" ", "-") for c in top_chains]
+# ── Chain slugs ───────────────────────────────────────────────────────────────
+# The dashboard names chains by slug ("hyperliquid-l1"); historicalChainTvl
+# wants the chain's name as listed by /v2/chains ("Hyperliquid L1").  The
+# slug → name index is rebuilt from every /v2/chains response and kept in
+# CACHE_DIR, so a slug that /v2/chains doesn't list is never requested.
+CHAIN_INDEX_PATH = os.path.join(http_cache.CACHE_DIR, "chain_slugs.json")
+
+
+def chain_slug(name):
+    return name.lower().replace(" ", "-")
+
+
+def _load_chain_index():
+    try:
+        with open(CHAIN_INDEX_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+_chain_index = _load_chain_index()
+
+
+def chain_index(chains_raw):
+    return {chain_slug(c["name"]): c["name"] for c in chains_raw if c["name"]}
+
+
+def update_chain_index(chains_raw):
+    """Rebuilds the slug → name index from a /v2/chains response."""
+    global _chain_index
+    index = chain_index(chains_raw)
+    if not index:
+        return                                    # failed fetch: keep the old index
+    _chain_index = index
+    if http_cache.ENABLED and not http_cache.OFFLINE:
+        os.makedirs(http_cache.CACHE_DIR, exist_ok=True)
+        tmp = CHAIN_INDEX_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp, CHAIN_INDEX_PATH)
+
+
+def chain_tvl_url(slug, index=None):
+    """historicalChainTvl URL for a slug; None if /v2/chains doesn't list it."""
+    index = _chain_index if index is None else index
+    if index and slug not in index:
+        return None
+    return f"https://api.llama.fi/v2/historicalChainTvl/{quote(index.get(slug, slug))}"
+
 
-    chain_hist = {}
-    for slug in slugs:
-        raw = get_json(f"https://api.llama.fi/v2/historicalChainTvl/{slug}") or []
-        chain_hist[slug] = {ts_to_date(r["date"]): r.get("tvl", 0) for r in raw}
-        time.sleep(0.25)
+def fetch_chain_tvl_history(slug):
+    """Returns a 'tvl' frame for one chain."""
+    url = chain_tvl_url(slug)
+    if url is None:
+        print(f"  No TVL history for {slug} - not listed by /v2/chains")
+        return TimeSeriesFrame.from_points([], "tvl")
+    raw = get_json(url, parse=schemas.CHAIN_TVL) or []
+    return TimeSeriesFrame.from_points(((r["date"], r["tvl"]) for r in raw if r["tvl"] is not None), "tvl")
+
+
+def fetch_chain_tvl_histories(slugs):
+    """Returns {slug: 'tvl' frame} for several chains."""
+    slugs = list(slugs)
+    return dict(zip(slugs, pmap(fetch_chain_tvl_history, slugs)))
+
+
+def top_chain_slugs(chains_raw, n=10):
+    """Slugs of the n largest chains in a /v2/chains response."""
+    top_chains = sorted(chains_raw, key=lambda x: -(x["tvl"] or 0))[:n]
+    return [chain_slug(c["name"]) for c in top_chains]
+
+
+def fetch_tvl_data(chains_raw=None, chain_hist=None):
+    """Returns dicts for total TVL and per-chain TVL (newest-first).
+    `chains_raw` (the /v2/chains response) and `chain_hist` (from
+    fetch_chain_tvl_histories) are fetched here when not supplied."""
+    print("  Fetching TVL by chain...")
+    if chains_raw is None:
+        chains_raw = get_json("https://api.llama.fi/v2/chains", parse=schemas.CHAINS) or []
+        update_chain_index(chains_raw)
+    slugs = top_chain_slugs(chains_raw)
+    if chain_hist is None:
+        chain_hist = fetch_chain_tvl_histories(slugs)
 
     print("  Fetching total TVL...")
-    total_raw  = get_json("https://api.llama.fi/v2/historicalChainTvl") or []
-    date_total = {ts_to_date(r["date"]): r.get("tvl", 0) for r in total_raw}
+    total_raw = get_json("https://api.llama.fi/v2/historicalChainTvl", parse=schemas.CHAIN_TVL) or []
+    total     = TimeSeriesFrame.from_points(
+        ((r["date"], r["tvl"]) for r in total_raw if r["tvl"] is not None), "total"
+    )
 
-    all_dates_asc = sorted(date_total.keys())
+    frame = align(
+        [total] + [chain_hist[s].rename({"tvl": s}) for s in slugs if s in chain_hist],
+        on=total.days,
+    )
 
     def col(slug):
-        return [chain_hist.get(slug, {}).get(d) for d in all_dates_asc]
+        return frame[slug] if slug in frame else [None] * len(frame)
 
     eth_a   = col("ethereum");  sol_a  = col("solana")
     bsc_a   = col("bsc");       btc_a  = col("bitcoin")
     tron_a  = col("tron");      base_a = col("base")
     arb_a   = col("arbitrum")
-    total_a = [date_total.get(d) for d in all_dates_asc]
+    total_a = frame["total"]
     other_a = [
         max(0, (total_a[i] or 0) - sum(
             (v or 0) for v in [eth_a[i], sol_a[i], bsc_a[i], btc_a[i],
                                 tron_a[i], base_a[i], arb_a[i]]
         ))
-        for i in range(len(all_dates_asc))
+        for i in range(len(frame))
     ]
 
-    idxs3 = list(range(0, len(all_dates_asc), 3))
-    idxs5 = list(range(0, len(all_dates_asc), 5))
-    def sr3(lst): return [lst[i] for i in idxs3][::-1]
-    def sr5(lst): return [lst[i] for i in idxs5][::-1]
+    out = TimeSeriesFrame(frame.days)
+    for key, vals in [("tvl_eth", eth_a),   ("tvl_sol", sol_a),   ("tvl_bsc", bsc_a),
+                      ("tvl_btc", btc_a),   ("tvl_tron", tron_a), ("tvl_base", base_a),
+                      ("tvl_arb", arb_a),   ("tvl_other", other_a), ("tvl_total", total_a)]:
+        out[key] = vals
+    total_daily = TimeSeriesFrame(out.days)
+    total_daily["total_tvl_vals"] = out["tvl_total"]
+    view3 = downsample_frame(out, POINT_BUDGET["tvl"]).reversed()
+    view5 = downsample_frame(total_daily, POINT_BUDGET["total_tvl"]).reversed()
 
     return {
-        "tvl_dates":        sr3(all_dates_asc),
-        "tvl_eth":          sr3(eth_a),   "tvl_sol":  sr3(sol_a),
-        "tvl_bsc":          sr3(bsc_a),   "tvl_btc":  sr3(btc_a),
-        "tvl_tron":         sr3(tron_a),  "tvl_base": sr3(base_a),
-        "tvl_arb":          sr3(arb_a),   "tvl_other":sr3(other_a),
-        "tvl_total":        sr3(total_a),
-        "total_tvl_dates":  sr5(all_dates_asc),
-        "total_tvl_vals":   sr5(total_a),
+        "tvl_dates":        view3.dates(),
+        **{name: view3[name] for name in out.names},
+        "total_tvl_dates":  view5.dates(),
+        "total_tvl_vals":   view5["total_tvl_vals"],
+        # Full daily series for the zoom tiles
+        "_tvl_daily":       out,
+        "_total_tvl_daily": total_daily,
     }
 
 
+def summarize_protocols(body, top=50, categories=15):
+    """(top protocols by TVL, largest category totals) from a raw /protocols
+    body in one streaming pass: only the schemas.PROTOCOL fields of one
+    protocol are alive at a time, the top list is a heap of `top` entries, and category
+    totals accumulate as the array is read."""
+    cat_tvl, cat_rank = {}, {}
+
+    def rows():
+        for i, p in enumerate(schemas.PROTOCOL.each(iter_array(body))):
+            tvl = p["tvl"]
+            if not p["name"] or tvl is None:
+                continue
+            cat = p["category"] or "Unknown"
+            cat_tvl[cat] = cat_tvl.get(cat, 0) + (tvl or 0)
+            # Ties between category totals keep the order of each category's
+            # largest protocol, as when the full list was sorted first.
+            rank = (-(tvl or 0), i)
+            if cat not in cat_rank or rank < cat_rank[cat]:
+                cat_rank[cat] = rank
+            yield {
+                "name":      p["name"],
+                "category":  cat,
+                "chain":     p["chain"] or "Unknown",
+                "tvl":       tvl,
+                "change_1d": p["change_1d"],
+                "change_7d": p["change_7d"],
+            }
+
+    top_protocols = heapq.nlargest(top, rows(), key=lambda x: x["tvl"] or 0)
+    ranked        = sorted(cat_tvl, key=lambda c: (-cat_tvl[c], cat_rank[c]))[:categories]
+    return top_protocols, [(c, cat_tvl[c]) for c in ranked]
+
+
 def fetch_protocols():
     """Returns (top_protocols, cat_tvl_sorted)."""
     print("  Fetching protocols...")
-    raw = get_json("https://api.llama.fi/protocols") or []
-    protocols = []
-    for p in raw:
-        tvl = p.get("tvl")
-        if p.get("name") and tvl is not None:
-            protocols.append({
-                "name":      p.get("name"),
-                "category":  p.get("category") or "Unknown",
-                "chain":     p.get("chain")    or "Unknown",
-                "tvl":       tvl,
-                "change_1d": p.get("change_1d"),
-                "change_7d": p.get("change_7d"),
-            })
-    protocols.sort(key=lambda x: -(x["tvl"] or 0))
-    cat_tvl = {}
-    for p in protocols:
-        cat_tvl[p["category"]] = cat_tvl.get(p["category"], 0) + (p["tvl"] or 0)
-    return protocols[:50], sorted(cat_tvl.items(), key=lambda x: -x[1])[:15]
+    return get_json("https://api.llama.fi/protocols", parse=summarize_protocols) or ([], [])
+
+
+def _volume_days(coin_id):
+    """CoinGecko `days` to request: the full window, or only what the store lacks."""
+    store = history_store.get_store()
+    last  = store.last_day("coingecko", coin_id) if store else None
+    if last is None:
+        return VOLUME_DAYS
+    today = ts_to_day(time.time())
+    return max(1, min(VOLUME_DAYS, today - last + 1))
 
 
 def fetch_volume():
@@ -391,165 +836,415 @@ def fetch_volume():
     print("  Fetching stablecoin volumes from CoinGecko...")
 
     def _coin_vol(coin_id):
+        store = history_store.get_store()
         raw = get_json(
             f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart",
-            params={"vs_currency": "usd", "days": "365", "interval": "daily"},
-            timeout=25,
-        ) or {}
-        by_date = {}
-        for ts, vol in raw.get("total_volumes", []):
-            d = datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
-            by_date[d] = vol
-        return by_date
-
-    usdt_vol = _coin_vol("tether");  time.sleep(1.5)
-    usdc_vol = _coin_vol("usd-coin")
-
-    all_dates = sorted(set(usdt_vol) | set(usdc_vol), reverse=True)
-    tvd_dates, tvd_usdt, tvd_usdc, tvd_total = [], [], [], []
-    for d in all_dates:
-        u = usdt_vol.get(d, 0) or 0
-        c = usdc_vol.get(d, 0) or 0
-        tvd_dates.append(d); tvd_usdt.append(u)
-        tvd_usdc.append(c);  tvd_total.append(u + c)
-
-    total_asc = tvd_total[::-1]
-    tvd_total_7d = rolling7(total_asc)[::-1]
-
-    month_sums = defaultdict(lambda: {"usdt": 0.0, "usdc": 0.0})
-    for d, u, c in zip(tvd_dates, tvd_usdt, tvd_usdc):
-        m = d[:7] + "-01"
-        month_sums[m]["usdt"] += u
-        month_sums[m]["usdc"] += c
-
-    sorted_months = sorted(month_sums.keys(), reverse=True)
+            params={"vs_currency": "usd", "days": str(_volume_days(coin_id)), "interval": "daily"},
+            timeout=25, parse=schemas.MARKET_CHART,
+        )
+        vols = TimeSeriesFrame.from_points(raw["total_volumes"] if raw else [], "vol", unit=1000)
+        if not store:
+            return vols
+        store.upsert("coingecko", coin_id, vols, "vol")
+        newest = store.last_day("coingecko", coin_id)
+        if newest is None:
+            return vols
+        return store.load("coingecko", coin_id, since=newest - VOLUME_DAYS, name="vol")
+
+    # CoinGecko's host limit keeps these one at a time, 1.5 s apart.
+    usdt_vol, usdc_vol = pmap(_coin_vol, ["tether", "usd-coin"])
+
+    frame = align([usdt_vol.rename({"vol": "usdt"}), usdc_vol.rename({"vol": "usdc"})], "outer")
+    daily = TimeSeriesFrame(frame.days)
+    daily["usdt"]  = [v or 0 for v in frame["usdt"]]
+    daily["usdc"]  = [v or 0 for v in frame["usdc"]]
+    daily["total"] = [u + c for u, c in zip(daily["usdt"], daily["usdc"])]
+    daily["total_7d"] = rolling7(*daily.column("total"))
+
+    desc    = daily.reversed()
+    monthly = daily.monthly("sum").reversed()
+    usdt_m, usdc_m = monthly["usdt"], monthly["usdc"]
     return {
-        "tvd_dates":    tvd_dates,
-        "tvd_usdt":     tvd_usdt,
-        "tvd_usdc":     tvd_usdc,
-        "tvd_total":    tvd_total,
-        "tvd_total_7d": tvd_total_7d,
-        "tvm_months":   sorted_months,
-        "tvm_usdt":     [month_sums[m]["usdt"] for m in sorted_months],
-        "tvm_usdc":     [month_sums[m]["usdc"] for m in sorted_months],
-        "tvm_total":    [month_sums[m]["usdt"] + month_sums[m]["usdc"] for m in sorted_months],
+        "tvd_dates":    desc.dates(),
+        "tvd_usdt":     desc["usdt"],
+        "tvd_usdc":     desc["usdc"],
+        "tvd_total":    desc["total"],
+        "tvd_total_7d": desc["total_7d"],
+        "tvm_months":   monthly.dates(),
+        "tvm_usdt":     usdt_m,
+        "tvm_usdc":     usdc_m,
+        "tvm_total":    [u + c for u, c in zip(usdt_m, usdc_m)],
+        "_tvd_days":    desc.days,
     }
 
 
-def build_correlations(sc_usdt_by_date, sc_usdc_by_date, eth_prices, btc_prices):
-    """90-day rolling Pearson correlations of % changes (newest-first output)."""
+def build_correlations(sc_usdt_daily, sc_usdc_daily, eth_prices, btc_prices):
+    """90-day rolling Pearson correlations of % changes (newest-first output).
+    Inputs are daily frames: stablecoin 'mcap' and Binance 'close'."""
     print("  Computing correlations...")
-    all_dates_asc = sorted(
-        set(sc_usdt_by_date) & set(sc_usdc_by_date) & set(eth_prices) & set(btc_prices)
-    )
-    usdt_a = [sc_usdt_by_date.get(d) for d in all_dates_asc]
-    usdc_a = [sc_usdc_by_date.get(d) for d in all_dates_asc]
-    eth_a  = [eth_prices.get(d)      for d in all_dates_asc]
-    btc_a  = [btc_prices.get(d)      for d in all_dates_asc]
-
-    corr_te = rolling_corr(usdt_a, eth_a)
-    corr_tb = rolling_corr(usdt_a, btc_a)
-    corr_ce = rolling_corr(usdc_a, eth_a)
-    corr_cb = rolling_corr(usdc_a, btc_a)
-
+    frame = align([
+        sc_usdt_daily.rename({"mcap": "usdt"}), sc_usdc_daily.rename({"mcap": "usdc"}),
+        eth_prices.rename({"close": "eth"}),    btc_prices.rename({"close": "btc"}),
+    ], "inner")
+    usdt_a, usdc_a = frame["usdt"], frame["usdc"]
+    eth_a,  btc_a  = frame["eth"],  frame["btc"]
+
+    # % changes are computed once per series and shared by the four pairs.
+    usdt_p, usdc_p = pct_change(usdt_a), pct_change(usdc_a)
+    eth_p,  btc_p  = pct_change(eth_a),  pct_change(btc_a)
+    corr_te = rolling_corr_pct(usdt_p, eth_p, (CORR_WINDOW,))[CORR_WINDOW]
+    corr_tb = rolling_corr_pct(usdt_p, btc_p, (CORR_WINDOW,))[CORR_WINDOW]
+    corr_ce = rolling_corr_pct(usdc_p, eth_p, (CORR_WINDOW,))[CORR_WINDOW]
+    corr_cb = rolling_corr_pct(usdc_p, btc_p, (CORR_WINDOW,))[CORR_WINDOW]
+
+    out = TimeSeriesFrame(frame.days)
+    out["corr_tether_eth"]  = corr_te
+    out["corr_tether_btc"]  = corr_tb
+    out["corr_usdc_eth"]    = corr_ce
+    out["corr_usdc_btc"]    = corr_cb
+    out["eth_price"]        = eth_a
+    out["btc_price"]        = btc_a
+    out["corr_tether_mcap"] = usdt_a
+    out["corr_usdc_mcap"]   = usdc_a
+    view = downsample_frame(out, POINT_BUDGET["correlations"]).reversed()
     return {
-        "corr_dates":       all_dates_asc[::-1],
-        "corr_tether_eth":  corr_te[::-1],
-        "corr_tether_btc":  corr_tb[::-1],
-        "corr_usdc_eth":    corr_ce[::-1],
-        "corr_usdc_btc":    corr_cb[::-1],
-        "eth_price":        eth_a[::-1],
-        "btc_price":        btc_a[::-1],
-        "corr_tether_mcap": usdt_a[::-1],
-        "corr_usdc_mcap":   usdc_a[::-1],
+        "corr_dates":  view.dates(),
+        **{name: view[name] for name in out.names},
+        "_corr_daily": out,   # full daily series for the zoom tiles
     }
 
 
-def build_fee_efficiency(fee_dates_desc, fee_raw_by_chain, tvl_by_chain_date):
-    """Monthly fee/TVL efficiency ratios for key chains."""
+def build_fee_efficiency(fee_frame, tvl_by_chain):
+    """Monthly fee/TVL efficiency ratios for key chains.
+    `fee_frame` holds the sampled 7D-average fee columns (fee_eth, ...);
+    `tvl_by_chain` maps chain slug → daily 'tvl' frame."""
     CHAINS_FE = ["Ethereum", "Solana", "BSC", "Bitcoin", "Tron", "Base"]
     CHAIN_MAP  = {
-        "Ethereum": "ethereum", "Solana": "solana", "BSC": "bsc",
-        "Bitcoin":  "bitcoin",  "Tron":   "tron",   "Base": "base",
+        "Ethereum": ("ethereum", "fee_eth"), "Solana": ("solana", "fee_sol"),
+        "BSC":      ("bsc",      "fee_bsc"), "Bitcoin": ("bitcoin", "fee_btc"),
+        "Tron":     ("tron",     "fee_tron"), "Base":  ("base",    "fee_base"),
     }
 
-    monthly_fees = defaultdict(lambda: defaultdict(float))
-    monthly_tvl  = defaultdict(lambda: defaultdict(float))
+    monthly_fees = fee_frame.monthly("sum", skip_zero=True)
+    monthly_tvl  = align([
+        tvl_by_chain[CHAIN_MAP[c][0]].monthly("last").rename({"tvl": c})
+        for c in CHAINS_FE if CHAIN_MAP[c][0] in tvl_by_chain
+    ], "outer")
+
+    def by_month(frame, names):
+        out = {}
+        for name in names:
+            if name not in frame:
+                continue
+            vals, mask = frame.column(name)
+            for d, v, ok in zip(frame.days, vals, mask):
+                if ok:
+                    out.setdefault(d, {})[name] = v
+        return out
+
+    fees_m = by_month(monthly_fees, [CHAIN_MAP[c][1] for c in CHAINS_FE])
+    tvl_m  = by_month(monthly_tvl, CHAINS_FE)
 
-    for i, d in enumerate(fee_dates_desc):
-        month = d[:7] + "-01"
-        for chain_name in CHAINS_FE:
-            slug  = CHAIN_MAP[chain_name]
-            fees  = fee_raw_by_chain.get(slug, [])
-            f_val = fees[i] if i < len(fees) else None
-            if f_val:
-                monthly_fees[month][chain_name] += f_val
-
-    for chain_name in CHAINS_FE:
-        slug = CHAIN_MAP[chain_name]
-        for date, tvl in tvl_by_chain_date.get(slug, {}).items():
-            month = date[:7] + "-01"
-            monthly_tvl[month][chain_name] = tvl
-
-    all_months  = sorted(set(monthly_fees) | set(monthly_tvl), reverse=True)
+    all_months  = sorted(set(fees_m) | set(tvl_m), reverse=True)
     fe_months   = []
     fe_eff      = {c: [] for c in CHAINS_FE}
     fe_eff_total= []
 
     for month in all_months:
-        total_fees = sum(monthly_fees[month].values())
-        total_tvl  = sum(monthly_tvl[month].values())
-        fe_months.append(month)
+        fees_row   = fees_m.get(month, {})
+        tvl_row    = tvl_m.get(month, {})
+        total_fees = sum(fees_row.values())
+        total_tvl  = sum(tvl_row.values())
+        fe_months.append(day_to_str(month))
         fe_eff_total.append((total_fees / total_tvl) if total_tvl else None)
         for chain_name in CHAINS_FE:
-            f = monthly_fees[month].get(chain_name, 0)
-            t = monthly_tvl[month].get(chain_name)
+            f = fees_row.get(CHAIN_MAP[chain_name][1], 0)
+            t = tvl_row.get(chain_name)
             fe_eff[chain_name].append((f / t) if t else None)
 
     return fe_months, fe_eff, fe_eff_total
 
 
-# ── Main ──────────────────────────────────────────────────────────────────────
-def fetch_all():
-    print("Fetching all dashboard data...")
+# ── Pipeline graph ────────────────────────────────────────────────────────────
+# fetch_all() is a dependency graph of named data nodes.  Every node names the
+# nodes whose results it consumes, so a download needed by two consumers
+# (e.g. historicalChainTvl for the TVL chart and for fee efficiency) is one
+# node and happens once.  run_pipeline() starts each node as soon as its
+# inputs are ready; plan_pipeline() lists the requests a run will make.
+NODES = {}
+
+FE_SLUGS   = ["ethereum", "solana", "bsc", "bitcoin", "tron", "base"]
+CHAINS_URL = "https://api.llama.fi/v2/chains"
+
+
+def node(name, deps=(), plan=None, optional=False):
+    """Registers fn as pipeline node `name`; fn gets its deps' results in order.
+    `plan` returns the requests the node will send, as (url, params, note).
+    If an `optional` node raises, the error is logged and its result is None
+    instead of the run being aborted."""
+    def register(fn):
+        NODES[name] = {"fn": fn, "deps": tuple(deps), "plan": plan or (lambda: []), "optional": optional}
+        return fn
+    return register
+
+
+# The ad-hoc analyses in Py scripts/ register with script(): their fetch step
+# is a node ("script.<name>") that may depend on the nodes above, so any set
+# of them runs as one pipeline (run_scripts.py) and shares its requests.
+SCRIPTS = {}
+
+
+def script(name, deps=(), plan=None, output=None):
+    """Registers fn as the fetch step of script `name` (node 'script.<name>').
+    `output(result, out_dir)` writes its charts and tables; run_scripts.py
+    calls it on the main thread once the pipeline is done (pyplot is not
+    thread-safe).  A fetch step that raises doesn't stop the other scripts:
+    its result is None."""
+    def register(fn):
+        node(f"script.{name}", deps, plan, optional=True)(fn)
+        SCRIPTS[name] = {"node": f"script.{name}", "output": output, "doc": (fn.__doc__ or "").strip()}
+        return fn
+    return register
+
+
+def _closure(target):
+    order, seen = [], set()
+
+    def visit(name):
+        if name in seen:
+            return
+        seen.add(name)
+        for dep in NODES[name]["deps"]:
+            visit(dep)
+        order.append(name)
+
+    visit(target)
+    return order
+
+
+def _run_node(name, fn, *args):
+    with instrument.phase(f"fetch.{name}"):
+        return fn(*args)
+
+
+def run_pipeline(target="dashboard"):
+    """Runs `target` and everything it depends on; returns its result."""
+    remaining = _closure(target)
+    results, running = {}, {}
+    with ThreadPoolExecutor(max_workers=max(FETCH_WORKERS, 1)) as ex:
+        while remaining or running:
+            for name in [n for n in remaining if all(d in results for d in NODES[n]["deps"])]:
+                spec = NODES[name]
+                running[ex.submit(_run_node, name, spec["fn"], *[results[d] for d in spec["deps"]])] = name
+                remaining.remove(name)
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                try:
+                    results[name] = fut.result()
+                except Exception:
+                    if not NODES[name]["optional"]:
+                        raise
+                    print(f"  ERROR: {name} failed:")
+                    traceback.print_exc()
+                    results[name] = None
+    return results[target]
+
+
+# Rough per-request seconds used to estimate the critical path of a plan.
+# "per-item" is a URL template ({chain}, {slug}...) standing for requests
+# whose list isn't known until a dependency has been fetched; it is costed
+# as one miss.
+PLAN_COST = {"fresh": 0.0, "stale": 0.5, "miss": 1.5, "offline": 0.0, "4xx": 0.0, "per-item": 1.5}
+
+
+def _request_state(url, params=None):
+    if "{" in url:
+        return "per-item"
+    cache = http_cache.get_cache()
+    entry = cache.lookup(url, params) if cache else None
+    if entry and entry["fresh"]:
+        return "fresh"
+    if cache and cache.lookup_negative(url, params):
+        return "4xx"
+    if http_cache.OFFLINE:
+        return "offline"
+    return "stale" if entry else "miss"
+
+
+def _node_cost(requests_):
+    """Seconds for a node's requests given each host's concurrency and rate."""
+    by_host = defaultdict(list)
+    for url, params, _ in requests_:
+        by_host[urlsplit(url).hostname or ""].append(PLAN_COST[_request_state(url, params)])
+    cost = 0.0
+    for host, costs in by_host.items():
+        inflight = HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT)[0]
+        spacing  = 1 / throttles.get(host).rate
+        sent     = [c for c in costs if c]
+        cost     = max(cost, sum(sent) / inflight + spacing * max(len(sent) - 1, 0))
+    return cost
+
+
+def plan_pipeline(target="dashboard"):
+    """Prints every request a run of `target` will make, its cache state and
+    the critical path through the graph, without sending anything."""
+    order = _closure(target)
+    plans = {name: NODES[name]["plan"]() for name in order}
+
+    print(f"Fetch plan for '{target}':")
+    seen, counts = {}, defaultdict(int)
+    for name in order:
+        for url, params, note in plans[name]:
+            key, full_url = http_cache.cache_key(url, params)
+            state = _request_state(url, params)
+            counts[state] += 1
+            dup = f"  DUPLICATE of [{seen[key]}]" if key in seen and state != "per-item" else ""
+            seen.setdefault(key, name)
+            print(f"  [{name:<22}] {state:<8} {full_url}{'  (' + note + ')' if note else ''}{dup}")
+    total = sum(counts.values())
+    print(f"{total} requests: " + ", ".join(f"{n} {s}" for s, n in sorted(counts.items())))
+
+    finish, via = {}, {}
+    for name in order:
+        deps  = NODES[name]["deps"]
+        start = max((finish[d] for d in deps), default=0.0)
+        via[name]    = max(deps, key=lambda d: finish[d]) if deps else None
+        finish[name] = start + _node_cost(plans[name])
+    path, name = [], target
+    while name:
+        path.append(name)
+        name = via[name]
+    print(f"Critical path (~{finish[target]:.1f}s): " + " -> ".join(reversed(path)))
+
+
+def cached_json(url, params=None, parse=loads):
+    """A response from the cache, fresh or not, without a request; None when
+    there is no usable copy.  Plans use it to list concrete URLs."""
+    cache = http_cache.get_cache()
+    entry = cache.lookup(url, params) if cache else None
+    try:
+        return parse(entry["body"]) if entry else None
+    except SchemaError:
+        return None
+
+
+def _plan_prices():
+    store = history_store.get_store()
+    reqs  = []
+    for ticker in sorted(set(BINANCE_MAP.values())):
+        last = store.last_day("binance", ticker) if store else None
+        if last is not None:
+            reqs.append((BINANCE_KLINES_URL, {
+                "symbol": f"{ticker}USDT", "interval": "1d", "limit": 1000,
+                "startTime": last * 86_400_000,
+            }, f"new days since {day_to_str(last)}"))
+        else:
+            reqs.append((BINANCE_KLINES_URL, {"symbol": f"{ticker}USDT", "interval": "1d", "limit": 1000},
+                         "backfill, +2 pages"))
+    return reqs
+
+
+def _plan_chain_tvl():
+    chains_raw = cached_json(CHAINS_URL, parse=schemas.CHAINS)
+    if chains_raw is None:
+        return [(chain_tvl_url(s), None, "") for s in FE_SLUGS if chain_tvl_url(s)] + [
+            ("https://api.llama.fi/v2/historicalChainTvl/{chain}", None, "top chains, once /v2/chains is known")
+        ]
+    index = chain_index(chains_raw)
+    urls  = [chain_tvl_url(s, index) for s in _chain_tvl_slugs(chains_raw)]
+    return [(url, None, "") for url in urls if url]
+
+
+def _chain_tvl_slugs(chains_raw):
+    slugs = top_chain_slugs(chains_raw)
+    return slugs + [s for s in FE_SLUGS if s not in slugs]
+
+
+@node("chains", plan=lambda: [(CHAINS_URL, None, "")])
+def _chains():
+    chains_raw = get_json(CHAINS_URL, parse=schemas.CHAINS) or []
+    update_chain_index(chains_raw)
+    return chains_raw
+
+
+node("stablecoin_overview", plan=lambda: [("https://stablecoins.llama.fi/stablecoins", None, "")])(
+    fetch_stablecoin_overview
+)
+node("stablecoin_market_caps", plan=lambda: [
+    ("https://stablecoins.llama.fi/stablecoincharts/all", None, ""),
+    ("https://stablecoins.llama.fi/stablecoin/1", None, ""),
+    ("https://stablecoins.llama.fi/stablecoin/2", None, ""),
+])(fetch_stablecoin_market_caps)
+node("active_addresses", plan=lambda: [
+    (f"https://api.dune.com/api/v1/query/{DUNE_QUERY_ID}/results", {"limit": 10000}, "")
+] if DUNE_API_KEY else [])(fetch_eth_active_addresses)
+node("prices", plan=_plan_prices)(fetch_prices)
+node("fees", deps=["prices"], plan=lambda: [
+    ("https://api.llama.fi/overview/fees?excludeTotalDataChart=false", None, "")
+] + [
+    (f"https://api.llama.fi/overview/fees/{c}?excludeTotalDataChart=false", None, "") for c in CHAINS
+])(fetch_fees_and_prices)
+node("chain_tvl", deps=["chains"], plan=_plan_chain_tvl)(
+    lambda chains_raw: fetch_chain_tvl_histories(_chain_tvl_slugs(chains_raw))
+)
+node("tvl", deps=["chains", "chain_tvl"], plan=lambda: [
+    ("https://api.llama.fi/v2/historicalChainTvl", None, "")
+])(fetch_tvl_data)
+node("protocols", plan=lambda: [("https://api.llama.fi/protocols", None, "")])(fetch_protocols)
+node("volume", plan=lambda: [
+    (f"https://api.coingecko.com/api/v3/coins/{c}/market_chart",
+     {"vs_currency": "usd", "days": str(_volume_days(c)), "interval": "daily"}, "")
+    for c in ("tether", "usd-coin")
+])(fetch_volume)
+
+
+@node("correlations", deps=["stablecoin_market_caps", "prices"])
+def _correlations(market_caps, prices):
+    # Reuse the daily dicts already fetched by fetch_stablecoin_market_caps —
+    # no second API call needed, avoids rate-limit failures.
+    empty = TimeSeriesFrame.from_points([], "close")
+    return build_correlations(market_caps[5], market_caps[6], prices.get("ETH", empty), prices.get("BTC", empty))
+
 
-    stablecoin_overview, peg_mech = fetch_stablecoin_overview()
-    sc_dates, sc_usdt, sc_usdc, sc_others, sc_total, sc_usdt_daily, sc_usdc_daily = fetch_stablecoin_market_caps()
-    aa_dates, aa_usdt, aa_usdc = fetch_eth_active_addresses()
+@node("fee_efficiency", deps=["fees", "chain_tvl"])
+def _fee_efficiency(fees, chain_hist):
+    tvl_by_chain = {slug: chain_hist[slug] for slug in FE_SLUGS if slug in chain_hist}
+    return build_fee_efficiency(fees["_fee_frame"], tvl_by_chain)
 
-    fees            = fetch_fees_and_prices()
+
+@node("dashboard", deps=[
+    "stablecoin_overview", "stablecoin_market_caps", "active_addresses", "fees",
+    "tvl", "protocols", "volume", "correlations", "fee_efficiency",
+])
+def _dashboard(overview, market_caps, active, fees, tvl, protocols, vol, corr, fee_eff):
+    stablecoin_overview, peg_mech = overview
+    sc_dates, sc_usdt, sc_usdc, sc_others, sc_total, _, _, sc_daily = market_caps
+    aa_dates, aa_usdt, aa_usdc = active
+    top_protocols, cat_tvl_sorted = protocols
+    fe_months, fe_eff, fe_eff_total = fee_eff
+
+    fees = dict(fees)
     btc_price_daily = fees.pop("_btc_price_daily")
     eth_price_daily = fees.pop("_eth_price_daily")
     sol_price_daily = fees.pop("_sol_price_daily")
-
-    tvl              = fetch_tvl_data()
-    top_protocols, cat_tvl_sorted = fetch_protocols()
-    vol              = fetch_volume()
-
-    # Reuse the daily dicts already fetched by fetch_stablecoin_market_caps —
-    # no second API call needed, avoids rate-limit failures.
-    corr = build_correlations(sc_usdt_daily, sc_usdc_daily, eth_price_daily, btc_price_daily)
-
-    tvd_btc_price = [btc_price_daily.get(d) for d in vol["tvd_dates"]]
-    tvd_eth_price = [eth_price_daily.get(d) for d in vol["tvd_dates"]]
-    tvd_sol_price = [sol_price_daily.get(d) for d in vol["tvd_dates"]]
-
-    # Daily TVL per chain for fee efficiency
-    print("  Fetching per-chain TVL for fee efficiency...")
-    tvl_by_chain_date = {}
-    for slug in ["ethereum", "solana", "bsc", "bitcoin", "tron", "base"]:
-        raw = get_json(f"https://api.llama.fi/v2/historicalChainTvl/{slug}") or []
-        tvl_by_chain_date[slug] = {ts_to_date(r["date"]): r.get("tvl", 0) for r in raw}
-        time.sleep(0.2)
-
-    fee_raw_by_chain = {
-        "ethereum": fees["fee_eth"],  "solana": fees["fee_sol"],
-        "bsc":      fees["fee_bsc"],  "bitcoin":fees["fee_btc"],
-        "tron":     fees["fee_tron"], "base":   fees["fee_base"],
+    fees.pop("_fee_frame")
+    tvl  = dict(tvl)
+    corr = dict(corr)
+
+    # Full-resolution frames behind each downsampled date axis; the generator
+    # cuts them into zoom tiles (tiles.py) and drops them from the payload.
+    daily = {
+        "sc_dates":        sc_daily,
+        "tvl_dates":       tvl.pop("_tvl_daily"),
+        "total_tvl_dates": tvl.pop("_total_tvl_daily"),
+        "fee_dates":       fees.pop("_fee_daily"),
+        "corr_dates":      corr.pop("_corr_daily"),
     }
-    fe_months, fe_eff, fe_eff_total = build_fee_efficiency(
-        fees["fee_dates"], fee_raw_by_chain, tvl_by_chain_date
-    )
+
+    tvd_btc_price = btc_price_daily.reindex(vol["_tvd_days"])["close"]
+    tvd_eth_price = eth_price_daily.reindex(vol["_tvd_days"])["close"]
+    tvd_sol_price = sol_price_daily.reindex(vol["_tvd_days"])["close"]
 
     latest_total_sc   = sc_total[0]           if sc_total           else 0
     latest_total_tvl  = tvl["tvl_total"][0]   if tvl["tvl_total"]   else 0
@@ -561,7 +1256,6 @@ def fetch_all():
     ]
     last_update = max(all_dates_for_update) if all_dates_for_update else "N/A"
 
-    print("Done.")
     return {
         "stablecoin_overview": stablecoin_overview,
         "sc_dates": sc_dates, "sc_usdt": sc_usdt, "sc_usdc": sc_usdc,
@@ -594,12 +1288,36 @@ def fetch_all():
             "protocol_count": len(top_protocols),
         },
         "_last_update": last_update,
+        "_daily":       daily,
+        # Sources served from the cache because their API failed this run
+        "_stale":       stale_sources(),
+        # Sources left empty because their response no longer matches its schema
+        "_broken":      broken_sources(),
     }
 
 
+# ── Main ──────────────────────────────────────────────────────────────────────
+def fetch_all():
+    print("Fetching all dashboard data...")
+    breakers.reset()
+    with _stale_lock:
+        _stale.clear()
+        _broken.clear()
+    with instrument.phase("fetch"):
+        data = run_pipeline("dashboard")
+    save_throttle_state()
+    print("Done.")
+    return data
+
+
 if __name__ == "__main__":
+    if "--plan" in sys.argv:
+        plan_pipeline()
+        sys.exit(0)
     d = fetch_all()
     print(f"sc_dates:    {d['sc_dates'][:3]}")
     print(f"fee_dates:   {d['fee_dates'][:3]}")
     print(f"peg_mech:    {d['peg_mech']}")
     print(f"last_update: {d['_last_update']}")
+    instrument.print_summary()
+    instrument.write_report({"argv": sys.argv[1:]})
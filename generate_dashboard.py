@@ -1,20 +1,97 @@
+import html as html_lib
 import json
 import os
 import sys
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_PATH = os.path.join(SCRIPT_DIR, 'blockchain_dashboard.html')
+DATA_DIRNAME = 'blockchain_dashboard_data'
 
 # Fetch all data from public APIs (replaces Excel / Power Query)
 sys.path.insert(0, SCRIPT_DIR)
-from fetch_data import fetch_all
+import http_cache
+import instrument
+from fetch_data import fetch_all, plan_pipeline
+from jsonstream import dumps
+from payload import encode_payload, split_payload, write_section_files, DECODER_JS
+from tiles import build_tiles, tile_name
 
-data        = fetch_all()
-last_update = data.pop('_last_update', 'N/A')
 
-data_json = json.dumps(data, default=str)
+def render(data, split=False, out_dir=SCRIPT_DIR):
+    """Builds the page from fetch_all() output; returns (html, data_files).
+    Zoom tiles that aren't inlined (all but each axis's current-year weekly
+    tile; all of them with split=True) and, with split=True, the section
+    files are written under out_dir/DATA_DIRNAME; data_files maps section →
+    URL.  The page fetches those tiles when zoomed, so DATA_DIRNAME has to be
+    published next to it in both modes."""
+    data        = dict(data)
+    last_update = data.pop('_last_update', 'N/A')
 
-html = f"""<!DOCTYPE html>
+    # Sources whose API failed this run and were filled from the cache
+    stale = data.pop('_stale', [])
+    stale_banner = ''
+    if stale:
+        hosts  = sorted({s['host'] for s in stale})
+        detail = '\n'.join(f"{s['host']}{s['endpoint']} ({s['age_hours']}h old)" for s in stale)
+        stale_banner = (
+            f'<div class="stale-banner" title="{html_lib.escape(detail)}">'
+            f'Some data could not be refreshed ({html_lib.escape(", ".join(hosts))}) - '
+            f'showing the last saved copy, up to {max(s["age_hours"] for s in stale):.0f}h old.</div>'
+        )
+
+    # Sources whose response no longer matches its schema (no cached copy):
+    # their sections are empty this run
+    broken = data.pop('_broken', [])
+    if broken:
+        detail = '\n'.join(f"{b['host']}{b['endpoint']}: {b['error']}" for b in broken)
+        stale_banner += (
+            f'<div class="stale-banner" title="{html_lib.escape(detail)}">'
+            f'Some data is unavailable - the API response changed format: '
+            f'{html_lib.escape(", ".join(sorted({b["host"] + b["endpoint"] for b in broken})))}.</div>'
+        )
+
+    # Full daily series → per-year zoom tiles (see tiles.py)
+    with instrument.phase('render.tiles'):
+        tile_index, tiles = build_tiles(data.pop('_daily', {}))
+
+    # Date axes → start/step, numeric series → base64 typed arrays (see payload.py)
+    with instrument.phase('render.encode'):
+        payload = encode_payload(data)
+
+    # split (--split): write each section's data to its own file next to the
+    # HTML, fetched when the section is first opened. The page must then be
+    # served over HTTP (browsers block fetch() from file://).
+    with instrument.phase('render.sections'):
+        tile_url = DATA_DIRNAME + '/tiles'
+        if split:
+            payload, parts = split_payload(payload)
+            data_files = write_section_files(parts, os.path.join(out_dir, DATA_DIRNAME), DATA_DIRNAME)
+            inline     = {}
+        else:
+            data_files = None
+            # Only the current year's weekly tile of each axis is inlined (in
+            # an inert JSON block, parsed when a zoom needs it); the rest are
+            # fetched on demand, and from file:// other zooms keep the overview.
+            inline = {
+                name: tiles[name] for name in (
+                    tile_name(axis, 'weekly', entry['levels']['weekly'][-1])
+                    for axis, entry in tile_index.items()
+                )
+            }
+        write_section_files({name: tile for name, tile in tiles.items() if name not in inline},
+                            os.path.join(out_dir, DATA_DIRNAME, 'tiles'), tile_url)
+        tile_blocks = '\n'.join(
+            f'<script type="application/json" id="tile-{name}">{dumps(tile)}</script>'
+            for name, tile in inline.items()
+        )
+
+    with instrument.phase('render.json'):
+        data_json  = dumps(payload)
+        files_json = json.dumps(data_files)
+        tiles_json = dumps({'index': tile_index, 'url': tile_url})
+
+    with instrument.phase('render.html'):
+        html = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="UTF-8">
@@ -45,6 +122,7 @@ html = f"""<!DOCTYPE html>
   }}
   .header .subtitle {{ color: rgba(255,255,255,0.75); font-size: 14px; }}
   .header .date {{ color: #ffffff; font-size: 14px; font-weight: 500; }}
+  .stale-banner {{ background: #fff4e0; color: #8a5a00; border-bottom: 1px solid #f0d9a8; padding: 10px 40px; font-size: 13px; }}
   .kpi-row {{
     display: grid;
     grid-template-columns: repeat(4, 1fr);
@@ -175,6 +253,7 @@ html = f"""<!DOCTYPE html>
   </div>
   <div class="date">Last updated: {last_update}</div>
 </div>
+{stale_banner}
 
 <div class="kpi-row" id="kpis"></div>
 
@@ -369,8 +448,12 @@ html = f"""<!DOCTYPE html>
   </div>
 </div>
 
+{tile_blocks}
 <script>
-const D = {data_json};
+{DECODER_JS}
+const D = decodePayload({data_json});
+const DATA_FILES = {files_json};
+const TILES = {tiles_json};
 const plotBg = '#ffffff';
 const paperBg = '#ffffff';
 const gridColor = '#e8e8e8';
@@ -403,9 +486,10 @@ function pctFmt(n) {{
 
 // Helper: find oldest date where all series have non-null non-zero values
 // Data is sorted descending (newest first), so scan from end (oldest) forward
+// (typed-array series mark missing values with NaN, hence the v === v test)
 function firstValidDate(dates, ...arrays) {{
   for (let i = dates.length - 1; i >= 0; i--) {{
-    if (arrays.every(arr => arr[i] != null && arr[i] !== 0)) return dates[i];
+    if (arrays.every(arr => arr[i] != null && arr[i] === arr[i] && arr[i] !== 0)) return dates[i];
   }}
   return dates[dates.length - 1];
 }}
@@ -414,8 +498,10 @@ function firstValidDate(dates, ...arrays) {{
 // 1. patchLayout: set autorange:false + explicit range before Plotly renders
 // 2. relayout override: inject saved y ranges into x-only calls (rangeslider/zoom)
 // 3. lockEl listener: restore saved ranges on plotly_relayout as final fallback
+// The listener also remembers the user's x zoom per chart, so a redraw (mode
+// toggle) keeps it instead of jumping back to the default range.
 (function() {{
-  var _saved = {{}};
+  var _saved = {{}}, _xr = {{}};
 
   function calcRanges(traces) {{
     var y1lo=Infinity,y1hi=-Infinity,y2lo=Infinity,y2hi=-Infinity,stacks={{}};
@@ -425,10 +511,10 @@ function firstValidDate(dates, ...arrays) {{
       if(tr.stackgroup){{
         var k=(a2?'2':'1')+tr.stackgroup;
         if(!stacks[k]) stacks[k]={{a2:a2,v:{{}}}};
-        tr.y.forEach(function(v,i){{if(v!=null) stacks[k].v[i]=(stacks[k].v[i]||0)+(+v);}});
+        tr.y.forEach(function(v,i){{if(v!=null&&v===v) stacks[k].v[i]=(stacks[k].v[i]||0)+(+v);}});
       }}else{{
         tr.y.forEach(function(v){{
-          if(v==null) return; v=+v;
+          if(v==null||v!==v) return; v=+v;
           if(a2){{if(v<y2lo)y2lo=v;if(v>y2hi)y2hi=v;}}
           else{{if(v<y1lo)y1lo=v;if(v>y1hi)y1hi=v;}}
         }});
@@ -463,7 +549,9 @@ function firstValidDate(dates, ...arrays) {{
     var busy=false;
     gd.on('plotly_relayout',function(ed){{
       if(busy) return;
+      if(ed['xaxis.autorange']) delete _xr[gd.id];
       if(ed['xaxis.range[0]']===undefined&&ed['xaxis.range']===undefined) return;
+      _xr[gd.id]=ed['xaxis.range']||[ed['xaxis.range[0]'],ed['xaxis.range[1]']];
       var r=_saved[gd.id]; if(!r) return;
       var upd={{}};
       if(r.y1){{upd['yaxis.range']=r.y1;upd['yaxis.autorange']=false;}}
@@ -492,7 +580,8 @@ function firstValidDate(dates, ...arrays) {{
   var _np=Plotly.newPlot.bind(Plotly),_re=Plotly.react.bind(Plotly);
   function _wrap(orig){{
     return function(id,data,layout,cfg){{
-      var r=calcRanges(data);
+      var r=calcRanges(data),key=typeof id==='string'?id:(id&&id.id);
+      if(_xr[key]&&layout&&layout.xaxis) layout=Object.assign({{}},layout,{{xaxis:Object.assign({{}},layout.xaxis,{{range:_xr[key]}})}});
       var res=orig(id,data,patchLayout(layout||{{}},r),cfg);
       Promise.resolve(res).then(function(gd){{if(gd) lockEl(gd,r);}});
       return res;
@@ -503,12 +592,10 @@ function firstValidDate(dates, ...arrays) {{
 }})();
 
 
-// Pre-compute x-axis start dates (first date where all series are non-zero)
-let scStart = firstValidDate(D.sc_dates, D.sc_usdt, D.sc_usdc, D.sc_others);
-let tvlTotalStart = firstValidDate(D.total_tvl_dates, D.total_tvl_vals);
-let tvlChainStart = firstValidDate(D.tvl_dates, D.tvl_eth, D.tvl_sol, D.tvl_tron);
-let feeTotalStart = firstValidDate(D.fee_dates, D.fee_total);
-let feeChainStart = firstValidDate(D.fee_dates, D.fee_eth, D.fee_sol, D.fee_tron);
+// X-axis start dates (first date where all series are non-zero), set by each
+// section's init once its data is available
+let scStart, tvlTotalStart, tvlChainStart, feeTotalStart, feeChainStart;
+let ethActStart, solActStart, btcActStart, txVolStart, txVolDataStart;
 
 // KPIs
 document.getElementById('kpis').innerHTML = `
@@ -526,20 +613,177 @@ function showSection(id, btn) {{
   sec.classList.remove('hidden');
   sec.classList.add('active');
   if (btn) btn.classList.add('active');
-  setTimeout(() => {{
+  // Charts drawn earlier may have missed a window resize while hidden
+  initSection(id).then(() => setTimeout(() => {{
     sec.querySelectorAll('.js-plotly-plot').forEach(el => Plotly.Plots.resize(el));
-  }}, 50);
+  }}, 50));
+}}
+
+// Charts are drawn on demand: the first time their card becomes visible
+// (IntersectionObserver), not at load. CHARTS maps each chart div to its
+// draw function; chartMode remembers the toggle chosen for each chart.
+const chartMode = {{}}, _drawn = {{}};
+
+function selectMode(id, mode, btn) {{
+  chartMode[id] = mode;
+  _drawn[id] = true;
+  if (!btn) return;
+  btn.closest('.chart-card').querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
+  btn.classList.add('active');
+}}
+
+function drawChart(id) {{
+  if (_drawn[id]) return;
+  _drawn[id] = true;
+  CHARTS[id]();
+}}
+
+const _chartObserver = 'IntersectionObserver' in window
+  ? new IntersectionObserver(entries => entries.forEach(e => {{
+      if (!e.isIntersecting) return;
+      _chartObserver.unobserve(e.target);
+      drawChart(e.target.id);
+    }}), {{ rootMargin: '200px 0px' }})
+  : null;
+
+function observeCharts(sec) {{
+  sec.querySelectorAll('[id^="chart-"]').forEach(el => {{
+    if (!CHARTS[el.id] || _drawn[el.id]) return;
+    if (_chartObserver) _chartObserver.observe(el);
+    else drawChart(el.id);
+  }});
+}}
+
+// Section data: with --split each group of series lives in its own file
+// (DATA_FILES) and is fetched the first time a section that needs it opens
+const SECTION_DATA = {{
+  stablecoins: ['stablecoins', 'volume'],
+  defi:        ['tvl'],
+  fees:        ['fees', 'volume'],
+  protocols:   ['protocols'],
+  insights:    D.has_fe ? ['correlations'] : ['correlations', 'tvl', 'fees'],
+}};
+const _dataLoads = {{}}, _sectionInits = {{}};
+
+function loadData(name) {{
+  if (!DATA_FILES) return Promise.resolve();
+  if (!_dataLoads[name]) {{
+    _dataLoads[name] = fetch(DATA_FILES[name])
+      .then(r => {{ if (!r.ok) throw new Error(DATA_FILES[name] + ': HTTP ' + r.status); return r.json(); }})
+      .then(part => {{ Object.assign(D, decodePayload(part)); registerSeries(); }});
+  }}
+  return _dataLoads[name];
+}}
+
+function initSection(id) {{
+  if (!_sectionInits[id]) {{
+    _sectionInits[id] = Promise.all(SECTION_DATA[id].map(loadData))
+      .then(() => {{ SECTION_INIT[id](); observeCharts(document.getElementById(id)); }})
+      .catch(err => console.error('Failed to load section ' + id, err));
+  }}
+  return _sectionInits[id];
+}}
+
+// Zoom detail: the payload holds each date axis at overview resolution.
+// When a chart is zoomed so that few overview points are left on screen,
+// the weekly or daily tiles (tiles.py) for the visible years are loaded and
+// spliced into every trace whose y is a payload series on that axis.
+const DETAIL_MIN_POINTS = 250;   // overview points on screen before loading detail
+const WEEKLY_MIN_DAYS   = 900;   // narrower windows go straight to daily tiles
+const _seriesAxis = new WeakMap(), _traceSeries = new WeakMap(), _tileLoads = {{}};
+
+function registerSeries() {{
+  Object.entries(TILES.index).forEach(([axis, t]) => t.series.forEach(key => {{
+    if (D[key] && typeof D[key] === 'object') _seriesAxis.set(D[key], {{ axis, key }});
+  }}));
+}}
+
+function loadTile(name) {{
+  if (!_tileLoads[name]) {{
+    let block = document.getElementById('tile-' + name);
+    _tileLoads[name] = block
+      ? Promise.resolve(decodePayload(JSON.parse(block.textContent)))
+      : fetch(TILES.url + '/' + name + '.json').then(r => {{
+          if (!r.ok) throw new Error('HTTP ' + r.status);
+          return r.json();
+        }}).then(decodePayload);
+  }}
+  return _tileLoads[name];
+}}
+
+function dayOf(x) {{ return Math.floor(Date.parse(String(x).slice(0, 10) + 'T00:00:00Z') / 86400000); }}
+
+function refineChart(gd) {{
+  if (!gd.data) return;
+  // Group the chart's traces by the axis of their payload series
+  let groups = {{}};
+  gd.data.forEach((tr, i) => {{
+    if (!_traceSeries.has(tr) && _seriesAxis.has(tr.y)) _traceSeries.set(tr, _seriesAxis.get(tr.y));
+    let src = _traceSeries.get(tr);
+    if (src) (groups[src.axis] = groups[src.axis] || []).push([i, src.key]);
+  }});
+  let xr  = gd.layout && gd.layout.xaxis && gd.layout.xaxis.range;
+  let tok = gd._detailToken = (gd._detailToken || 0) + 1;
+  Object.entries(groups).forEach(([axis, traces]) => {{
+    let dates = D[axis], lo = xr ? dayOf(xr[0]) : -Infinity, hi = xr ? dayOf(xr[1]) : Infinity;
+    let shown = dates.filter(d => {{ let n = dayOf(d); return n >= lo && n <= hi; }}).length;
+    let levels = TILES.index[axis].levels;
+    if (!xr || shown >= DETAIL_MIN_POINTS) {{
+      if (gd._detailAxis && gd._detailAxis[axis]) {{
+        delete gd._detailAxis[axis];
+        Plotly.restyle(gd, {{ x: traces.map(() => dates), y: traces.map(([, key]) => D[key]) }}, traces.map(([i]) => i));
+      }}
+      return;
+    }}
+    let level = hi - lo >= WEEKLY_MIN_DAYS ? 'weekly' : 'daily';
+    let y0 = new Date(lo * 86400000).getUTCFullYear(), y1 = new Date(hi * 86400000).getUTCFullYear();
+    let load = lvl => Promise.all(levels[lvl].filter(y => y >= y0 && y <= y1).sort((a, b) => b - a)
+      .map(y => loadTile(axis + '-' + lvl + '-' + y)));
+    // Daily tiles that can't be fetched (a page opened from file://) fall back to the weekly ones
+    let loaded = level === 'daily' ? load('daily').catch(err => {{
+      console.warn('Daily detail unavailable for ' + axis + ', using weekly', err);
+      level = 'weekly';
+      return load('weekly');
+    }}) : load(level);
+    loaded.then(parts => {{
+      if (!parts.length || gd._detailToken !== tok) return;   // nothing to show, or zoomed again meanwhile
+      // newest-first: overview after the tiles, tiles, overview before them
+      let first = parts[parts.length - 1].x, last = parts[0].x;
+      let from = first[first.length - 1], to = last[0];
+      let before = [], after = [];
+      dates.forEach((d, i) => {{ if (d > to) after.push(i); else if (d < from) before.push(i); }});
+      let xs = after.map(i => dates[i]).concat(...parts.map(p => p.x), before.map(i => dates[i]));
+      let ys = traces.map(([, key]) => after.map(i => D[key][i])
+        .concat(...parts.map(p => Array.from(p[key])), before.map(i => D[key][i])));
+      gd._detailAxis = gd._detailAxis || {{}};
+      gd._detailAxis[axis] = level;
+      Plotly.restyle(gd, {{ x: traces.map(() => xs), y: ys }}, traces.map(([i]) => i));
+    }}).catch(err => console.warn('Zoom detail unavailable for ' + axis + ', keeping the overview', err));
+  }});
 }}
 
-// After all charts render, hide non-active sections
-setTimeout(() => {{
-  document.querySelectorAll('.section:not(.active)').forEach(s => s.classList.add('hidden'));
-}}, 500);
+// Every chart refines itself after a draw (a redraw keeps the remembered zoom)
+// and whenever its x range changes.
+['newPlot', 'react'].forEach(fn => {{
+  let orig = Plotly[fn];
+  Plotly[fn] = function(id, data, layout, cfg) {{
+    return Promise.resolve(orig(id, data, layout, cfg)).then(gd => {{
+      if (!gd) return gd;
+      if (!gd._detailHooked) {{
+        gd._detailHooked = true;
+        gd.on('plotly_relayout', ed => {{
+          if (Object.keys(ed).some(k => k.indexOf('xaxis.range') === 0 || k === 'xaxis.autorange')) refineChart(gd);
+        }});
+      }}
+      refineChart(gd);
+      return gd;
+    }});
+  }};
+}});
 
 // --- STABLECOINS ---
 function updateScChart(mode, btn) {{
-  document.querySelector('#chart-sc-mcap').closest('.chart-card').querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
-  if (btn) btn.classList.add('active');
+  selectMode('chart-sc-mcap', mode, btn);
   let traces;
   if (mode === 'stacked') {{
     traces = [
@@ -567,60 +811,75 @@ function updateScChart(mode, btn) {{
   let layout = {{...layoutBase, xaxis: {{...layoutBase.xaxis, rangeslider: {{ visible: true, bgcolor: '#f5f5f5', bordercolor: '#e0e0e0' }}, type: 'date', range: [scStart, D.sc_dates[0]]}}, yaxis: {{...layoutBase.yaxis}}}};
   Plotly.react('chart-sc-mcap', traces, layout, config);
 }}
-updateScChart('stacked');
 
 // Pie chart
-Plotly.newPlot('chart-sc-pie', [{{
-  labels: D.stablecoin_overview.slice(0,10).map(s => s.symbol),
-  values: D.stablecoin_overview.slice(0,10).map(s => s.circulating),
-  type: 'pie', hole: 0.5, marker: {{ colors: colors }},
-  textinfo: 'label+percent', textfont: {{ size: 11, color: '#333' }},
-  hovertemplate: '%{{label}}<br>%{{value:$,.0f}}<br>%{{percent}}<extra></extra>'
-}}], {{...layoutBase, margin: {{ l: 10, r: 10, t: 10, b: 10 }}, showlegend: false}}, config);
+function drawScPie() {{
+  Plotly.newPlot('chart-sc-pie', [{{
+    labels: D.stablecoin_overview.slice(0,10).map(s => s.symbol),
+    values: D.stablecoin_overview.slice(0,10).map(s => s.circulating),
+    type: 'pie', hole: 0.5, marker: {{ colors: colors }},
+    textinfo: 'label+percent', textfont: {{ size: 11, color: '#333' }},
+    hovertemplate: '%{{label}}<br>%{{value:$,.0f}}<br>%{{percent}}<extra></extra>'
+  }}], {{...layoutBase, margin: {{ l: 10, r: 10, t: 10, b: 10 }}, showlegend: false}}, config);
+}}
 
 // Peg mechanism
-Plotly.newPlot('chart-peg-mech', [{{
-  labels: D.peg_mech.map(p => p[0]),
-  values: D.peg_mech.map(p => p[1]),
-  type: 'pie', hole: 0.45, marker: {{ colors: ['#00A2BD','#F79608','#B50063','#4A04A5'] }},
-  textinfo: 'label+percent', textfont: {{ size: 12, color: '#333' }},
-  hovertemplate: '%{{label}}<br>%{{value:$,.0f}}<extra></extra>'
-}}], {{...layoutBase, margin: {{ l: 10, r: 10, t: 10, b: 10 }}, showlegend: false}}, config);
+function drawPegMech() {{
+  Plotly.newPlot('chart-peg-mech', [{{
+    labels: D.peg_mech.map(p => p[0]),
+    values: D.peg_mech.map(p => p[1]),
+    type: 'pie', hole: 0.45, marker: {{ colors: ['#00A2BD','#F79608','#B50063','#4A04A5'] }},
+    textinfo: 'label+percent', textfont: {{ size: 12, color: '#333' }},
+    hovertemplate: '%{{label}}<br>%{{value:$,.0f}}<extra></extra>'
+  }}], {{...layoutBase, margin: {{ l: 10, r: 10, t: 10, b: 10 }}, showlegend: false}}, config);
+}}
 
 // Active addresses - STACKED BAR
-Plotly.newPlot('chart-active-addr', [
-  {{ x: D.aa_dates, y: D.aa_usdt, name: 'USDT', type: 'bar', marker: {{ color: '#00A2BD' }} }},
-  {{ x: D.aa_dates, y: D.aa_usdc, name: 'USDC', type: 'bar', marker: {{ color: '#F79608' }} }},
-], {{...layoutBase, barmode: 'stack', xaxis: {{...layoutBase.xaxis, type: 'date'}}}}, config);
+function drawActiveAddr() {{
+  Plotly.newPlot('chart-active-addr', [
+    {{ x: D.aa_dates, y: D.aa_usdt, name: 'USDT', type: 'bar', marker: {{ color: '#00A2BD' }} }},
+    {{ x: D.aa_dates, y: D.aa_usdc, name: 'USDC', type: 'bar', marker: {{ color: '#F79608' }} }},
+  ], {{...layoutBase, barmode: 'stack', xaxis: {{...layoutBase.xaxis, type: 'date'}}}}, config);
+}}
 
-// Transaction Volume Monthly - BAR CHART (if data available)
-if (D.has_tvm) {{
+// Transaction Volume Monthly - BAR CHART
+function drawTxVolMonthly() {{
   Plotly.newPlot('chart-tx-vol-monthly', [
     {{ x: D.tvm_months, y: D.tvm_usdt, name: 'USDT', type: 'bar', marker: {{ color: '#00A2BD' }} }},
     {{ x: D.tvm_months, y: D.tvm_usdc, name: 'USDC', type: 'bar', marker: {{ color: '#F79608' }} }},
   ], {{...layoutBase, barmode: 'stack', xaxis: {{...layoutBase.xaxis, type: 'date', dtick: 'M1', tickformat: '%b %Y'}}}}, config);
-}} else {{
-  document.querySelector('#chart-tx-vol-monthly').closest('.chart-card').style.display = 'none';
 }}
 
-// Stablecoin table
-let tableHtml = '<table><thead><tr><th>#</th><th>Name</th><th>Symbol</th><th>Type</th><th>Circulating</th><th>Market Share</th><th>1D</th><th>1W</th><th>1M</th><th>Peg</th></tr></thead><tbody>';
-D.stablecoin_overview.forEach((s, i) => {{
-  tableHtml += `<tr><td>${{i+1}}</td><td>${{s.name}}</td><td>${{s.symbol}}</td><td>${{s.peg_mechanism || '-'}}</td><td>${{fmt(s.circulating)}}</td><td>${{(s.market_share*100).toFixed(2)}}%</td><td>${{pctFmt(s.change_1d)}}</td><td>${{pctFmt(s.change_1w)}}</td><td>${{pctFmt(s.change_1m)}}</td><td>${{s.peg ? s.peg.toFixed(4) : '-'}}</td></tr>`;
-}});
-tableHtml += '</tbody></table>';
-document.getElementById('sc-table').innerHTML = tableHtml;
+function initStablecoins() {{
+  scStart = firstValidDate(D.sc_dates, D.sc_usdt, D.sc_usdc, D.sc_others);
+  // Monthly volume card only if data available
+  if (!D.has_tvm) document.querySelector('#chart-tx-vol-monthly').closest('.chart-card').style.display = 'none';
+
+  // Stablecoin table
+  let tableHtml = '<table><thead><tr><th>#</th><th>Name</th><th>Symbol</th><th>Type</th><th>Circulating</th><th>Market Share</th><th>1D</th><th>1W</th><th>1M</th><th>Peg</th></tr></thead><tbody>';
+  D.stablecoin_overview.forEach((s, i) => {{
+    tableHtml += `<tr><td>${{i+1}}</td><td>${{s.name}}</td><td>${{s.symbol}}</td><td>${{s.peg_mechanism || '-'}}</td><td>${{fmt(s.circulating)}}</td><td>${{(s.market_share*100).toFixed(2)}}%</td><td>${{pctFmt(s.change_1d)}}</td><td>${{pctFmt(s.change_1w)}}</td><td>${{pctFmt(s.change_1m)}}</td><td>${{s.peg ? s.peg.toFixed(4) : '-'}}</td></tr>`;
+  }});
+  tableHtml += '</tbody></table>';
+  document.getElementById('sc-table').innerHTML = tableHtml;
+}}
 
 // --- DEFI & TVL ---
-Plotly.newPlot('chart-total-tvl', [{{
-  x: D.total_tvl_dates, y: D.total_tvl_vals, type: 'scatter', mode: 'lines',
-  fill: 'tozeroy', fillcolor: 'rgba(0,162,189,0.12)', line: {{ color: '#00A2BD', width: 2 }},
-  hovertemplate: '%{{x}}<br>TVL: %{{y:$,.0f}}<extra></extra>'
-}}], {{...layoutBase, xaxis: {{...layoutBase.xaxis, rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, type: 'date', range: [tvlTotalStart, D.total_tvl_dates[0]]}}}}, config);
+function initTvl() {{
+  tvlTotalStart = firstValidDate(D.total_tvl_dates, D.total_tvl_vals);
+  tvlChainStart = firstValidDate(D.tvl_dates, D.tvl_eth, D.tvl_sol, D.tvl_tron);
+}}
+
+function drawTotalTvl() {{
+  Plotly.newPlot('chart-total-tvl', [{{
+    x: D.total_tvl_dates, y: D.total_tvl_vals, type: 'scatter', mode: 'lines',
+    fill: 'tozeroy', fillcolor: 'rgba(0,162,189,0.12)', line: {{ color: '#00A2BD', width: 2 }},
+    hovertemplate: '%{{x}}<br>TVL: %{{y:$,.0f}}<extra></extra>'
+  }}], {{...layoutBase, xaxis: {{...layoutBase.xaxis, rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, type: 'date', range: [tvlTotalStart, D.total_tvl_dates[0]]}}}}, config);
+}}
 
 function updateTvlChart(mode, btn) {{
-  document.querySelector('#chart-tvl-chain').closest('.chart-card').querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
-  if (btn) btn.classList.add('active');
+  selectMode('chart-tvl-chain', mode, btn);
   let chains = [
     {{ data: D.tvl_eth, name: 'Ethereum', color: colors[0] }},
     {{ data: D.tvl_sol, name: 'Solana', color: colors[1] }},
@@ -644,19 +903,38 @@ function updateTvlChart(mode, btn) {{
   }}
   Plotly.react('chart-tvl-chain', traces, {{...layoutBase, xaxis: {{...layoutBase.xaxis, rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, type: 'date', range: [tvlChainStart, D.tvl_dates[0]]}}}}, config);
 }}
-updateTvlChart('stacked');
 
 
 // --- FEES ---
-Plotly.newPlot('chart-total-fees', [{{
-  x: D.fee_dates, y: D.fee_total, type: 'scatter', mode: 'lines',
-  fill: 'tozeroy', fillcolor: 'rgba(247,150,8,0.12)', line: {{ color: '#F79608', width: 2 }},
-  hovertemplate: '%{{x}}<br>Fees: %{{y:$,.0f}}<extra></extra>'
-}}], {{...layoutBase, xaxis: {{...layoutBase.xaxis, rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, type: 'date', range: [feeTotalStart, D.fee_dates[0]]}}}}, config);
+function initFees() {{
+  feeTotalStart = firstValidDate(D.fee_dates, D.fee_total);
+  feeChainStart = firstValidDate(D.fee_dates, D.fee_eth, D.fee_sol, D.fee_tron);
+  ethActStart   = firstValidDate(D.fee_dates, D.fee_eth);
+  solActStart   = firstValidDate(D.fee_dates, D.fee_sol);
+  btcActStart   = firstValidDate(D.fee_dates, D.fee_btc);
+
+  // Transaction Volume Daily / vs Token Prices cards only if data available
+  if (D.has_tvd) {{
+    txVolStart     = firstValidDate(D.tvd_dates, D.tvd_usdt, D.tvd_usdc);
+    txVolDataStart = firstValidDate(D.tvd_dates, D.tvd_total_7d);
+  }} else {{
+    let txEl = document.querySelector('#chart-tx-vol');
+    if (txEl) txEl.closest('.chart-card').style.display = 'none';
+    let txBtcEl = document.querySelector('#chart-tx-vs-btc');
+    if (txBtcEl) txBtcEl.closest('.chart-card').style.display = 'none';
+  }}
+}}
+
+function drawTotalFees() {{
+  Plotly.newPlot('chart-total-fees', [{{
+    x: D.fee_dates, y: D.fee_total, type: 'scatter', mode: 'lines',
+    fill: 'tozeroy', fillcolor: 'rgba(247,150,8,0.12)', line: {{ color: '#F79608', width: 2 }},
+    hovertemplate: '%{{x}}<br>Fees: %{{y:$,.0f}}<extra></extra>'
+  }}], {{...layoutBase, xaxis: {{...layoutBase.xaxis, rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, type: 'date', range: [feeTotalStart, D.fee_dates[0]]}}}}, config);
+}}
 
 function updateFeeChart(mode, btn) {{
-  document.querySelector('#chart-fees-chain').closest('.chart-card').querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
-  if (btn) btn.classList.add('active');
+  selectMode('chart-fees-chain', mode, btn);
   let chains = [
     {{ data: D.fee_eth, name: 'Ethereum', color: colors[0] }},
     {{ data: D.fee_sol, name: 'Solana', color: colors[1] }},
@@ -673,13 +951,10 @@ function updateFeeChart(mode, btn) {{
   }}
   Plotly.react('chart-fees-chain', traces, {{...layoutBase, xaxis: {{...layoutBase.xaxis, rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, type: 'date', range: [feeChainStart, D.fee_dates[0]]}}}}, config);
 }}
-updateFeeChart('stacked');
 
 // Activity vs Token Price (Ethereum) - with USD/native toggle
-let ethActStart = firstValidDate(D.fee_dates, D.fee_eth);
 function updateActivityEth(mode, btn) {{
-  document.querySelector('#chart-activity-eth').closest('.chart-card').querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
-  if (btn) btn.classList.add('active');
+  selectMode('chart-activity-eth', mode, btn);
   let feeData = mode === 'native' ? D.fee_eth_native : D.fee_eth;
   let feeLabel = mode === 'native' ? 'ETH Fees 7D Avg (ETH)' : 'ETH Fees 7D Avg (USD)';
   let feeAxisTitle = mode === 'native' ? 'Fees (ETH)' : 'Fees ($)';
@@ -693,13 +968,10 @@ function updateActivityEth(mode, btn) {{
     yaxis2: {{ title: 'ETH Price ($)', titlefont: {{ color: '#F79608' }}, tickfont: {{ color: '#F79608' }}, overlaying: 'y', side: 'right', gridcolor: 'transparent' }},
   }}, config);
 }}
-updateActivityEth('usd');
 
 // Activity vs Token Price (Solana) - with USD/native toggle
-let solActStart = firstValidDate(D.fee_dates, D.fee_sol);
 function updateActivitySol(mode, btn) {{
-  document.querySelector('#chart-activity-sol').closest('.chart-card').querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
-  if (btn) btn.classList.add('active');
+  selectMode('chart-activity-sol', mode, btn);
   let feeData = mode === 'native' ? D.fee_sol_native : D.fee_sol;
   let feeLabel = mode === 'native' ? 'SOL Fees 7D Avg (SOL)' : 'SOL Fees 7D Avg (USD)';
   let feeAxisTitle = mode === 'native' ? 'Fees (SOL)' : 'Fees ($)';
@@ -713,13 +985,10 @@ function updateActivitySol(mode, btn) {{
     yaxis2: {{ title: 'SOL Price ($)', titlefont: {{ color: '#ADBA00' }}, tickfont: {{ color: '#ADBA00' }}, overlaying: 'y', side: 'right', gridcolor: 'transparent' }},
   }}, config);
 }}
-updateActivitySol('usd');
 
 // Activity vs Token Price (Bitcoin) - with USD/native toggle
-let btcActStart = firstValidDate(D.fee_dates, D.fee_btc);
 function updateActivityBtc(mode, btn) {{
-  document.querySelector('#chart-activity-btc').closest('.chart-card').querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
-  if (btn) btn.classList.add('active');
+  selectMode('chart-activity-btc', mode, btn);
   let feeData  = mode === 'native' ? D.fee_btc_native : D.fee_btc;
   let feeLabel = mode === 'native' ? 'BTC Fees 7D Avg (BTC)' : 'BTC Fees 7D Avg (USD)';
   let feeAxisTitle = mode === 'native' ? 'Fees (BTC)' : 'Fees ($)';
@@ -733,76 +1002,62 @@ function updateActivityBtc(mode, btn) {{
     yaxis2: {{ title: 'BTC Price ($)', titlefont: {{ color: '#4A04A5' }}, tickfont: {{ color: '#4A04A5' }}, overlaying: 'y', side: 'right', gridcolor: 'transparent' }},
   }}, config);
 }}
-updateActivityBtc('usd');
-
-// Transaction Volume Daily (if data available)
-if (D.has_tvd) {{
-  let txVolStart = firstValidDate(D.tvd_dates, D.tvd_usdt, D.tvd_usdc);
-  function updateTxVolChart(mode, btn) {{
-    document.querySelector('#chart-tx-vol').closest('.chart-card').querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
-    if (btn) btn.classList.add('active');
-    let coins = [
-      {{ data: D.tvd_usdt, name: 'USDT', color: '#00A2BD' }},
-      {{ data: D.tvd_usdc, name: 'USDC', color: '#F79608' }},
-    ];
-    let traces;
-    if (mode === 'stacked') {{
-      traces = coins.map(c => ({{ x: D.tvd_dates, y: c.data, name: c.name, stackgroup: 'one', fillcolor: c.color + '88', line: {{ width: 0 }} }}));
-    }} else {{
-      traces = coins.map(c => ({{ x: D.tvd_dates, y: c.data, name: c.name, line: {{ color: c.color }} }}));
-    }}
-    Plotly.react('chart-tx-vol', traces, {{...layoutBase, xaxis: {{...layoutBase.xaxis, rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, type: 'date', range: [txVolStart, D.tvd_dates[0]]}}}}, config);
-  }}
-  updateTxVolChart('stacked');
-
-  // Transaction Volume vs Token Prices (BTC/ETH/SOL toggle)
-  let txVolDataStart = firstValidDate(D.tvd_dates, D.tvd_total_7d);
-  function updateTxVsPrice(mode, btn) {{
-    document.querySelector('#chart-tx-vs-btc').closest('.chart-card').querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
-    if (btn) btn.classList.add('active');
-    let priceDates, priceData, priceName, priceColor, priceAxisTitle;
-    if (mode === 'eth') {{
-      priceDates = D.tvd_dates; priceData = D.tvd_eth_price;
-      priceName = 'Ethereum Price'; priceColor = '#00A2BD'; priceAxisTitle = 'ETH Price ($)';
-    }} else if (mode === 'sol') {{
-      priceDates = D.tvd_dates; priceData = D.tvd_sol_price;
-      priceName = 'Solana Price'; priceColor = '#B50063'; priceAxisTitle = 'SOL Price ($)';
-    }} else {{
-      priceDates = D.tvd_dates; priceData = D.tvd_btc_price;
-      priceName = 'Bitcoin Price'; priceColor = '#F79608'; priceAxisTitle = 'BTC Price ($)';
-    }}
-    Plotly.react('chart-tx-vs-btc', [
-      {{ x: D.tvd_dates, y: D.tvd_total_7d, name: 'Stablecoin Volume 7D Avg', fill: 'tozeroy', fillcolor: 'rgba(0,162,189,0.12)', line: {{ color: '#00A2BD', width: 2 }}, yaxis: 'y', connectgaps: true }},
-      {{ x: priceDates, y: priceData, name: priceName, line: {{ color: priceColor, width: 2 }}, yaxis: 'y2', connectgaps: true }},
-    ], {{
-      ...layoutBase,
-      xaxis: {{...layoutBase.xaxis, rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, type: 'date', range: [txVolDataStart, D.tvd_dates[0]]}},
-      yaxis: {{...layoutBase.yaxis, title: 'Volume ($)', titlefont: {{ color: '#00A2BD' }}, tickfont: {{ color: '#00A2BD' }} }},
-      yaxis2: {{ title: priceAxisTitle, titlefont: {{ color: priceColor }}, tickfont: {{ color: priceColor }}, overlaying: 'y', side: 'right', gridcolor: 'transparent' }},
-    }}, config);
+
+// Transaction Volume Daily
+function updateTxVolChart(mode, btn) {{
+  selectMode('chart-tx-vol', mode, btn);
+  let coins = [
+    {{ data: D.tvd_usdt, name: 'USDT', color: '#00A2BD' }},
+    {{ data: D.tvd_usdc, name: 'USDC', color: '#F79608' }},
+  ];
+  let traces;
+  if (mode === 'stacked') {{
+    traces = coins.map(c => ({{ x: D.tvd_dates, y: c.data, name: c.name, stackgroup: 'one', fillcolor: c.color + '88', line: {{ width: 0 }} }}));
+  }} else {{
+    traces = coins.map(c => ({{ x: D.tvd_dates, y: c.data, name: c.name, line: {{ color: c.color }} }}));
   }}
-  updateTxVsPrice('btc');
-}} else {{
-  let txEl = document.querySelector('#chart-tx-vol');
-  if (txEl) txEl.closest('.chart-card').style.display = 'none';
-  let txBtcEl = document.querySelector('#chart-tx-vs-btc');
-  if (txBtcEl) txBtcEl.closest('.chart-card').style.display = 'none';
+  Plotly.react('chart-tx-vol', traces, {{...layoutBase, xaxis: {{...layoutBase.xaxis, rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, type: 'date', range: [txVolStart, D.tvd_dates[0]]}}}}, config);
 }}
 
-// --- PROTOCOLS ---
+// Transaction Volume vs Token Prices (BTC/ETH/SOL toggle)
+function updateTxVsPrice(mode, btn) {{
+  selectMode('chart-tx-vs-btc', mode, btn);
+  let priceDates, priceData, priceName, priceColor, priceAxisTitle;
+  if (mode === 'eth') {{
+    priceDates = D.tvd_dates; priceData = D.tvd_eth_price;
+    priceName = 'Ethereum Price'; priceColor = '#00A2BD'; priceAxisTitle = 'ETH Price ($)';
+  }} else if (mode === 'sol') {{
+    priceDates = D.tvd_dates; priceData = D.tvd_sol_price;
+    priceName = 'Solana Price'; priceColor = '#B50063'; priceAxisTitle = 'SOL Price ($)';
+  }} else {{
+    priceDates = D.tvd_dates; priceData = D.tvd_btc_price;
+    priceName = 'Bitcoin Price'; priceColor = '#F79608'; priceAxisTitle = 'BTC Price ($)';
+  }}
+  Plotly.react('chart-tx-vs-btc', [
+    {{ x: D.tvd_dates, y: D.tvd_total_7d, name: 'Stablecoin Volume 7D Avg', fill: 'tozeroy', fillcolor: 'rgba(0,162,189,0.12)', line: {{ color: '#00A2BD', width: 2 }}, yaxis: 'y', connectgaps: true }},
+    {{ x: priceDates, y: priceData, name: priceName, line: {{ color: priceColor, width: 2 }}, yaxis: 'y2', connectgaps: true }},
+  ], {{
+    ...layoutBase,
+    xaxis: {{...layoutBase.xaxis, rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, type: 'date', range: [txVolDataStart, D.tvd_dates[0]]}},
+    yaxis: {{...layoutBase.yaxis, title: 'Volume ($)', titlefont: {{ color: '#00A2BD' }}, tickfont: {{ color: '#00A2BD' }} }},
+    yaxis2: {{ title: priceAxisTitle, titlefont: {{ color: priceColor }}, tickfont: {{ color: priceColor }}, overlaying: 'y', side: 'right', gridcolor: 'transparent' }},
+  }}, config);
+}}
 
-// Protocol table
-let ptHtml = '<table><thead><tr><th>#</th><th>Name</th><th>Category</th><th>Chain</th><th>TVL</th><th>1D Change</th><th>7D Change</th></tr></thead><tbody>';
-D.top_protocols.forEach((p, i) => {{
-  ptHtml += `<tr><td>${{i+1}}</td><td>${{p.name}}</td><td>${{p.category}}</td><td>${{p.chain}}</td><td>${{fmt(p.tvl)}}</td><td>${{pctFmt(p.change_1d ? p.change_1d/100 : null)}}</td><td>${{pctFmt(p.change_7d ? p.change_7d/100 : null)}}</td></tr>`;
-}});
-ptHtml += '</tbody></table>';
-document.getElementById('proto-table').innerHTML = ptHtml;
+// --- PROTOCOLS ---
+function initProtocols() {{
+  // Protocol table
+  let ptHtml = '<table><thead><tr><th>#</th><th>Name</th><th>Category</th><th>Chain</th><th>TVL</th><th>1D Change</th><th>7D Change</th></tr></thead><tbody>';
+  D.top_protocols.forEach((p, i) => {{
+    ptHtml += `<tr><td>${{i+1}}</td><td>${{p.name}}</td><td>${{p.category}}</td><td>${{p.chain}}</td><td>${{fmt(p.tvl)}}</td><td>${{pctFmt(p.change_1d ? p.change_1d/100 : null)}}</td><td>${{pctFmt(p.change_7d ? p.change_7d/100 : null)}}</td></tr>`;
+  }});
+  ptHtml += '</tbody></table>';
+  document.getElementById('proto-table').innerHTML = ptHtml;
+}}
 
 // --- INSIGHTS ---
 function updateCorrChart(mode, btn) {{
-  document.querySelector('#chart-correlation').closest('.chart-card').querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
-  if (btn) btn.classList.add('active');
+  selectMode('chart-correlation', mode, btn);
   let traces = [];
   if (mode === 'tether' || mode === 'all') {{
     traces.push({{ x: D.corr_dates, y: D.corr_tether_eth, name: 'USDT vs ETH', line: {{ color: '#00A2BD' }}, connectgaps: true }});
@@ -819,12 +1074,10 @@ function updateCorrChart(mode, btn) {{
   }};
   Plotly.react('chart-correlation', traces, layout, config);
 }}
-updateCorrChart('tether');
 
 // Bitcoin Price vs Stablecoin Market Cap (with toggle)
 function updatePriceChart(mode, btn) {{
-  document.querySelector('#chart-prices').closest('.chart-card').querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
-  if (btn) btn.classList.add('active');
+  selectMode('chart-prices', mode, btn);
   let btcMcapStart = firstValidDate(D.corr_dates, D.btc_price, D.corr_tether_mcap, D.corr_usdc_mcap);
   let traces = [
     {{ x: D.corr_dates, y: D.btc_price, name: 'Bitcoin Price', line: {{ color: '#F79608', width: 2 }}, yaxis: 'y' }},
@@ -842,62 +1095,128 @@ function updatePriceChart(mode, btn) {{
     yaxis2: {{ title: 'Market Cap ($)', titlefont: {{ color: '#00A2BD' }}, tickfont: {{ color: '#00A2BD' }}, overlaying: 'y', side: 'right', gridcolor: 'transparent' }},
   }}, config);
 }}
-updatePriceChart('usdt');
-
 
 // Fee Efficiency by Chain (if data available)
-if (D.has_fe) {{
-  let feTraces = [];
-  let feChainNames = Object.keys(D.fe_eff);
-  feChainNames.forEach((chain, idx) => {{
-    let vals = D.fe_eff[chain].map(v => (v != null && typeof v === 'number') ? v * 100 : null);
+function drawEfficiency() {{
+  if (D.has_fe) {{
+    let feTraces = [];
+    let feChainNames = Object.keys(D.fe_eff);
+    feChainNames.forEach((chain, idx) => {{
+      let vals = D.fe_eff[chain].map(v => (v != null && typeof v === 'number') ? v * 100 : null);
+      feTraces.push({{
+        x: D.fe_months, y: vals, name: chain,
+        line: {{ color: colors[idx % colors.length], width: 2 }},
+        connectgaps: true,
+        hovertemplate: '%{{x}}<br>' + chain + ': %{{y:.3f}}%<extra></extra>'
+      }});
+    }});
+    let feTotalVals = D.fe_eff_total.map(v => (v != null && typeof v === 'number') ? v * 100 : null);
     feTraces.push({{
-      x: D.fe_months, y: vals, name: chain,
-      line: {{ color: colors[idx % colors.length], width: 2 }},
+      x: D.fe_months, y: feTotalVals, name: 'All Chains',
+      line: {{ color: '#333', width: 2, dash: 'dot' }},
       connectgaps: true,
-      hovertemplate: '%{{x}}<br>' + chain + ': %{{y:.3f}}%<extra></extra>'
     }});
-  }});
-  let feTotalVals = D.fe_eff_total.map(v => (v != null && typeof v === 'number') ? v * 100 : null);
-  feTraces.push({{
-    x: D.fe_months, y: feTotalVals, name: 'All Chains',
-    line: {{ color: '#333', width: 2, dash: 'dot' }},
-    connectgaps: true,
-  }});
-  let feAllArrays = Object.values(D.fe_eff);
-  let feEffStart = firstValidDate(D.fe_months, ...feAllArrays);
-  Plotly.newPlot('chart-efficiency', feTraces, {{
-    ...layoutBase,
-    xaxis: {{...layoutBase.xaxis, type: 'date', rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, range: [feEffStart, D.fe_months[0]] }},
-    yaxis: {{...layoutBase.yaxis, title: 'Fees / TVL (%)' }},
-    margin: {{ l: 60, r: 20, t: 10, b: 40 }},
-  }}, config);
-}} else {{
-  // Fallback: compute efficiency from latest fee/TVL data
-  let chainNames = ['Ethereum', 'Solana', 'BSC', 'Bitcoin', 'Tron', 'Base'];
-  let latestTvl = [D.tvl_eth[0], D.tvl_sol[0], D.tvl_bsc[0], D.tvl_btc[0], D.tvl_tron[0], D.tvl_base[0]];
-  let latestFees = [D.fee_eth[0], D.fee_sol[0], D.fee_bsc[0], D.fee_btc[0], D.fee_tron[0], D.fee_base[0]];
-  let annFees = latestFees.map(f => (f || 0) * 365);
-  let efficiency = latestTvl.map((t, i) => t && annFees[i] ? (annFees[i] / t * 100) : 0);
-  Plotly.newPlot('chart-efficiency', [{{
-    x: chainNames, y: efficiency, type: 'bar',
-    marker: {{ color: colors.slice(0, 6) }},
-    text: efficiency.map(e => e.toFixed(2) + '%'),
-    textposition: 'outside', textfont: {{ size: 11 }},
-    hovertemplate: '%{{x}}<br>Annualized Fees/TVL: %{{y:.3f}}%<extra></extra>'
-  }}], {{
-    ...layoutBase,
-    yaxis: {{...layoutBase.yaxis, title: 'Annualized Fees / TVL (%)' }},
-    margin: {{ l: 50, r: 20, t: 10, b: 60 }},
-  }}, config);
+    let feAllArrays = Object.values(D.fe_eff);
+    let feEffStart = firstValidDate(D.fe_months, ...feAllArrays);
+    Plotly.newPlot('chart-efficiency', feTraces, {{
+      ...layoutBase,
+      xaxis: {{...layoutBase.xaxis, type: 'date', rangeslider: {{ visible: true, bgcolor: '#f5f5f5' }}, range: [feEffStart, D.fe_months[0]] }},
+      yaxis: {{...layoutBase.yaxis, title: 'Fees / TVL (%)' }},
+      margin: {{ l: 60, r: 20, t: 10, b: 40 }},
+    }}, config);
+  }} else {{
+    // Fallback: compute efficiency from latest fee/TVL data
+    let chainNames = ['Ethereum', 'Solana', 'BSC', 'Bitcoin', 'Tron', 'Base'];
+    let latestTvl = [D.tvl_eth[0], D.tvl_sol[0], D.tvl_bsc[0], D.tvl_btc[0], D.tvl_tron[0], D.tvl_base[0]];
+    let latestFees = [D.fee_eth[0], D.fee_sol[0], D.fee_bsc[0], D.fee_btc[0], D.fee_tron[0], D.fee_base[0]];
+    let annFees = latestFees.map(f => (f || 0) * 365);
+    let efficiency = latestTvl.map((t, i) => t && annFees[i] ? (annFees[i] / t * 100) : 0);
+    Plotly.newPlot('chart-efficiency', [{{
+      x: chainNames, y: efficiency, type: 'bar',
+      marker: {{ color: colors.slice(0, 6) }},
+      text: efficiency.map(e => e.toFixed(2) + '%'),
+      textposition: 'outside', textfont: {{ size: 11 }},
+      hovertemplate: '%{{x}}<br>Annualized Fees/TVL: %{{y:.3f}}%<extra></extra>'
+    }}], {{
+      ...layoutBase,
+      yaxis: {{...layoutBase.yaxis, title: 'Annualized Fees / TVL (%)' }},
+      margin: {{ l: 50, r: 20, t: 10, b: 60 }},
+    }}, config);
+  }}
 }}
 
+// Per-section setup (start dates, tables, cards without data) runs once the
+// section's data is there; charts are drawn later, as they come into view.
+const SECTION_INIT = {{
+  stablecoins: initStablecoins,
+  defi:        initTvl,
+  fees:        initFees,
+  protocols:   initProtocols,
+  insights:    () => {{}},
+}};
+
+const CHARTS = {{
+  'chart-sc-mcap':        () => updateScChart(chartMode['chart-sc-mcap'] || 'stacked'),
+  'chart-sc-pie':         drawScPie,
+  'chart-peg-mech':       drawPegMech,
+  'chart-active-addr':    drawActiveAddr,
+  'chart-tx-vol-monthly': drawTxVolMonthly,
+  'chart-total-tvl':      drawTotalTvl,
+  'chart-tvl-chain':      () => updateTvlChart(chartMode['chart-tvl-chain'] || 'stacked'),
+  'chart-total-fees':     drawTotalFees,
+  'chart-fees-chain':     () => updateFeeChart(chartMode['chart-fees-chain'] || 'stacked'),
+  'chart-activity-eth':   () => updateActivityEth(chartMode['chart-activity-eth'] || 'usd'),
+  'chart-activity-sol':   () => updateActivitySol(chartMode['chart-activity-sol'] || 'usd'),
+  'chart-activity-btc':   () => updateActivityBtc(chartMode['chart-activity-btc'] || 'usd'),
+  'chart-tx-vol':         () => updateTxVolChart(chartMode['chart-tx-vol'] || 'stacked'),
+  'chart-tx-vs-btc':      () => updateTxVsPrice(chartMode['chart-tx-vs-btc'] || 'btc'),
+  'chart-correlation':    () => updateCorrChart(chartMode['chart-correlation'] || 'tether'),
+  'chart-prices':         () => updatePriceChart(chartMode['chart-prices'] || 'usdt'),
+  'chart-efficiency':     drawEfficiency,
+}};
+
+// Only the open section is set up at load; the rest wait for showSection
+registerSeries();
+document.querySelectorAll('.section:not(.active)').forEach(s => s.classList.add('hidden'));
+initSection('stablecoins');
+
 </script>
 </body>
 </html>"""
+    return html, data_files
+
+
+def main(argv):
+    # --offline: re-render from the response cache without touching the network
+    if '--offline' in argv:
+        http_cache.OFFLINE = True
+
+    # --plan: list the requests a refresh would make, then stop
+    if '--plan' in argv:
+        plan_pipeline()
+        return
+
+    data = fetch_all()
+    with instrument.phase('render'):
+        html, data_files = render(data, split='--split' in argv)
+        with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
+            f.write(html)
+
+    print("Dashboard generated successfully!")
+    print(f"File size: {len(html):,} bytes")
+    if data_files:
+        for name, url in data_files.items():
+            print(f"  {url}: {os.path.getsize(os.path.join(SCRIPT_DIR, url)):,} bytes")
+    tiles_dir = os.path.join(SCRIPT_DIR, DATA_DIRNAME, 'tiles')
+    if os.path.isdir(tiles_dir):
+        print(f"Zoom tiles: {len(os.listdir(tiles_dir))} files in {DATA_DIRNAME}/tiles (publish with the page)")
+
+    # Per-request / per-phase run report (see instrument.py)
+    instrument.print_summary()
+    report = instrument.write_report({'argv': argv[1:], 'html_bytes': len(html)})
+    if report:
+        print(f"Run report: {report}")
 
-with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-    f.write(html)
 
-print("Dashboard generated successfully!")
-print(f"File size: {len(html):,} bytes")
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,112 @@
+"""
+history_store.py  –  Local time-series store so daily runs fetch only new days.
+Points live in a SQLite file keyed by (source, series, day), where day is the
+number of days since 1970-01-01.  Fetchers ask for the last stored day,
+request only what came after it, upsert the new points and rebuild the full
+series from the local copy as a TimeSeriesFrame.  A source with no "since"
+request replaces the whole series instead (replace()), and the store keeps
+when that happened so a caller can skip a re-download within a TTL.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+from http_cache import CACHE_DIR
+from timeseries import TimeSeriesFrame
+
+ENABLED = os.environ.get("DASHBOARD_NO_HISTORY", "") in ("", "0")
+
+
+class HistoryStore:
+    """SQLite-backed (source, series, day) → value store, shared between threads."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db   = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS points (
+                   source TEXT    NOT NULL,
+                   series TEXT    NOT NULL,
+                   day    INTEGER NOT NULL,
+                   value  REAL,
+                   PRIMARY KEY (source, series, day)
+               ) WITHOUT ROWID"""
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS fetched (
+                   source     TEXT NOT NULL,
+                   series     TEXT NOT NULL,
+                   fetched_at REAL NOT NULL,
+                   PRIMARY KEY (source, series)
+               ) WITHOUT ROWID"""
+        )
+
+    def last_day(self, source, series):
+        """Newest stored epoch day for a series, or None if it is empty."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MAX(day) FROM points WHERE source = ? AND series = ?",
+                (source, series),
+            ).fetchone()
+        return row[0]
+
+    def fetched_at(self, source, series):
+        """Unix time of the series' last replace(), or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fetched_at FROM fetched WHERE source = ? AND series = ?",
+                (source, series),
+            ).fetchone()
+        return row[0] if row else None
+
+    def load(self, source, series, since=None, name="value"):
+        """Returns the series as a one-column frame, optionally from day `since` on."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT day, value FROM points WHERE source = ? AND series = ? AND day >= ?"
+                " ORDER BY day",
+                (source, series, since if since is not None else -(1 << 31)),
+            ).fetchall()
+        frame = TimeSeriesFrame([d for d, _ in rows])
+        frame[name] = [v for _, v in rows]
+        return frame
+
+    def upsert(self, source, series, frame, name="value"):
+        """Inserts or overwrites the points of one frame column."""
+        rows = [(source, series, d, v) for d, v in zip(frame.days, frame[name])]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?)", rows)
+            self._db.execute("COMMIT")
+
+    def replace(self, source, series, frame, name="value"):
+        """Replaces the whole series with one frame column (a full download)
+        and records the time for fetched_at()."""
+        rows = [(source, series, d, v) for d, v in zip(frame.days, frame[name])]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM points WHERE source = ? AND series = ?", (source, series))
+            self._db.executemany("INSERT INTO points VALUES (?, ?, ?, ?)", rows)
+            self._db.execute(
+                "INSERT OR REPLACE INTO fetched VALUES (?, ?, ?)", (source, series, time.time())
+            )
+            self._db.execute("COMMIT")
+
+
+_store      = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Shared store instance, or None when DASHBOARD_NO_HISTORY is set."""
+    global _store
+    if not ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore(os.path.join(CACHE_DIR, "history.sqlite"))
+        return _store
@@ -0,0 +1,194 @@
+"""
+http_cache.py  –  Persistent on-disk response cache behind fetch_data.get_json.
+Bodies are stored zlib-compressed in a SQLite file keyed by URL + params, with:
+  - a TTL per endpoint (TTLS below)
+  - ETag / Last-Modified revalidation once an entry goes stale
+  - size-bounded LRU eviction (least recently read entries go first)
+  - a negative cache: URLs that answered with a non-retryable 4xx are
+    remembered for NEGATIVE_TTL and not requested again until it expires
+Set DASHBOARD_OFFLINE=1 to serve whatever is cached without touching the network.
+
+CACHE_DIR (also home to the history store, throttle state and crawl queue)
+defaults to a per-user cache directory outside the repository, so none of
+it ends up in the published site; DASHBOARD_CACHE_DIR overrides it.
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlencode, urlsplit
+
+# ── Config ────────────────────────────────────────────────────────────────────
+def _user_cache_dir():
+    """$XDG_CACHE_HOME, %LOCALAPPDATA% on Windows, else ~/.cache."""
+    base = (os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+            or os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "blockchain-dashboard")
+
+
+CACHE_DIR = os.environ.get("DASHBOARD_CACHE_DIR") or _user_cache_dir()
+CACHE_MAX_BYTES = int(float(os.environ.get("DASHBOARD_CACHE_MAX_MB", "256")) * 1024 * 1024)
+ENABLED = os.environ.get("DASHBOARD_NO_CACHE", "") in ("", "0")
+OFFLINE = os.environ.get("DASHBOARD_OFFLINE", "") not in ("", "0")
+
+# (host + path prefix, ttl seconds) — first match wins.  None = never stored:
+# per-protocol histories live in the history store (protocol_history.py), and
+# a full-universe crawl would otherwise push everything else out of the cache.
+TTLS = [
+    ("api.llama.fi/protocols",            1 * 3600),
+    ("api.llama.fi/protocol/",           None),
+    ("api.llama.fi/v2/chains",            1 * 3600),
+    ("api.llama.fi/overview/fees",        3 * 3600),
+    ("api.llama.fi/v2/historicalChainTvl", 3 * 3600),
+    ("stablecoins.llama.fi/",             3 * 3600),
+    ("api.binance.com/",                  6 * 3600),
+    ("api.coingecko.com/",                6 * 3600),
+    ("api.dune.com/",                    12 * 3600),
+]
+DEFAULT_TTL = 1 * 3600
+
+# How long a 4xx answer (404 unknown chain, 400 bad parameter) is trusted.
+NEGATIVE_TTL = float(os.environ.get("DASHBOARD_NEGATIVE_TTL_HOURS", "24")) * 3600
+
+
+def ttl_for(url):
+    parts = urlsplit(url)
+    target = (parts.hostname or "") + parts.path
+    for prefix, ttl in TTLS:
+        if target.startswith(prefix):
+            return ttl
+    return DEFAULT_TTL
+
+
+def cache_key(url, params=None):
+    if params:
+        url = url + ("&" if "?" in url else "?") + urlencode(sorted(params.items()))
+    return hashlib.sha1(url.encode("utf-8")).hexdigest(), url
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+class ResponseCache:
+    """SQLite-backed response store; safe to share between fetch threads."""
+
+    def __init__(self, path, max_bytes=CACHE_MAX_BYTES):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db   = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   key           TEXT PRIMARY KEY,
+                   url           TEXT NOT NULL,
+                   body          BLOB NOT NULL,
+                   size          INTEGER NOT NULL,
+                   etag          TEXT,
+                   last_modified TEXT,
+                   fetched_at    REAL NOT NULL,
+                   accessed_at   REAL NOT NULL
+               )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(accessed_at)")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS negative (
+                   key        TEXT PRIMARY KEY,
+                   url        TEXT NOT NULL,
+                   status     INTEGER NOT NULL,
+                   expires_at REAL NOT NULL
+               )"""
+        )
+
+    def lookup(self, url, params=None):
+        """Returns the cached entry as a dict (with 'fresh' and 'body'), or None."""
+        key, full_url = cache_key(url, params)
+        ttl = ttl_for(full_url)
+        if ttl is None:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        body, etag, last_modified, fetched_at = row
+        return {
+            "key":           key,
+            "body":          zlib.decompress(body),
+            "etag":          etag,
+            "last_modified": last_modified,
+            "age":           now - fetched_at,
+            "fresh":         now - fetched_at < ttl,
+        }
+
+    def store(self, url, params, body, etag=None, last_modified=None):
+        key, full_url = cache_key(url, params)
+        if ttl_for(full_url) is None:
+            return
+        packed = zlib.compress(body, 6)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, full_url, packed, len(packed), etag, last_modified, now, now),
+            )
+            self._evict()
+
+    def refresh(self, entry):
+        """Marks a revalidated (304) entry as freshly fetched."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), entry["key"])
+            )
+
+    def lookup_negative(self, url, params=None):
+        """Status of a remembered 4xx answer for this URL, or None."""
+        key, _ = cache_key(url, params)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, expires_at FROM negative WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[1] <= time.time():
+                self._db.execute("DELETE FROM negative WHERE key = ?", (key,))
+                row = None
+        return row[0] if row else None
+
+    def store_negative(self, url, params, status, ttl=None):
+        key, full_url = cache_key(url, params)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO negative VALUES (?, ?, ?, ?)",
+                (key, full_url, status, time.time() + (NEGATIVE_TTL if ttl is None else ttl)),
+            )
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+_cache      = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Shared cache instance, or None when DASHBOARD_NO_CACHE is set."""
+    global _cache
+    if not ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(os.path.join(CACHE_DIR, "http.sqlite"))
+        return _cache
@@ -0,0 +1,212 @@
+"""
+instrument.py  –  Per-request and per-phase records for one refresh run.
+fetch_data records every get_json call (host, endpoint, status, latency,
+bytes, retries, cache outcome, time queued at the host gate and time slept
+in back-off) and times each pipeline node; generate_dashboard times the
+render steps.  write_report() turns the records into
+  - run-<timestamp>.json / latest.json: every request and phase plus
+    per-host and per-endpoint totals (endpoints sorted by time spent)
+  - dashboard.prom: the same totals in Prometheus text format, for a
+    node_exporter textfile collector
+in DASHBOARD_REPORT_DIR (default reports/ in http_cache.CACHE_DIR, outside
+the published tree).  Set DASHBOARD_NO_REPORT=1 to keep the records in
+memory only.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from http_cache import CACHE_DIR
+
+# ── Config ────────────────────────────────────────────────────────────────────
+REPORT_DIR = os.environ.get("DASHBOARD_REPORT_DIR") or os.path.join(CACHE_DIR, "reports")
+ENABLED      = os.environ.get("DASHBOARD_NO_REPORT", "") in ("", "0")
+KEEP_REPORTS = 30   # run-*.json files kept in REPORT_DIR
+
+# Cache outcomes a request record can carry:
+#   fresh       served from the response cache within its TTL
+#   offline     served from the cache because DASHBOARD_OFFLINE is set
+#   revalidated stale entry confirmed by a 304
+#   negative    URL answered 4xx recently (http_cache negative cache), not sent
+#   stale       request failed (or its host's circuit was open); last good
+#               cached copy served instead
+#   miss        no usable entry, downloaded
+#   coalesced   identical request already in flight; its result was shared
+#   disabled    response cache switched off
+
+_lock     = threading.Lock()
+_requests = []
+_phases   = []
+_started  = time.time()
+_t0       = time.perf_counter()
+
+
+def reset():
+    """Drops all records and restarts the run clock."""
+    global _started, _t0
+    with _lock:
+        _requests.clear()
+        _phases.clear()
+        _started = time.time()
+        _t0      = time.perf_counter()
+
+
+# ── Recording ─────────────────────────────────────────────────────────────────
+def record_request(url, status=None, latency=0.0, nbytes=0, retries=0,
+                   cache="miss", queued=0.0, slept=0.0, error=None):
+    parts = urlsplit(url)
+    rec   = {
+        "host":      parts.hostname or "",
+        "endpoint":  parts.path,
+        "status":    status,
+        "latency_s": round(latency, 6),
+        "bytes":     nbytes,
+        "retries":   retries,
+        "cache":     cache,
+        "queued_s":  round(queued, 6),
+        "slept_s":   round(slept, 6),
+        "error":     error,
+        "at_s":      round(time.perf_counter() - _t0, 6),
+    }
+    with _lock:
+        _requests.append(rec)
+
+
+@contextmanager
+def phase(name):
+    """Times the enclosed block as phase `name` (phases may nest/overlap)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        with _lock:
+            _phases.append({
+                "name":       name,
+                "start_s":    round(start - _t0, 6),
+                "duration_s": round(end - start, 6),
+                "thread":     threading.current_thread().name,
+            })
+
+
+# ── Summaries ─────────────────────────────────────────────────────────────────
+def _totals(records, key):
+    out = defaultdict(lambda: {
+        "requests": 0, "sent": 0, "errors": 0, "bytes": 0, "retries": 0,
+        "latency_s": 0.0, "queued_s": 0.0, "slept_s": 0.0, "cache": defaultdict(int),
+    })
+    for r in records:
+        t = out[key(r)]
+        t["requests"]  += 1
+        t["sent"]      += r["cache"] in ("miss", "revalidated", "disabled")
+        t["errors"]    += r["error"] is not None
+        t["bytes"]     += r["bytes"]
+        t["retries"]   += r["retries"]
+        t["latency_s"] += r["latency_s"]
+        t["queued_s"]  += r["queued_s"]
+        t["slept_s"]   += r["slept_s"]
+        t["cache"][r["cache"]] += 1
+    for t in out.values():
+        t["cache"] = dict(t["cache"])
+        for k in ("latency_s", "queued_s", "slept_s"):
+            t[k] = round(t[k], 6)
+    return dict(out)
+
+
+def summary():
+    """Snapshot of the run: records plus per-host / per-endpoint totals."""
+    with _lock:
+        requests_ = list(_requests)
+        phases    = sorted(_phases, key=lambda p: p["start_s"])
+    by_endpoint = _totals(requests_, lambda r: r["host"] + r["endpoint"])
+    return {
+        "started":     time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(_started)),
+        "duration_s":  round(time.perf_counter() - _t0, 6),
+        "phases":      phases,
+        "by_host":     _totals(requests_, lambda r: r["host"]),
+        "by_endpoint": dict(sorted(by_endpoint.items(), key=lambda kv: -kv[1]["latency_s"])),
+        "requests":    requests_,
+    }
+
+
+# ── Output ────────────────────────────────────────────────────────────────────
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(report):
+    lines = []
+
+    def metric(name, kind, help_, samples):
+        lines.append(f"# HELP {name} {help_}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            tags = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+            lines.append(f"{name}{{{tags}}} {value}" if tags else f"{name} {value}")
+
+    hosts = report["by_host"].items()
+    metric("dashboard_run_duration_seconds", "gauge", "Wall time of the last refresh.",
+           [({}, report["duration_s"])])
+    metric("dashboard_run_timestamp_seconds", "gauge", "Unix time the last refresh started.",
+           [({}, int(_started))])
+    metric("dashboard_phase_duration_seconds", "gauge", "Wall time of each phase in the last refresh.",
+           [({"phase": p["name"]}, p["duration_s"]) for p in report["phases"]])
+    metric("dashboard_http_requests", "gauge", "get_json calls per host and cache outcome.",
+           [({"host": h, "cache": c}, n) for h, t in hosts for c, n in sorted(t["cache"].items())])
+    metric("dashboard_http_errors", "gauge", "get_json calls that returned no data, per host.",
+           [({"host": h}, t["errors"]) for h, t in hosts])
+    metric("dashboard_http_retries", "gauge", "Retried attempts per host.",
+           [({"host": h}, t["retries"]) for h, t in hosts])
+    metric("dashboard_http_response_bytes", "gauge", "Response bytes downloaded per host.",
+           [({"host": h}, t["bytes"]) for h, t in hosts])
+    metric("dashboard_http_latency_seconds", "gauge", "Time spent waiting on responses per host.",
+           [({"host": h}, t["latency_s"]) for h, t in hosts])
+    metric("dashboard_http_queued_seconds", "gauge", "Time spent waiting for the host gate per host.",
+           [({"host": h}, t["queued_s"]) for h, t in hosts])
+    metric("dashboard_http_sleep_seconds", "gauge", "Back-off sleep before retries per host.",
+           [({"host": h}, t["slept_s"]) for h, t in hosts])
+    metric("dashboard_endpoint_latency_seconds", "gauge", "Time spent waiting on responses per endpoint.",
+           [({"endpoint": e}, t["latency_s"]) for e, t in report["by_endpoint"].items()])
+    return "\n".join(lines) + "\n"
+
+
+def _write(path, text):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_report(extra=None):
+    """Writes the JSON report and the Prometheus file; returns the JSON path
+    (None when reports are disabled)."""
+    if not ENABLED:
+        return None
+    report = summary()
+    report.update(extra or {})
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(_started))
+    path  = os.path.join(REPORT_DIR, f"run-{stamp}.json")
+    body  = json.dumps(report, indent=1)
+    _write(path, body)
+    _write(os.path.join(REPORT_DIR, "latest.json"), body)
+    _write(os.path.join(REPORT_DIR, "dashboard.prom"), prometheus_text(report))
+
+    old = sorted(f for f in os.listdir(REPORT_DIR) if f.startswith("run-") and f.endswith(".json"))
+    for name in old[:-KEEP_REPORTS]:
+        os.remove(os.path.join(REPORT_DIR, name))
+    return path
+
+
+def print_summary(top=5):
+    """Short console digest: slowest phases and endpoints."""
+    report = summary()
+    sent   = sum(t["sent"] for t in report["by_host"].values())
+    print(f"Run: {report['duration_s']:.1f}s, {len(report['requests'])} requests ({sent} sent)")
+    for name, t in list(report["by_endpoint"].items())[:top]:
+        print(f"  {t['latency_s']:7.2f}s  {t['requests']:>3}x  {name}")
@@ -0,0 +1,63 @@
+"""
+jsonstream.py  –  JSON codec and element-at-a-time parsing of large arrays.
+loads() / dumps() use orjson when it is installed (several times faster,
+and its decoder allocates less) and the stdlib json module otherwise.
+
+json.loads() on the /protocols response builds every protocol with all of
+its fields (descriptions, logos, per-chain TVL maps, token lists...) before
+the first one is looked at.  iter_array() walks the array with
+JSONDecoder.raw_decode instead, so only one element is alive at a time;
+callers (e.g. schemas.Schema.each) reduce each to the fields they need and
+can select top-k / aggregate in the same pass without ever holding the full
+document as Python objects.
+"""
+
+import re
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_decoder = json.JSONDecoder()
+_ws      = re.compile(r"[ \t\n\r]*")
+
+
+# ── Codec ─────────────────────────────────────────────────────────────────────
+def loads(body):
+    """Parsed JSON from str or UTF-8 bytes."""
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def dumps(obj):
+    """Compact JSON text; values JSON can't hold are written as str(value).
+    Without orjson the output is ASCII-escaped; with it, plain UTF-8 and
+    NaN / infinity become null."""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        ).decode("utf-8")
+    return json.dumps(obj, default=str, separators=(",", ":"))
+
+
+# ── Streaming ─────────────────────────────────────────────────────────────────
+def iter_array(body):
+    """Yields the elements of a JSON array given as str or UTF-8 bytes."""
+    text = body.decode("utf-8") if isinstance(body, (bytes, bytearray)) else body
+    pos  = _ws.match(text, 0).end()
+    if text[pos:pos + 1] != "[":
+        raise ValueError("expected a JSON array")
+    pos = _ws.match(text, pos + 1).end()
+    if text[pos:pos + 1] == "]":
+        return
+    while True:
+        item, pos = _decoder.raw_decode(text, pos)
+        yield item
+        pos = _ws.match(text, pos).end()
+        sep = text[pos:pos + 1]
+        if sep == "]":
+            return
+        if sep != ",":
+            raise ValueError(f"expected ',' or ']' at offset {pos}")
+        pos = _ws.match(text, pos + 1).end()
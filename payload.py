@@ -0,0 +1,219 @@
+"""
+payload.py  –  Compact encoding of the dashboard payload embedded in the HTML.
+Instead of writing every series as a JSON list of full-precision numbers and
+every axis as a list of 'YYYY-MM-DD' strings:
+  - a regular date axis becomes {"$days": [start_day, step, n]} (epoch days)
+    or {"$months": [start_month, step, n]} (year * 12 + month - 1); an
+    irregular one (e.g. after LTTB downsampling) becomes {"$dayarr": base64}
+    of its epoch days as little-endian int32
+  - a numeric series becomes {"$f32": base64} or {"$f64": base64} of its
+    little-endian IEEE floats, with NaN standing in for None
+Everything else (KPIs, tables, short lists) is left as plain JSON.
+DECODER_JS turns the encoded payload back into arrays in the browser; value
+series come back as Float32Array / Float64Array views over the decoded bytes.
+
+split_payload / write_section_files cut the payload into one file per
+dashboard section (plus .gz and, when brotli is installed, .br copies for
+servers that serve precompressed files) so the page can fetch each section
+only when it is first opened.
+"""
+
+import os
+import re
+import sys
+import gzip
+import base64
+from array import array
+
+from jsonstream import dumps
+from timeseries import str_to_day
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Series shorter than this stay plain JSON — the wrapper would cost more.
+MIN_LENGTH = 8
+
+DEFAULT_DTYPE = "f32"
+
+# Per-series overrides: payload key → "f32" | "f64" | "json".  Keys inside
+# nested dicts (fe_eff) are matched by their own name.  Float32 keeps ~7
+# significant digits: enough for prices, percentages and correlations, but
+# dollar series in the 1e9-1e12 range are hovered with $,.0f and would be off
+# by thousands, so they stay Float64.  Zoom tiles (tiles.py) use the same keys.
+PRECISION = {
+    key: "f64" for key in (
+        "sc_usdt", "sc_usdc", "sc_others", "sc_total",
+        "corr_tether_mcap", "corr_usdc_mcap",
+        "tvl_eth", "tvl_sol", "tvl_bsc", "tvl_btc", "tvl_tron", "tvl_base", "tvl_arb",
+        "tvl_other", "tvl_total", "total_tvl_vals",
+        "fee_eth", "fee_sol", "fee_bsc", "fee_btc", "fee_tron", "fee_base", "fee_total",
+        "tvm_usdt", "tvm_usdc", "tvm_total",
+        "tvd_usdt", "tvd_usdc", "tvd_total", "tvd_total_7d",
+    )
+}
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_NAN     = float("nan")
+
+
+# ── Axes ──────────────────────────────────────────────────────────────────────
+def _is_date_list(vals):
+    return len(vals) >= 2 and all(isinstance(v, str) and _DATE_RE.match(v) for v in vals)
+
+
+def _regular(nums):
+    """(start, step, n) if `nums` is an arithmetic progression, else None."""
+    step = nums[1] - nums[0]
+    if step == 0:
+        return None
+    for a, b in zip(nums, nums[1:]):
+        if b - a != step:
+            return None
+    return [nums[0], step, len(nums)]
+
+
+def encode_axis(dates):
+    """Encoded form of a date axis: start/step when it has a regular step,
+    otherwise the packed list of epoch days."""
+    if all(d.endswith("-01") for d in dates):
+        spec = _regular([int(d[:4]) * 12 + int(d[5:7]) - 1 for d in dates])
+        if spec:
+            return {"$months": spec}
+    days = [str_to_day(d) for d in dates]
+    spec = _regular(days)
+    if spec:
+        return {"$days": spec}
+    arr = array("i", days)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return {"$dayarr": base64.b64encode(arr.tobytes()).decode("ascii")}
+
+
+# ── Series ────────────────────────────────────────────────────────────────────
+def _is_numeric_list(vals):
+    seen = False
+    for v in vals:
+        if v is None:
+            continue
+        if isinstance(v, bool) or not isinstance(v, (int, float)):
+            return False
+        seen = True
+    return seen
+
+
+def encode_series(vals, dtype=DEFAULT_DTYPE):
+    arr = array("f" if dtype == "f32" else "d", (_NAN if v is None else v for v in vals))
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return {"$" + dtype: base64.b64encode(arr.tobytes()).decode("ascii")}
+
+
+def _encode(key, value, precision):
+    if isinstance(value, dict):
+        return {k: _encode(k, v, precision) for k, v in value.items()}
+    if not isinstance(value, list) or len(value) < MIN_LENGTH:
+        return value
+    dtype = precision.get(key, DEFAULT_DTYPE)
+    if dtype == "json":
+        return value
+    if _is_date_list(value):
+        return encode_axis(value)
+    if _is_numeric_list(value):
+        return encode_series(value, dtype)
+    return value
+
+
+def encode_payload(data, precision=None):
+    """Returns a JSON-ready copy of `data` with axes and series encoded."""
+    table = dict(PRECISION)
+    table.update(precision or {})
+    return {k: _encode(k, v, table) for k, v in data.items()}
+
+
+# ── Section files ─────────────────────────────────────────────────────────────
+# (file name, payload keys or key prefixes) — keys matching none stay inline.
+SECTIONS = [
+    ("stablecoins",  ("sc_", "stablecoin_overview", "peg_mech", "aa_")),
+    ("tvl",          ("tvl_", "total_tvl_")),
+    ("fees",         ("fee_",)),
+    ("volume",       ("tvm_", "tvd_")),
+    ("correlations", ("corr_", "eth_price", "btc_price", "fe_months", "fe_eff")),
+    ("protocols",    ("top_protocols", "cat_tvl")),
+]
+
+
+def section_of(key):
+    for name, prefixes in SECTIONS:
+        if key.startswith(prefixes):
+            return name
+    return None
+
+
+def split_payload(payload):
+    """Returns (inline, {section: part}) — KPIs and flags stay inline."""
+    inline = {}
+    parts  = {name: {} for name, _ in SECTIONS}
+    for key, value in payload.items():
+        name = section_of(key)
+        (parts[name] if name else inline)[key] = value
+    return inline, parts
+
+
+def write_section_files(parts, out_dir, url_prefix):
+    """Writes <section>.json (+ .gz / .br) into out_dir; returns {section: url}."""
+    os.makedirs(out_dir, exist_ok=True)
+    urls = {}
+    for name, part in parts.items():
+        body = dumps(part).encode("utf-8")
+        path = os.path.join(out_dir, f"{name}.json")
+        with open(path, "wb") as f:
+            f.write(body)
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip.compress(body, 9, mtime=0))
+        if brotli is not None:
+            with open(path + ".br", "wb") as f:
+                f.write(brotli.compress(body))
+        elif os.path.exists(path + ".br"):
+            os.remove(path + ".br")   # would be stale
+        urls[name] = f"{url_prefix}/{name}.json"
+    return urls
+
+
+# ── Browser side ──────────────────────────────────────────────────────────────
+DECODER_JS = r"""
+function decodePayload(node) {
+  if (Array.isArray(node) || node === null || typeof node !== 'object') return node;
+  if (node.$f32 !== undefined || node.$f64 !== undefined) {
+    var bin = atob(node.$f32 !== undefined ? node.$f32 : node.$f64);
+    var bytes = new Uint8Array(bin.length);
+    for (var i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+    return node.$f32 !== undefined ? new Float32Array(bytes.buffer) : new Float64Array(bytes.buffer);
+  }
+  if (node.$dayarr !== undefined) {
+    var raw = atob(node.$dayarr), buf = new Uint8Array(raw.length);
+    for (var r = 0; r < raw.length; r++) buf[r] = raw.charCodeAt(r);
+    return Array.from(new Int32Array(buf.buffer), function(d) {
+      return new Date(d * 86400000).toISOString().slice(0, 10);
+    });
+  }
+  if (node.$days) {
+    var d0 = node.$days[0], ds = node.$days[1], dn = node.$days[2], days = new Array(dn);
+    for (var j = 0; j < dn; j++) days[j] = new Date((d0 + j * ds) * 86400000).toISOString().slice(0, 10);
+    return days;
+  }
+  if (node.$months) {
+    var m0 = node.$months[0], ms = node.$months[1], mn = node.$months[2], months = new Array(mn);
+    for (var k = 0; k < mn; k++) {
+      var m = m0 + k * ms, mm = m % 12 + 1;
+      months[k] = Math.floor(m / 12) + '-' + (mm < 10 ? '0' : '') + mm + '-01';
+    }
+    return months;
+  }
+  var out = {};
+  for (var key in node) out[key] = decodePayload(node[key]);
+  return out;
+}
+"""
@@ -0,0 +1,321 @@
+"""
+protocol_history.py  –  Shared fetcher for DefiLlama per-protocol TVL histories.
+Used by the TVL-by-name / TVL-by-category scripts in Py scripts/.  Requests
+go through fetch_data.get_json, so they share its pooled session, response
+cache, per-host throttling and retries, and run FETCH_WORKERS at a time
+instead of one by one with a fixed sleep.
+
+Each protocol's history is kept in the history store (source "protocol",
+series = slug).  /protocol/<slug> has no "since" parameter, so a history
+is downloaded in full and replaces the stored one.  That happens when the
+store doesn't reach today yet and the last download is older than
+HISTORY_TTL; otherwise the stored copy is used as is.  Every point is
+the endpoint's daily totalLiquidityUSD - the intraday `tvl` of /protocols
+is never spliced in.
+
+Run as a script it crawls every protocol DefiLlama lists.  The slugs go into
+a work queue (crawl.sqlite in CACHE_DIR) with a status per slug, written as
+each one completes, so a crawl stopped by a crash or Ctrl-C resumes where it
+left off and slugs crawled within --max-age-hours are skipped.  A slug that
+has failed CRAWL_MAX_ATTEMPTS times is given up on until --retry-failed:
+  python protocol_history.py [--max-age-hours 24] [--limit N] [--workers N] [--retry-failed]
+  python protocol_history.py --status
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from urllib.parse import quote
+
+import history_store
+import http_cache
+import instrument
+import schemas
+from fetch_data import FETCH_WORKERS, cached_json, get_json, node, save_throttle_state
+from jsonstream import iter_array
+from timeseries import TimeSeriesFrame, ts_to_day
+
+# ── Config ────────────────────────────────────────────────────────────────────
+PROTOCOLS_URL = "https://api.llama.fi/protocols"
+PROTOCOL_URL  = "https://api.llama.fi/protocol/{slug}"
+SOURCE        = "protocol"      # history_store source name
+CRAWL_DB      = os.path.join(http_cache.CACHE_DIR, "crawl.sqlite")
+CRAWL_MAX_AGE = 24 * 3600       # a slug crawled more recently is skipped
+HISTORY_TTL   = 3 * 3600        # a history downloaded more recently isn't re-downloaded
+CRAWL_MAX_ATTEMPTS = 5         # failures before a slug is given up on
+
+
+def parse_protocol_list(body):
+    """Every /protocols entry reduced to its schemas.PROTOCOL fields,
+    decoded one element at a time (see jsonstream)."""
+    return list(schemas.PROTOCOL.each(iter_array(body)))
+
+
+def fetch_protocol_list():
+    """[{name, slug, category, chain, tvl, change_1d, change_7d}] for every protocol."""
+    print("  Fetching protocol list...")
+    return get_json(PROTOCOLS_URL, parse=parse_protocol_list) or []
+
+
+# Shared by the TVL scripts' pipeline nodes (see run_scripts.py)
+node("protocol_list", plan=lambda: [(PROTOCOLS_URL, None, "")])(fetch_protocol_list)
+
+
+def _download(slug):
+    raw = get_json(PROTOCOL_URL.format(slug=quote(slug)), parse=schemas.PROTOCOL_HISTORY, timeout=20)
+    return TimeSeriesFrame.from_points(
+        ((p["date"], p["totalLiquidityUSD"]) for p in raw["tvl"] if p["totalLiquidityUSD"] is not None)
+        if raw else [], "tvl"
+    )
+
+
+def _stored(store, slug, today):
+    """Whether the stored history of slug can be used without a download."""
+    last    = store.last_day(SOURCE, slug) if store else None
+    fetched = store.fetched_at(SOURCE, slug) if store else None
+    return last is not None and (last >= today or (fetched or 0) > time.time() - HISTORY_TTL)
+
+
+def plan_histories(select, note=""):
+    """Plan entries (see fetch_data.node) for the /protocol/<slug> requests
+    fetch_history would send for select(protocol list): one per protocol not
+    served from the store, or a per-item template until /protocols is cached."""
+    protocols = cached_json(PROTOCOLS_URL, parse=parse_protocol_list)
+    if protocols is None:
+        return [(PROTOCOL_URL, None, f"{note}, once /protocols is known" if note else "")]
+    store = history_store.get_store()
+    today = ts_to_day(time.time())
+    return [
+        (PROTOCOL_URL.format(slug=quote(p["slug"])), None, p["name"] or "")
+        for p in select(protocols) if p["slug"] and not _stored(store, p["slug"], today)
+    ]
+
+
+def fetch_history(protocol, today=None):
+    """(frame, downloaded) for one /protocols entry: its TVL history as a
+    'tvl' frame, oldest first, and whether /protocol/<slug> was requested.
+    A failed download falls back to the stored copy."""
+    slug  = protocol["slug"]
+    store = history_store.get_store()
+    today = ts_to_day(time.time()) if today is None else today
+
+    if _stored(store, slug, today):
+        return store.load(SOURCE, slug, name="tvl"), False
+
+    frame = _download(slug)
+    if not store:
+        return frame, True
+    if len(frame):
+        store.replace(SOURCE, slug, frame, "tvl")
+    return store.load(SOURCE, slug, name="tvl"), True
+
+
+def iter_histories(protocols, workers=None):
+    """Yields (protocol, 'tvl' frame) for several /protocols entries (ones
+    without a slug are skipped) in the order they arrive.  At most
+    2 × workers histories are fetched ahead of the consumer, so folding
+    each into an aggregate (timeseries.DailyGroupSum) as it comes keeps
+    memory independent of how many protocols there are.  A protocol whose
+    fetch raises is logged and left out."""
+    protocols = [p for p in protocols if p["slug"]]
+    today     = ts_to_day(time.time())
+    workers   = max(workers or FETCH_WORKERS, 1)
+    queued    = iter(protocols)
+    downloads = 0
+    failed    = 0
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        running = {}
+        while True:
+            for p in islice(queued, 2 * workers - len(running)):
+                running[ex.submit(fetch_history, p, today)] = p
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                p = running.pop(fut)
+                try:
+                    frame, downloaded = fut.result()
+                except Exception as exc:
+                    print(f"  WARN: skipping {p['name']} ({p['slug']}): {exc}")
+                    failed += 1
+                    continue
+                downloads += downloaded
+                yield p, frame
+    print(f"  Protocol histories: {len(protocols)} protocols, "
+          f"{len(protocols) - downloads - failed} from the history store, {downloads} downloaded"
+          + (f", {failed} failed" if failed else ""))
+
+
+def fetch_histories(protocols, workers=None):
+    """{slug: 'tvl' frame} for several /protocols entries, fetched concurrently."""
+    return {p["slug"]: frame for p, frame in iter_histories(protocols, workers)}
+
+
+# ── Full-universe crawl ───────────────────────────────────────────────────────
+class CrawlQueue:
+    """Durable slug work queue: one row per slug with its status
+    (pending / done / failed), attempts, last error and completion time.
+    Every update is committed on its own, so progress survives a crash."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS queue (
+                   slug     TEXT PRIMARY KEY,
+                   name     TEXT,
+                   tvl      REAL,
+                   status   TEXT    NOT NULL DEFAULT 'pending',
+                   attempts INTEGER NOT NULL DEFAULT 0,
+                   error    TEXT,
+                   done_at  REAL,
+                   points   INTEGER
+               )"""
+        )
+
+    def enqueue(self, protocols, max_age):
+        """Adds new slugs and re-queues ones last crawled more than max_age
+        seconds ago; name and tvl are refreshed for all of them."""
+        stale_before = time.time() - max_age
+        self._db.execute("BEGIN")
+        self._db.executemany(
+            """INSERT INTO queue (slug, name, tvl) VALUES (?, ?, ?)
+               ON CONFLICT (slug) DO UPDATE SET
+                   name   = excluded.name,
+                   tvl    = excluded.tvl,
+                   status = CASE WHEN status = 'done' AND done_at < ? THEN 'pending' ELSE status END""",
+            [(p["slug"], p["name"], p["tvl"], stale_before) for p in protocols if p["slug"]],
+        )
+        self._db.execute("COMMIT")
+
+    def todo(self, limit=None, max_attempts=CRAWL_MAX_ATTEMPTS):
+        """Pending slugs and ones that failed fewer than max_attempts times,
+        as /protocols-like entries, largest TVL first."""
+        rows = self._db.execute(
+            "SELECT slug, name, tvl FROM queue"
+            " WHERE status = 'pending' OR (status = 'failed' AND attempts < ?)"
+            " ORDER BY tvl IS NULL, tvl DESC, slug LIMIT ?",
+            (max_attempts, -1 if limit is None else limit),
+        ).fetchall()
+        return [{"slug": slug, "name": name, "tvl": tvl} for slug, name, tvl in rows]
+
+    def mark_done(self, slug, points):
+        self._db.execute(
+            "UPDATE queue SET status = 'done', attempts = 0, error = NULL, done_at = ?, points = ?"
+            " WHERE slug = ?",
+            (time.time(), points, slug),
+        )
+
+    def mark_failed(self, slug, error):
+        self._db.execute(
+            "UPDATE queue SET status = 'failed', attempts = attempts + 1, error = ? WHERE slug = ?",
+            (str(error), slug),
+        )
+
+    def retry_failed(self):
+        """Gives every failed slug a fresh set of attempts."""
+        self._db.execute("UPDATE queue SET attempts = 0 WHERE status = 'failed'")
+
+    def counts(self, max_attempts=CRAWL_MAX_ATTEMPTS):
+        """{status: slugs}; failed slugs out of attempts count as 'given_up'."""
+        return dict(self._db.execute(
+            "SELECT CASE WHEN status = 'failed' AND attempts >= ? THEN 'given_up' ELSE status END AS s,"
+            " COUNT(*) FROM queue GROUP BY s",
+            (max_attempts,),
+        ).fetchall())
+
+
+def crawl(max_age=CRAWL_MAX_AGE, limit=None, workers=None, retry_failed=False):
+    """Fetches the history of every protocol not crawled within max_age
+    seconds; returns the queue's status counts.  Like iter_histories, at
+    most 2 × workers slugs are queued at a time.  On Ctrl-C no further slug
+    is started, but fetches already running (at most `workers`) finish
+    before the process exits."""
+    queue = CrawlQueue(CRAWL_DB)
+    if retry_failed:
+        queue.retry_failed()
+    protocols = fetch_protocol_list()
+    if protocols:
+        queue.enqueue(protocols, max_age)
+    todo  = queue.todo(limit)
+    today = ts_to_day(time.time())
+    print(f"Crawling {len(todo)} protocols ({queue.counts().get('done', 0)} already done)...")
+
+    workers = max(workers or FETCH_WORKERS, 1)
+    stop    = threading.Event()
+    queued  = iter(todo)
+    running = {}
+    n       = 0
+
+    def crawl_one(p):
+        return None if stop.is_set() else fetch_history(p, today)
+
+    ex = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            for p in islice(queued, 2 * workers - len(running)):
+                running[ex.submit(crawl_one, p)] = p
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                slug = running.pop(fut)["slug"]
+                n += 1
+                try:
+                    frame, _ = fut.result()
+                except Exception as exc:
+                    queue.mark_failed(slug, exc)
+                else:
+                    if len(frame):
+                        queue.mark_done(slug, len(frame))
+                    else:
+                        queue.mark_failed(slug, "no history returned")
+                if n % 100 == 0 or n == len(todo):
+                    print(f"  {n}/{len(todo)}")
+    except KeyboardInterrupt:
+        stop.set()
+        print("Interrupted - progress is saved, run again to resume "
+              "(waiting for the requests in flight).")
+        raise
+    finally:
+        ex.shutdown(cancel_futures=True)
+        save_throttle_state()
+    return queue.counts()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Crawl the TVL history of every DefiLlama protocol (resumable).")
+    p.add_argument("--max-age-hours", type=float, default=CRAWL_MAX_AGE / 3600,
+                   help="re-crawl slugs last crawled longer ago than this")
+    p.add_argument("--limit",   type=int, default=None, help="crawl at most this many slugs this run")
+    p.add_argument("--workers", type=int, default=None, help="concurrent requests (default FETCH_WORKERS)")
+    p.add_argument("--retry-failed", action="store_true",
+                   help=f"retry slugs given up on after {CRAWL_MAX_ATTEMPTS} failed attempts")
+    p.add_argument("--status",  action="store_true", help="print the queue's status counts and exit")
+    opts = p.parse_args(argv)
+
+    if not history_store.ENABLED:
+        print("DASHBOARD_NO_HISTORY is set - nowhere to keep the crawled histories.")
+        return 2
+    if opts.status:
+        print(CrawlQueue(CRAWL_DB).counts())
+        return 0
+    try:
+        counts = crawl(opts.max_age_hours * 3600, opts.limit, opts.workers, opts.retry_failed)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        instrument.print_summary()
+        instrument.write_report({"argv": sys.argv[1:]})
+    print(f"Queue: {counts}")
+    return 1 if counts.get("failed") or counts.get("given_up") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,508 @@
+"""
+replay_server.py  –  Local stand-in for every API fetch_data.py talks to.
+Serves http://127.0.0.1:PORT/<host>/<path>?<query>; point the fetch layer at
+it with DASHBOARD_API_BASE=http://127.0.0.1:PORT.  A request is answered from
+the first of:
+  - a recorded fixture for the same host + path + query
+  - a recorded fixture for the same host + path with another paging window
+  - a deterministic synthetic response shaped like the real API
+--record proxies misses to the live API and saves what comes back, so one
+online run produces a fixture set that can be replayed on an isolated
+machine.  Request headers (the Dune API key) are never written to disk.
+No recorded fixtures are committed: until a set is recorded into fixtures/
+(or passed with --fixtures), every answer is synthetic, and the server says
+so when it starts.  Record one with the server running with --record and
+  DASHBOARD_API_BASE=http://127.0.0.1:8765 python generate_dashboard.py
+
+For benchmarking the server can also
+  - add per-host latency and cap per-host bandwidth
+  - answer a share of requests with 429 (+ Retry-After) or 5xx
+  - scale payloads: histories grow back in time and list endpoints
+    (/protocols, /stablecoins) get cloned entries, by --scale times
+Faults are drawn from a seeded RNG, so two runs see the same sequence.
+
+Usage:
+  python replay_server.py [--port 8765] [--fixtures fixtures] [--record]
+      [--latency api.llama.fi=0.2,default=0.05] [--bandwidth default=2000]
+      [--rate-429 0.05] [--rate-5xx 0.02] [--scale 4] [--seed 1]
+      [--today 2026-10-17] [--verbose]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import signal
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from timeseries import DAY_SECONDS, str_to_day
+
+# ── Config ────────────────────────────────────────────────────────────────────
+DEFAULT_PORT     = 8765
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Request headers passed through to the live API in --record mode.
+FORWARD_HEADERS = ("Accept", "X-Dune-Api-Key")
+
+# Endpoints whose list entries are cloned by --scale: host + path → key of
+# the list in the response ("" when the response is the list itself).
+CLONE_PATHS = {
+    "api.llama.fi/protocols":           "",
+    "stablecoins.llama.fi/stablecoins": "peggedAssets",
+}
+
+# Paging / window parameters left out of the path-only fixture key, so a
+# recording made with other values still answers (and is windowed again).
+WINDOW_PARAMS = ("startTime", "endTime", "limit", "days")
+
+CHUNK = 16 * 1024   # bytes per write when bandwidth is capped
+
+
+def per_host(spec, cast=float):
+    """'host=value,default=value' (or a bare value) → {host: value}."""
+    out = {}
+    for item in filter(None, (spec or "").split(",")):
+        host, _, value = item.rpartition("=")
+        out[host or "default"] = cast(value)
+    return out
+
+
+def _for_host(table, host, fallback=0.0):
+    return table.get(host, table.get("default", fallback))
+
+
+# ── Fixtures ──────────────────────────────────────────────────────────────────
+class FixtureStore:
+    """One JSON file per recorded response under <root>/<host>/:
+    q-<hash>.json keyed by path + sorted query, p-<hash>.json by path + query
+    without WINDOW_PARAMS (the latest such recording, used when only the
+    window differs)."""
+
+    def __init__(self, root):
+        self.root = root
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+    def _paths(self, host, path, query):
+        folder = os.path.join(self.root, host)
+        exact  = path + "?" + urlencode(sorted(query))
+        loose  = path + "?" + urlencode(sorted(kv for kv in query if kv[0] not in WINDOW_PARAMS))
+        return (os.path.join(folder, f"q-{self._hash(exact)}.json"),
+                os.path.join(folder, f"p-{self._hash(loose)}.json"))
+
+    def get(self, host, path, query):
+        for fn in self._paths(host, path, query):
+            if os.path.exists(fn):
+                with open(fn, encoding="utf-8") as f:
+                    return json.load(f)
+        return None
+
+    def put(self, host, path, query, status, content_type, body):
+        entry = {
+            "url":          f"https://{host}{path}" + (f"?{urlencode(sorted(query))}" if query else ""),
+            "status":       status,
+            "content_type": content_type,
+            "body":         body,
+        }
+        os.makedirs(os.path.join(self.root, host), exist_ok=True)
+        for fn in self._paths(host, path, query):
+            tmp = fn + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, fn)
+
+
+# ── Synthetic upstream ────────────────────────────────────────────────────────
+CHAIN_NAMES = [
+    "Ethereum", "Solana", "BSC", "Bitcoin", "Tron", "Base", "Arbitrum",
+    "Hyperliquid L1", "Plasma", "Provenance", "Polygon", "Avalanche", "Sui",
+]
+CHAIN_START = {"base": "2023-08-01", "hyperliquid-l1": "2025-01-01", "plasma": "2025-09-25"}
+KLINE_START = {"ETH": "2017-08-17", "BTC": "2017-08-17", "SOL": "2020-08-11",
+               "BNB": "2017-11-06", "TRX": "2018-06-11"}
+CATEGORIES  = ["Dexs", "Lending", "CDP", "RWA", "Bridge", "Liquid Staking",
+               "Yield", "RWA Lending", "OTC Marketplace"]
+PEG_TYPES   = ["fiat-backed", "crypto-backed", "algorithmic"]
+
+
+def _seed(text):
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _wave(seed, ts, base, amp=0.3):
+    """Smooth seasonal level with a little day-to-day noise."""
+    day = ts // DAY_SECONDS
+    r   = random.Random(seed * 1_000_003 + day)
+    return base * (1 + amp * math.sin(day / 90.0 + seed % 7)) * (1 + 0.05 * r.random())
+
+
+class Synthetic:
+    """Deterministic responses for the endpoints fetch_data uses.  `scale`
+    stretches every history back in time and multiplies list lengths."""
+
+    def __init__(self, today, scale=1.0):
+        self.today = today
+        self.scale = scale
+
+    def _days(self, start):
+        first = self.today - int((self.today - str_to_day(start)) * self.scale)
+        return [d * DAY_SECONDS for d in range(first, self.today + 1)]
+
+    def respond(self, host, path, query):
+        """(status, body) — body is JSON-serialisable."""
+        q = dict(query)
+        if host == "stablecoins.llama.fi":
+            if path == "/stablecoins":
+                return 200, {"peggedAssets": self._pegged_assets()}
+            if path == "/stablecoincharts/all":
+                return 200, [{"date": str(t), "totalCirculatingUSD": {"peggedUSD": _wave(1, t, 2e11)}}
+                             for t in self._days("2017-11-29")]
+            if path.startswith("/stablecoin/"):
+                sid = int(path.rsplit("/", 1)[1])
+                return 200, {"name": f"Stable{sid}", "tokens": [
+                    {"date": t, "circulating": {"peggedUSD": _wave(sid + 1, t, 1e11 / sid)}}
+                    for t in self._days("2018-01-01")
+                ], "chainBalances": {chain: {"tokens": [
+                    {"date": t, "circulating": {"peggedUSD": _wave(_seed(chain) + sid, t, 3e10 / sid)}}
+                    for t in self._days("2023-01-01")
+                ]} for chain in CHAIN_NAMES[:4]}}
+        if host == "api.llama.fi":
+            if path == "/v2/chains":
+                return 200, [{"name": n, "tvl": 1e11 / (i + 1) ** 1.5, "gecko_id": n.lower()}
+                             for i, n in enumerate(CHAIN_NAMES)]
+            if path.startswith("/v2/historicalChainTvl"):
+                slug = path[len("/v2/historicalChainTvl"):].strip("/").lower()
+                return 200, [{"date": t, "tvl": _wave(_seed(slug or "total"), t, 5e10)}
+                             for t in self._days(CHAIN_START.get(slug, "2018-01-01"))]
+            if path.startswith("/overview/fees"):
+                chain = path[len("/overview/fees"):].strip("/").lower()
+                return 200, {"totalDataChart": [[t, _wave(_seed(chain or "all"), t, 3e6)]
+                                                for t in self._days(CHAIN_START.get(chain, "2020-01-01"))]}
+            if path == "/protocols":
+                return 200, self._protocols()
+            if path.startswith("/protocol/"):
+                slug = path.split("/")[2]
+                rank = _seed(slug) % 1000
+                return 200, {"name": slug, "tvl": [
+                    {"date": t, "totalLiquidityUSD": _wave(_seed(slug), t, 1e9 / (rank + 1))}
+                    for t in self._days("2020-09-13")
+                ]}
+        if host == "api.binance.com" and path == "/api/v3/klines":
+            ticker = q.get("symbol", "ETHUSDT")[:-4]
+            seed   = _seed(ticker)
+            rows   = []
+            for t in self._days(KLINE_START.get(ticker, "2019-01-01")):
+                close = round(_wave(seed, t, 1000), 4)
+                rows.append([t * 1000, str(close), str(close), str(close), str(close), "1",
+                             (t + DAY_SECONDS) * 1000 - 1, "1", 1, "1", "1", "0"])
+            return 200, rows
+        if host == "api.coingecko.com" and "/market_chart" in path:
+            seed = _seed(path.split("/")[4])
+            pts  = [[t * 1000, _wave(seed, t, 5e10)] for t in self._days("2019-01-01")]
+            return 200, {"prices": pts, "market_caps": pts, "total_volumes": pts}
+        if host == "api.dune.com":
+            rows  = []
+            first = self.today - int(365 * self.scale)
+            for day in range(first, self.today + 1, 30):
+                month = time.strftime("%Y-%m-01", time.gmtime(day * DAY_SECONDS))
+                for coin in ("USDT", "USDC"):
+                    rows.append({"month": f"{month} 00:00:00.000 UTC", "day": f"{month} 00:00:00.000 UTC",
+                                 "stablecoin": coin,
+                                 "active_senders": int(_wave(_seed(coin), day * DAY_SECONDS, 4e5))})
+            return 200, {"result": {"rows": rows}}
+        return 404, {"message": f"no synthetic response for {host}{path}"}
+
+    def _pegged_assets(self):
+        out = []
+        for i in range(int(60 * self.scale)):
+            circ = 1e11 / (i + 1) ** 1.7
+            out.append({
+                "id": str(i + 1), "name": f"Stable{i}", "symbol": f"S{i}",
+                "pegMechanism":         PEG_TYPES[i % 3],
+                "circulating":          {"peggedUSD": circ},
+                "circulatingPrevDay":   {"peggedUSD": circ * 0.99},
+                "circulatingPrevWeek":  {"peggedUSD": circ * 0.97},
+                "circulatingPrevMonth": {"peggedUSD": circ * 0.9},
+                "price": 1.0 + i * 1e-4,
+            })
+        return out
+
+    def _protocols(self):
+        out = []
+        for i in range(int(3000 * self.scale)):
+            out.append({
+                "id": str(i), "name": f"Protocol {i}", "slug": f"protocol-{i}",
+                "category":  CATEGORIES[i % len(CATEGORIES)] if i % 50 else None,
+                "chain":     "Ethereum" if i % 2 else "Multi-Chain",
+                "chains":    ["Ethereum"],
+                "tvl":       1e10 / (i + 1) if i % 97 else None,
+                "change_1d": (i % 11) - 5.0,
+                "change_7d": (i % 13) - 6.0,
+                "chainTvls": {"Ethereum": 1e10 / (i + 1)},
+                "description": "Synthetic protocol " + "x" * 180,
+                "logo": f"https://icons.llama.fi/protocol-{i}.png",
+                "url":  f"https://protocol-{i}.example",
+            })
+        return out
+
+
+# ── Response shaping ──────────────────────────────────────────────────────────
+def _shift_row(row, delta):
+    """Row moved back by `delta` (same unit as its timestamps)."""
+    if isinstance(row, dict):
+        row  = dict(row)
+        date = row["date"]
+        row["date"] = str(int(date) - delta) if isinstance(date, str) else date - delta
+        return row
+    row = list(row)
+    row[0] -= delta
+    if len(row) >= 7 and isinstance(row[6], int):   # kline close time
+        row[6] -= delta
+    return row
+
+
+def _row_ts(row):
+    if isinstance(row, dict):
+        return int(row["date"])
+    return row[0]
+
+
+def _is_series(items):
+    if len(items) < 2:
+        return False
+    head = items[0]
+    if isinstance(head, dict):
+        return "date" in head and str(head["date"]).isdigit()
+    return isinstance(head, list) and head and isinstance(head[0], int) and not isinstance(head[0], bool)
+
+
+def scale_body(body, factor, clone=None):
+    """Copy of `body` with every time series extended back in time to
+    `factor` × its span (older copies of the recorded rows, shifted), and
+    the list under key `clone` ("" = body itself) repeated `factor` times."""
+    copies = max(1, math.ceil(factor))
+    if isinstance(body, dict):
+        return {k: scale_body(v, factor, "" if k == clone else None) for k, v in body.items()}
+    if not isinstance(body, list) or copies == 1:
+        return body
+    if clone == "":
+        out = list(body)
+        for k in range(1, copies):
+            for item in body:
+                if isinstance(item, dict) and "name" in item:
+                    item = dict(item, name=f"{item['name']} #{k}")
+                    for key in ("id", "slug"):
+                        if item.get(key):
+                            item[key] = f"{item[key]}-{k}"
+                out.append(item)
+        return out[:int(len(body) * factor)]
+    if _is_series(body):
+        ordered = body if _row_ts(body[0]) <= _row_ts(body[-1]) else body[::-1]
+        span    = _row_ts(ordered[-1]) - _row_ts(ordered[0])
+        step    = span // (len(ordered) - 1) or 1
+        older   = []
+        for k in range(copies - 1, 0, -1):
+            older.extend(_shift_row(r, k * (span + step)) for r in ordered)
+        keep = int(len(ordered) * factor)
+        out  = (older + list(ordered))[-keep:]
+        return out if ordered is body else out[::-1]
+    return [scale_body(v, factor) for v in body]
+
+
+def window_klines(rows, query):
+    """Binance paging: startTime / endTime / limit applied to kline rows."""
+    q     = dict(query)
+    limit = int(q.get("limit", 500))
+    if "startTime" in q:
+        start = int(q["startTime"])
+        return [r for r in rows if r[0] >= start][:limit]
+    end = int(q.get("endTime", 2 ** 62))
+    sel = [r for r in rows if r[0] <= end]
+    return sel[-limit:]
+
+
+def window_days(body, query):
+    """CoinGecko market_chart: keep the last `days` days of each series."""
+    q = dict(query)
+    if "days" not in q or q["days"] == "max" or not isinstance(body, dict):
+        return body
+    out = {}
+    for key, pts in body.items():
+        if isinstance(pts, list) and pts:
+            cutoff   = pts[-1][0] - int(float(q["days"])) * DAY_SECONDS * 1000
+            out[key] = [p for p in pts if p[0] >= cutoff]
+        else:
+            out[key] = pts
+    return out
+
+
+# ── Server ────────────────────────────────────────────────────────────────────
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, opts):
+        super().__init__(addr, ReplayHandler)
+        self.opts      = opts
+        self.fixtures  = FixtureStore(opts.fixtures)
+        self.synthetic = Synthetic(opts.today, opts.scale)
+        self.latency   = per_host(opts.latency)
+        self.bandwidth = {h: kb * 1024 for h, kb in per_host(opts.bandwidth).items()}
+        self.rng       = random.Random(opts.seed)
+        self.lock      = threading.Lock()
+        self.stats     = Counter()
+
+    def roll(self):
+        with self.lock:
+            return self.rng.random()
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def load(self, host, path, query, headers):
+        """(status, content type, body bytes, source) for one request."""
+        entry = self.fixtures.get(host, path, query)
+        if entry is None and self.opts.record:
+            entry = self._record(host, path, query, headers)
+        if entry is not None:
+            source = "fixture"
+            status, ctype = entry["status"], entry["content_type"]
+            if "json" not in ctype:
+                return status, ctype, entry["body"].encode("utf-8"), source
+            body = json.loads(entry["body"])
+        else:
+            source = "synthetic"
+            ctype  = "application/json"
+            status, body = self.synthetic.respond(host, path, query)
+            if status != 200:
+                return status, ctype, json.dumps(body).encode("utf-8"), source
+
+        if source == "fixture" and self.opts.scale != 1:
+            body = scale_body(body, self.opts.scale, CLONE_PATHS.get(host + path))
+        if host == "api.binance.com" and isinstance(body, list):
+            body = window_klines(body, query)
+        if host == "api.coingecko.com":
+            body = window_days(body, query)
+        return status, ctype, json.dumps(body, separators=(",", ":")).encode("utf-8"), source
+
+    def _record(self, host, path, query, headers):
+        import requests
+
+        fwd = {k: headers[k] for k in FORWARD_HEADERS if headers.get(k)}
+        try:
+            r = requests.get(f"https://{host}{path}", params=query, headers=fwd, timeout=60)
+        except requests.RequestException as exc:
+            print(f"  WARN: record failed {host}{path}: {exc}")
+            return None
+        ctype = r.headers.get("Content-Type", "application/json").split(";")[0]
+        if r.status_code >= 500 or r.status_code == 429:
+            return {"status": r.status_code, "content_type": ctype, "body": r.text}
+        self.fixtures.put(host, path, query, r.status_code, ctype, r.text)
+        print(f"  recorded {host}{path} ({r.status_code}, {len(r.content):,} bytes)")
+        return {"status": r.status_code, "content_type": ctype, "body": r.text}
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        srv   = self.server
+        opts  = srv.opts
+        parts = urlsplit(self.path)
+        host, _, rest = parts.path.lstrip("/").partition("/")
+        path  = "/" + rest
+        query = parse_qsl(parts.query, keep_blank_values=True)
+
+        delay = _for_host(srv.latency, host)
+        if delay:
+            time.sleep(delay)
+
+        fault = srv.roll()
+        if fault < opts.rate_429:
+            srv.count((host, 429))
+            return self._send(429, "application/json", b'{"error":"rate limited"}',
+                              {"Retry-After": str(opts.retry_after)})
+        if fault < opts.rate_429 + opts.rate_5xx:
+            srv.count((host, 503))
+            return self._send(503, "application/json", b'{"error":"unavailable"}')
+
+        status, ctype, body, source = srv.load(host, path, query, self.headers)
+        srv.count((host, source))
+
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            return self._send(304, ctype, b"", {"ETag": etag})
+        self._send(status, ctype, body, {"ETag": etag} if status == 200 else None)
+
+    def _send(self, status, ctype, body, extra=None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (extra or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+
+        host = self.path.lstrip("/").partition("/")[0]
+        rate = _for_host(self.server.bandwidth, host)
+        if not rate:
+            self.wfile.write(body)
+            return
+        for i in range(0, len(body), CHUNK):
+            piece = body[i:i + CHUNK]
+            self.wfile.write(piece)
+            time.sleep(len(piece) / rate)
+
+    def log_message(self, fmt, *args):
+        if self.server.opts.verbose:
+            print("  " + fmt % args)
+
+
+def serve(opts):
+    srv = ReplayServer(("127.0.0.1", opts.port), opts)
+    print(f"Replaying on http://127.0.0.1:{srv.server_address[1]}  "
+          f"(fixtures: {opts.fixtures}{', recording' if opts.record else ''})")
+    if not opts.record and not (os.path.isdir(opts.fixtures) and os.listdir(opts.fixtures)):
+        print(f"  No recorded fixtures in {opts.fixtures} - every response is synthetic "
+              f"(record a set with --record)")
+    print(f"  export DASHBOARD_API_BASE=http://127.0.0.1:{srv.server_address[1]}", flush=True)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))   # benchmark runners stop it this way
+    try:
+        srv.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        srv.server_close()
+        for (host, what), n in sorted(srv.stats.items(), key=str):
+            print(f"  {host:<22} {what!s:<10} {n:>6}")
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Replay recorded API responses for fetch_data.py.")
+    p.add_argument("--port",        type=int,   default=DEFAULT_PORT)
+    p.add_argument("--fixtures",                default=DEFAULT_FIXTURES)
+    p.add_argument("--record",      action="store_true", help="proxy misses to the live APIs and save them")
+    p.add_argument("--latency",                 default="", help="seconds per host, e.g. api.llama.fi=0.2,default=0.05")
+    p.add_argument("--bandwidth",               default="", help="KB/s per host, e.g. default=2000")
+    p.add_argument("--rate-429",    type=float, default=0.0, help="share of requests answered 429")
+    p.add_argument("--rate-5xx",    type=float, default=0.0, help="share of requests answered 503")
+    p.add_argument("--retry-after", type=int,   default=1,   help="Retry-After seconds sent with 429")
+    p.add_argument("--scale",       type=float, default=1.0, help="payload size factor")
+    p.add_argument("--seed",        type=int,   default=1)
+    p.add_argument("--today",                   default=None, help="last day of synthetic histories (YYYY-MM-DD)")
+    p.add_argument("--verbose",     action="store_true")
+    opts = p.parse_args(argv)
+    opts.today = str_to_day(opts.today) if opts.today else int(time.time()) // DAY_SECONDS
+    return opts
+
+
+if __name__ == "__main__":
+    serve(parse_args(sys.argv[1:]))
@@ -0,0 +1,189 @@
+"""
+rolling.py  –  O(n) streaming window kernels for dashboard series.
+Every kernel is a small class with push(value) → current statistic, so a
+series can be processed once from oldest to newest and a new day appended
+later in O(1).  The function forms (rolling_mean, rolling_std, ...) run a
+kernel over a whole list.
+
+Series are plain lists with None for missing values, optionally paired with
+a validity mask (True = present).  With skip_zero=True zeros count as missing
+too, which is the rule rolling7 has always used.
+"""
+
+import math
+from collections import deque
+
+
+def _is_valid(v, ok, skip_zero):
+    if not ok or v is None or v != v:
+        return False
+    return not (skip_zero and v == 0)
+
+
+# ── Window kernels ────────────────────────────────────────────────────────────
+class RollingWindow:
+    """Count, sum and sum of squares over the last `window` positions.
+    Missing positions take a slot but add nothing.  Running sums are rebuilt
+    from the buffer once per window length to keep float drift bounded."""
+
+    def __init__(self, window, skip_zero=False):
+        self.window    = window
+        self.skip_zero = skip_zero
+        self._buf      = deque()
+        self._pushes   = 0
+        self.count     = 0
+        self.sum       = 0.0
+        self.sumsq     = 0.0
+
+    def push(self, value, ok=True):
+        if _is_valid(value, ok, self.skip_zero):
+            self._buf.append(value)
+            self.count += 1
+            self.sum   += value
+            self.sumsq += value * value
+        else:
+            self._buf.append(None)
+        rebuild = False
+        if len(self._buf) > self.window:
+            old = self._buf.popleft()
+            if old is not None:
+                self.count -= 1
+                self.sum   -= old
+                self.sumsq -= old * old
+                # Removing a value that dwarfs what is left would leave its
+                # rounding error behind; resum the (short) buffer instead.
+                rebuild = abs(old) > 1e3 * abs(self.sum)
+        self._pushes += 1
+        if self.count == 0:
+            self.sum = self.sumsq = 0.0
+        elif rebuild or self._pushes % self.window == 0:
+            live       = [v for v in self._buf if v is not None]
+            self.sum   = math.fsum(live)
+            self.sumsq = math.fsum(v * v for v in live)
+        return self
+
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def std(self, ddof=0):
+        if self.count <= ddof:
+            return None
+        mean = self.sum / self.count
+        var  = (self.sumsq - self.count * mean * mean) / (self.count - ddof)
+        return math.sqrt(max(var, 0.0))
+
+
+class RollingSum(RollingWindow):
+    def push(self, value, ok=True):
+        super().push(value, ok)
+        return self.sum if self.count else None
+
+
+class RollingMean(RollingWindow):
+    def push(self, value, ok=True):
+        return super().push(value, ok).mean()
+
+
+class RollingStd(RollingWindow):
+    def __init__(self, window, skip_zero=False, ddof=0):
+        super().__init__(window, skip_zero)
+        self.ddof = ddof
+
+    def push(self, value, ok=True):
+        return super().push(value, ok).std(self.ddof)
+
+
+class RollingZScore(RollingWindow):
+    """(value − window mean) / window std, with the current value in the window."""
+
+    def push(self, value, ok=True):
+        super().push(value, ok)
+        if not _is_valid(value, ok, self.skip_zero):
+            return None
+        std = self.std()
+        return (value - self.mean()) / std if std else None
+
+
+class RollingExtreme:
+    """Min or max over the last `window` positions via a monotonic deque."""
+
+    def __init__(self, window, skip_zero=False, use_max=False):
+        self.window    = window
+        self.skip_zero = skip_zero
+        self._better   = (lambda a, b: a >= b) if use_max else (lambda a, b: a <= b)
+        self._q        = deque()   # (position, value), values monotonic
+        self._pos      = 0
+
+    def push(self, value, ok=True):
+        if _is_valid(value, ok, self.skip_zero):
+            while self._q and self._better(value, self._q[-1][1]):
+                self._q.pop()
+            self._q.append((self._pos, value))
+        while self._q and self._q[0][0] <= self._pos - self.window:
+            self._q.popleft()
+        self._pos += 1
+        return self._q[0][1] if self._q else None
+
+
+class RollingMin(RollingExtreme):
+    def __init__(self, window, skip_zero=False):
+        super().__init__(window, skip_zero, use_max=False)
+
+
+class RollingMax(RollingExtreme):
+    def __init__(self, window, skip_zero=False):
+        super().__init__(window, skip_zero, use_max=True)
+
+
+class EMA:
+    """Exponential moving average with alpha = 2 / (span + 1).
+    Missing values carry the previous average forward."""
+
+    def __init__(self, span, skip_zero=False):
+        self.alpha     = 2.0 / (span + 1)
+        self.skip_zero = skip_zero
+        self.value     = None
+
+    def push(self, value, ok=True):
+        if _is_valid(value, ok, self.skip_zero):
+            if self.value is None:
+                self.value = value
+            else:
+                self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+# ── Whole-series forms ────────────────────────────────────────────────────────
+def run_kernel(kernel, values, mask=None):
+    """Pushes every value (oldest→newest) through `kernel`; returns the outputs."""
+    if mask is None:
+        return [kernel.push(v) for v in values]
+    return [kernel.push(v, ok) for v, ok in zip(values, mask)]
+
+
+def rolling_mean(values, window, mask=None, skip_zero=False):
+    return run_kernel(RollingMean(window, skip_zero), values, mask)
+
+
+def rolling_sum(values, window, mask=None, skip_zero=False):
+    return run_kernel(RollingSum(window, skip_zero), values, mask)
+
+
+def rolling_min(values, window, mask=None, skip_zero=False):
+    return run_kernel(RollingMin(window, skip_zero), values, mask)
+
+
+def rolling_max(values, window, mask=None, skip_zero=False):
+    return run_kernel(RollingMax(window, skip_zero), values, mask)
+
+
+def rolling_std(values, window, mask=None, skip_zero=False, ddof=0):
+    return run_kernel(RollingStd(window, skip_zero, ddof), values, mask)
+
+
+def rolling_zscore(values, window, mask=None, skip_zero=False):
+    return run_kernel(RollingZScore(window, skip_zero), values, mask)
+
+
+def ema(values, span, mask=None, skip_zero=False):
+    return run_kernel(EMA(span, skip_zero), values, mask)
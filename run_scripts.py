@@ -0,0 +1,124 @@
+"""
+run_scripts.py  –  Runs the ad-hoc analyses in Py scripts/ in one process.
+Each script registers itself with fetch_data.script(): a fetch step that is
+a node of the fetch_data pipeline (it may depend on shared nodes such as
+"chains", "prices", "volume" or "protocol_list") and an output step that
+writes its charts and tables.  The fetch steps of every selected script run
+as one pipeline, so they share the pooled session, response cache, per-host
+throttling and history store, and an endpoint several scripts read is
+requested once.  Outputs then run one script at a time and go to
+DASHBOARD_OUTPUT_DIR (default output/ next to this file).  A script whose
+fetch or output step raises is reported and the others still run.
+
+Usage:
+  python run_scripts.py [name ...] [--out DIR]    # every script when none given
+  python run_scripts.py --list
+  python run_scripts.py --plan [name ...]         # requests a run would make
+
+A script run directly (python "Py scripts/Tvl by chain.py") goes through
+the same runner with just itself selected.
+"""
+
+import os
+import re
+import sys
+import argparse
+import traceback
+import importlib.util
+
+SCRIPT_DIR  = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(SCRIPT_DIR, "Py scripts")
+OUTPUT_DIR  = os.environ.get("DASHBOARD_OUTPUT_DIR", os.path.join(SCRIPT_DIR, "output"))
+sys.path.insert(0, SCRIPT_DIR)
+
+# Charts are saved to OUTPUT_DIR, never shown.
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import fetch_data
+import instrument
+
+
+def load_scripts():
+    """Imports every script in SCRIPTS_DIR (each registers itself in
+    fetch_data.SCRIPTS); returns the registry."""
+    main_file = os.path.abspath(getattr(sys.modules["__main__"], "__file__", "") or "")
+    for fname in sorted(os.listdir(SCRIPTS_DIR)):
+        path = os.path.join(SCRIPTS_DIR, fname)
+        if not fname.endswith(".py") or path == main_file:   # already registered
+            continue
+        module = "script_" + re.sub(r"\W+", "_", fname[:-3]).strip("_").lower()
+        spec   = importlib.util.spec_from_file_location(module, path)
+        spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    return fetch_data.SCRIPTS
+
+
+def _target(names):
+    """Registers node 'scripts' depending on every selected script's fetch step."""
+    deps = [fetch_data.SCRIPTS[n]["node"] for n in names]
+    fetch_data.node("scripts", deps)(lambda *results: dict(zip(names, results)))
+    return "scripts"
+
+
+def run(names, out_dir=OUTPUT_DIR):
+    """Fetches the data of all `names` in one pipeline run, then writes each
+    script's output; returns the names whose fetch or output step failed."""
+    print(f"Fetching data for {len(names)} script(s)...")
+    with instrument.phase("fetch"):
+        results = fetch_data.run_pipeline(_target(names))
+    fetch_data.save_throttle_state()
+
+    os.makedirs(out_dir, exist_ok=True)
+    failed = []
+    for name in names:
+        if results[name] is None:       # fetch step raised (logged by run_pipeline)
+            print(f"\n── {name} ── skipped, its fetch step failed")
+            failed.append(name)
+            continue
+        output = fetch_data.SCRIPTS[name]["output"]
+        if output is None:
+            continue
+        print(f"\n── {name} ──")
+        try:
+            with instrument.phase(f"output.{name}"):
+                output(results[name], out_dir)
+        except Exception:
+            traceback.print_exc()
+            failed.append(name)
+    return failed
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Run the Py scripts analyses through the shared fetch pipeline.")
+    p.add_argument("names", nargs="*", help="scripts to run (default: all; see --list)")
+    p.add_argument("--out",  default=OUTPUT_DIR, help="directory for charts and tables")
+    p.add_argument("--list", action="store_true", help="list the registered scripts and exit")
+    p.add_argument("--plan", action="store_true", help="print the requests a run would make and exit")
+    opts = p.parse_args(argv)
+
+    scripts = load_scripts()
+    if opts.list:
+        for name, spec in sorted(scripts.items()):
+            print(f"  {name:<28} {spec['doc'].splitlines()[0] if spec['doc'] else ''}")
+        return 0
+    unknown = [n for n in opts.names if n not in scripts]
+    if unknown:
+        p.error(f"unknown script(s): {', '.join(unknown)} (known: {', '.join(sorted(scripts))})")
+    names = list(dict.fromkeys(opts.names)) or sorted(scripts)
+
+    if opts.plan:
+        fetch_data.plan_pipeline(_target(names))
+        return 0
+    try:
+        failed = run(names, opts.out)
+    finally:
+        instrument.print_summary()
+        instrument.write_report({"argv": sys.argv[1:], "scripts": names})
+    if failed:
+        print(f"\n{len(failed)} script(s) failed: {', '.join(failed)}")
+        return 1
+    print(f"\nOutputs in {opts.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+schemas.py  –  Declared shapes of the API responses fetch_data reads.
+Each endpoint has a Schema that decodes a response body (jsonstream.loads,
+orjson when installed) and checks it in the same walk that drops every field
+the dashboard doesn't read, so the fetchers index fields directly instead of
+chaining .get(...) or {} and the full response isn't kept around.
+
+A shape is built from:
+  - a type or tuple of types   the value must be an instance (bool never
+                               passes as a number)
+  - [item]                     list whose elements match `item`
+  - {"field": shape, ...}      object with these fields; others are dropped
+  - Row(shape, ...)            positional list (a kline, a [ts, value] pair),
+                               checked and cut to the declared positions
+  - Map(shape)                 object keyed by data (chain names...) whose
+                               values all match `shape`
+  - Opt(shape, default=None)   may be missing or null → default; an object
+                               default goes through `shape`, so Opt(USD, {})
+                               fills in USD's own defaults
+
+A response that no longer matches raises SchemaError naming the endpoint and
+the path that broke — an API change fails loudly instead of becoming zeros.
+Shapes are compiled to nested closures once, at import.
+"""
+
+from jsonstream import loads
+
+NUM = (int, float)
+
+
+class SchemaError(ValueError):
+    """A response doesn't match its declared shape."""
+
+    def __init__(self, reason, path="", endpoint=""):
+        super().__init__((f"{endpoint}: " if endpoint else "") + f"{path or '$'}: {reason}")
+        self.reason   = reason
+        self.path     = path
+        self.endpoint = endpoint
+
+    def within(self, segment):
+        """The same error one level further out (segment = field or [index])."""
+        sep = "" if not self.path or self.path.startswith("[") else "."
+        return SchemaError(self.reason, segment + sep + self.path, self.endpoint)
+
+
+class Opt:
+    """Field that may be missing or null."""
+
+    def __init__(self, shape, default=None):
+        self.shape   = shape
+        self.default = default
+
+
+class Row:
+    """Positional list; elements past the declared ones are dropped."""
+
+    def __init__(self, *shapes):
+        self.shapes = shapes
+
+
+class Map:
+    """Object with arbitrary keys; every value matches `shape`."""
+
+    def __init__(self, shape):
+        self.shape = shape
+
+
+# ── Compiler ──────────────────────────────────────────────────────────────────
+def _type_name(types):
+    return "/".join(t.__name__ for t in types)
+
+
+def _scalar(types):
+    types   = types if isinstance(types, tuple) else (types,)
+    no_bool = bool not in types
+    name    = _type_name(types)
+
+    def check(v):
+        if isinstance(v, types) and not (no_bool and v.__class__ is bool):
+            return v
+        raise SchemaError(f"expected {name}, got {type(v).__name__}")
+    return check
+
+
+def _field(shape):
+    """(check, optional, default) for an object field or row position."""
+    if isinstance(shape, Opt):
+        check   = _compile(shape.shape)
+        default = check(shape.default) if isinstance(shape.default, dict) else shape.default
+        return check, True, default
+    return _compile(shape), False, None
+
+
+def _list(item):
+    check = _compile(item)
+
+    def check_list(v):
+        if not isinstance(v, list):
+            raise SchemaError(f"expected list, got {type(v).__name__}")
+        try:
+            return [check(x) for x in v]
+        except SchemaError as exc:
+            # Only a failure pays for finding its index.
+            for i, x in enumerate(v):
+                try:
+                    check(x)
+                except SchemaError as inner:
+                    raise inner.within(f"[{i}]") from None
+            raise exc
+    return check_list
+
+
+def _object(shape):
+    fields = [(name,) + _field(s) for name, s in shape.items()]
+
+    def check_object(v):
+        if not isinstance(v, dict):
+            raise SchemaError(f"expected object, got {type(v).__name__}")
+        out = {}
+        for name, check, optional, default in fields:
+            x = v.get(name)
+            if x is None:
+                if not optional:
+                    raise SchemaError("missing" if name not in v else "null", name)
+                out[name] = default
+                continue
+            try:
+                out[name] = check(x)
+            except SchemaError as exc:
+                raise exc.within(name) from None
+        return out
+    return check_object
+
+
+def _row(shapes):
+    fields = [_field(s) for s in shapes]
+    size   = len(fields)
+
+    def check_row(v):
+        if not isinstance(v, list):
+            raise SchemaError(f"expected list, got {type(v).__name__}")
+        out = []
+        for i, (check, optional, default) in enumerate(fields):
+            x = v[i] if i < len(v) else None
+            if x is None:
+                if not optional:
+                    raise SchemaError(f"expected at least {size} items" if i >= len(v) else "null", f"[{i}]")
+                out.append(default)
+                continue
+            try:
+                out.append(check(x))
+            except SchemaError as exc:
+                raise exc.within(f"[{i}]") from None
+        return out
+    return check_row
+
+
+def _map(shape):
+    check = _compile(shape)
+
+    def check_map(v):
+        if not isinstance(v, dict):
+            raise SchemaError(f"expected object, got {type(v).__name__}")
+        out = {}
+        for key, x in v.items():
+            try:
+                out[key] = check(x)
+            except SchemaError as exc:
+                raise exc.within(key) from None
+        return out
+    return check_map
+
+
+def _compile(shape):
+    if isinstance(shape, dict):
+        return _object(shape)
+    if isinstance(shape, list):
+        return _list(shape[0])
+    if isinstance(shape, Row):
+        return _row(shape.shapes)
+    if isinstance(shape, Map):
+        return _map(shape.shape)
+    if isinstance(shape, Opt):
+        raise TypeError("Opt() only applies to object fields and row positions")
+    return _scalar(shape)
+
+
+class Schema:
+    """Parser for one endpoint: call it on a response body (as get_json's
+    `parse`) for the checked, trimmed data; validate() checks an already
+    decoded value."""
+
+    def __init__(self, name, shape):
+        self.name   = name
+        self._check = _compile(shape)
+
+    def validate(self, value):
+        try:
+            return self._check(value)
+        except SchemaError as exc:
+            raise SchemaError(exc.reason, exc.path, self.name) from None
+
+    def each(self, items):
+        """Validates a stream of elements (e.g. jsonstream.iter_array) lazily."""
+        for i, item in enumerate(items):
+            try:
+                yield self._check(item)
+            except SchemaError as exc:
+                raise SchemaError(exc.reason, exc.within(f"[{i}]").path, self.name) from None
+
+    def __call__(self, body):
+        return self.validate(loads(body))
+
+    def __repr__(self):
+        return f"Schema({self.name!r})"
+
+
+# ── Endpoints ─────────────────────────────────────────────────────────────────
+# A stablecoin's amounts by peg ({"peggedUSD": ..., "peggedEUR": ...}); only
+# USD is read, and a coin pegged to something else counts as 0.
+USD  = {"peggedUSD": Opt(NUM, 0)}
+DATE = (int, str)            # stablecoins.llama.fi sends some dates as strings
+
+STABLECOINS = Schema("stablecoins.llama.fi/stablecoins", {
+    "peggedAssets": [{
+        "id":                   Opt(str),
+        "name":                 str,
+        "symbol":               str,
+        "pegMechanism":         Opt(str),
+        "price":                Opt(NUM),
+        "circulating":          Opt(USD, {}),
+        "circulatingPrevDay":   Opt(USD, {}),
+        "circulatingPrevWeek":  Opt(USD, {}),
+        "circulatingPrevMonth": Opt(USD, {}),
+    }],
+})
+
+STABLECOIN_CHART = Schema("stablecoins.llama.fi/stablecoincharts", [{
+    "date":                DATE,
+    "totalCirculatingUSD": Opt(USD, {}),
+    "totalCirculating":    Opt(USD, {}),
+}])
+
+STABLECOIN = Schema("stablecoins.llama.fi/stablecoin", {
+    "tokens": [{"date": DATE, "circulating": Opt(USD, {})}],
+})
+
+# Per-chain circulating history of one stablecoin (Py scripts/)
+STABLECOIN_CHAINS = Schema("stablecoins.llama.fi/stablecoin", {
+    "name":          Opt(str),
+    "chainBalances": Opt(Map({
+        "tokens": Opt([{"date": DATE, "circulating": Opt(USD, {})}], []),
+    }), {}),
+})
+
+DUNE_ACTIVE_ADDRESSES = Schema("api.dune.com/query/results", {
+    "result": {"rows": [{"month": str, "stablecoin": str, "active_senders": NUM}]},
+})
+
+# The daily variant of the query (Py scripts/)
+DUNE_DAILY_ACTIVE_ADDRESSES = Schema("api.dune.com/query/results", {
+    "result": {"rows": [{"day": str, "stablecoin": str, "active_senders": NUM}]},
+})
+
+# [open time, open, high, low, close, ...] — prices come as strings
+KLINES = Schema("api.binance.com/klines", [Row(int, str, str, str, str)])
+
+FEES = Schema("api.llama.fi/overview/fees", {
+    "totalDataChart": [Row(NUM, Opt(NUM))],
+})
+
+CHAINS = Schema("api.llama.fi/v2/chains", [{"name": str, "tvl": Opt(NUM)}])
+
+# A point without a value is dropped by the fetcher, not the whole history
+CHAIN_TVL = Schema("api.llama.fi/v2/historicalChainTvl", [{"date": NUM, "tvl": Opt(NUM)}])
+
+# One element of /protocols, which is parsed element by element (jsonstream)
+PROTOCOL = Schema("api.llama.fi/protocols", {
+    "name":      Opt(str),
+    "slug":      Opt(str),
+    "category":  Opt(str),
+    "chain":     Opt(str),
+    "tvl":       Opt(NUM),
+    "change_1d": Opt(NUM),
+    "change_7d": Opt(NUM),
+})
+
+PROTOCOL_HISTORY = Schema("api.llama.fi/protocol", {
+    "tvl": [{"date": NUM, "totalLiquidityUSD": Opt(NUM)}],
+})
+
+MARKET_CHART = Schema("api.coingecko.com/market_chart", {
+    "total_volumes": [Row(NUM, Opt(NUM))],
+})
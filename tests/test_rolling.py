@@ -0,0 +1,66 @@
+"""rolling.py window kernels against a naive per-window recomputation."""
+
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rolling import rolling_max, rolling_mean, rolling_min, rolling_std, rolling_sum
+
+
+def windows(values, mask, window, skip_zero):
+    """Valid values of the last `window` positions at each index."""
+    out = []
+    for i in range(len(values)):
+        lo = max(i - window + 1, 0)
+        out.append([v for v, ok in zip(values[lo:i + 1], mask[lo:i + 1])
+                    if ok and v is not None and not (skip_zero and v == 0)])
+    return out
+
+
+def naive_std(vals, ddof=0):
+    if len(vals) <= ddof:
+        return None
+    mean = math.fsum(vals) / len(vals)
+    return math.sqrt(math.fsum((v - mean) ** 2 for v in vals) / (len(vals) - ddof))
+
+
+def series(n, seed):
+    """A level series with None gaps, masked days, zeros and one spike."""
+    rnd    = random.Random(seed)
+    values = [1e6 + rnd.gauss(0, 1e4) for _ in range(n)]
+    for i in range(0, n, 17):
+        values[i] = None
+    for i in range(5, n, 23):
+        values[i] = 0.0
+    values[n // 2] = 1e12
+    mask = [rnd.random() > 0.05 for _ in range(n)]
+    return values, mask
+
+
+def assert_close(got, want, rel=1e-9):
+    assert len(got) == len(want)
+    for i, (g, w) in enumerate(zip(got, want)):
+        assert (g is None) == (w is None), f"index {i}: {g} != {w}"
+        if g is not None:
+            assert math.isclose(g, w, rel_tol=rel, abs_tol=1e-6), f"index {i}: {g} != {w}"
+
+
+def test_kernels_match_naive():
+    values, mask = series(400, seed=1)
+    for window in (7, 30):
+        for skip_zero in (False, True):
+            wins = windows(values, mask, window, skip_zero)
+            kw   = dict(mask=mask, skip_zero=skip_zero)
+            assert_close(rolling_sum(values, window, **kw), [math.fsum(w) if w else None for w in wins])
+            assert_close(rolling_mean(values, window, **kw), [math.fsum(w) / len(w) if w else None for w in wins])
+            assert_close(rolling_min(values, window, **kw), [min(w) if w else None for w in wins])
+            assert_close(rolling_max(values, window, **kw), [max(w) if w else None for w in wins])
+            assert_close(rolling_std(values, window, ddof=1, **kw), [naive_std(w, 1) for w in wins], rel=1e-6)
+
+
+def test_window_longer_than_data():
+    values, mask = series(20, seed=2)
+    wins = windows(values, mask, 90, False)
+    assert_close(rolling_mean(values, 90, mask=mask), [math.fsum(w) / len(w) if w else None for w in wins])
@@ -0,0 +1,74 @@
+"""rolling_corr_pct against a two-pass Pearson correlation per window."""
+
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fetch_data import rolling_corr_pct
+
+
+def naive_corr(xp, yp, window, min_pairs):
+    out = []
+    for i in range(len(xp)):
+        pairs = [(a, b) for a, b in zip(xp[max(i - window, 0):i], yp[max(i - window, 0):i])
+                 if a is not None and b is not None]
+        if i < window or len(pairs) < min_pairs:
+            out.append(None)
+            continue
+        mx  = math.fsum(a for a, _ in pairs) / len(pairs)
+        my  = math.fsum(b for _, b in pairs) / len(pairs)
+        num = math.fsum((a - mx) * (b - my) for a, b in pairs)
+        den = math.sqrt(math.fsum((a - mx) ** 2 for a, _ in pairs) * math.fsum((b - my) ** 2 for _, b in pairs))
+        out.append(num / den if den > 1e-10 else None)
+    return out
+
+
+def series(n, seed, gaps=0.1):
+    """Correlated % changes with random and one long run of missing values."""
+    rnd = random.Random(seed)
+    xp, yp = [], []
+    for i in range(n):
+        a = rnd.gauss(0, 2)
+        b = 0.6 * a + rnd.gauss(0, 1.5)
+        if rnd.random() < gaps or 300 <= i < 340:
+            a = None
+        if rnd.random() < gaps:
+            b = None
+        xp.append(a)
+        yp.append(b)
+    return xp, yp
+
+
+def assert_close(got, want):
+    assert len(got) == len(want)
+    for i, (g, w) in enumerate(zip(got, want)):
+        assert (g is None) == (w is None), f"index {i}: {g} != {w}"
+        if g is not None:
+            assert abs(g - w) < 1e-9, f"index {i}: {g} != {w}"
+
+
+def test_matches_naive_with_gaps():
+    xp, yp = series(800, seed=1)
+    windows = (30, 90, 365)
+    got = rolling_corr_pct(xp, yp, windows)
+    for w in windows:
+        assert_close(got[w], naive_corr(xp, yp, w, 20))
+
+
+def test_window_longer_than_data():
+    xp, yp = series(50, seed=2)
+    assert rolling_corr_pct(xp, yp, (90,))[90] == [None] * 50
+
+
+def test_flat_window_after_large_moves():
+    # Large changes followed by a flat stretch: once the large values leave
+    # the window, x has zero variance and the correlation is undefined.
+    rnd = random.Random(3)
+    xp  = [rnd.gauss(0, 1e4) for _ in range(120)] + [0.0] * 200
+    yp  = [rnd.gauss(0, 1) for _ in range(320)]
+    got = rolling_corr_pct(xp, yp, (30, 90), min_pairs=10)
+    for w in (30, 90):
+        assert_close(got[w], naive_corr(xp, yp, w, 10))
+        assert got[w][-1] is None
@@ -0,0 +1,95 @@
+"""TimeSeriesFrame alignment, reindexing and aggregation against plain dicts."""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from timeseries import DAY_SECONDS, DailyGroupSum, TimeSeriesFrame, align, day_to_str
+
+
+def random_frame(name, seed, first=19000, days=120, gaps=0.2):
+    """{day: value or None} with missing days and None values, plus its frame."""
+    rnd    = random.Random(seed)
+    points = {}
+    for d in range(first, first + days):
+        if rnd.random() < gaps:
+            continue                                  # day absent
+        points[d] = None if rnd.random() < 0.1 else rnd.uniform(-1e9, 1e9)
+    frame = TimeSeriesFrame(sorted(points))
+    frame[name] = [points[d] for d in sorted(points)]
+    return points, frame
+
+
+def test_from_points_later_point_wins():
+    frame = TimeSeriesFrame.from_points(
+        [(3 * DAY_SECONDS + 10, 1.0), (DAY_SECONDS, 2.0), (3 * DAY_SECONDS + 500, 4.0)], "v"
+    )
+    assert list(frame.days) == [1, 3]
+    assert frame["v"] == [2.0, 4.0]
+
+
+def test_align_matches_dict_join():
+    refs, frames = zip(*(random_frame(f"s{i}", seed=i, first=19000 + 15 * i) for i in range(4)))
+    for how in ("outer", "inner"):
+        sets = [set(r) for r in refs]
+        days = sorted(set.union(*sets) if how == "outer" else set.intersection(*sets))
+        out  = align(frames, how)
+        assert list(out.days) == days
+        for i, ref in enumerate(refs):
+            assert out[f"s{i}"] == [ref.get(d) for d in days]   # missing days come back masked
+
+
+def test_align_on_given_days():
+    ref, frame = random_frame("v", seed=7)
+    on  = list(range(18990, 19130, 3))
+    out = align([frame], on=on)
+    assert list(out.days) == on
+    assert out["v"] == [ref.get(d) for d in on]
+
+
+def test_reindex_and_views_share_values():
+    ref, frame = random_frame("v", seed=8)
+    days = sorted(ref)
+    assert frame.reversed()["v"] == [ref[d] for d in reversed(days)]
+    assert frame.every(5)["v"] == [ref[d] for d in days[::5]]
+    assert frame.since(days[40])["v"] == [ref[d] for d in days[40:]]
+    assert frame.reindex(days[::-2])["v"] == [ref[d] for d in days[::-2]]
+
+
+def test_monthly_sum_and_last():
+    ref, frame = random_frame("v", seed=9, days=200)
+    sums, last = {}, {}
+    for d in sorted(ref):
+        if ref[d] is None:
+            continue
+        month = day_to_str(d)[:7]
+        sums[month] = sums.get(month, 0.0) + ref[d]
+        last[month] = ref[d]
+    for how, want in (("sum", sums), ("last", last)):
+        got = frame.monthly(how)
+        got = {m[:7]: v for m, v in zip(got.dates(), got["v"]) if v is not None}
+        assert got.keys() == want.keys()
+        for month, v in want.items():
+            assert abs(got[month] - v) <= 1e-6 * max(1.0, abs(v))
+
+
+def test_daily_group_sum():
+    groups = DailyGroupSum()
+    want   = {}
+    for i in range(6):
+        ref, frame = random_frame("tvl", seed=20 + i, first=19000 + 10 * (i % 3))
+        group = "even" if i % 2 == 0 else "odd"
+        groups.add(group, frame, "tvl")
+        for d, v in ref.items():
+            if v is not None:
+                want.setdefault(group, {})[d] = want.get(group, {}).get(d, 0.0) + v
+    out  = groups.to_frame()
+    days = sorted(set().union(*want.values()))
+    assert list(out.days) == days
+    for group, ref in want.items():
+        got = out[group]
+        for d, v in zip(days, got):
+            assert (v is None) == (d not in ref)
+            if v is not None:
+                assert abs(v - ref[d]) <= 1e-6 * max(1.0, abs(ref[d]))
@@ -0,0 +1,132 @@
+"""
+throttle.py  –  Adaptive per-host request throttling for fetch_data.
+Every host gets a token bucket (`rate` tokens per second, up to `burst`
+saved up, one per request) plus a cap on requests in flight.  The rate
+adapts to what the API accepts (additive increase, multiplicative decrease):
+  - a 429, or a 503 carrying Retry-After, halves the rate (not below
+    min_rate) and holds every request to that host until Retry-After passes
+  - each successful response adds a step back, up to max_rate
+The learned rates are saved between runs (save_state / load_state), so a
+refresh starts near the fastest rate that worked last time rather than at
+a fixed worst-case spacing.
+"""
+
+import os
+import json
+import time
+import threading
+from email.utils import parsedate_to_datetime
+
+# ── Config ────────────────────────────────────────────────────────────────────
+DECREASE        = 0.5    # rate factor on 429
+INCREASE        = 0.05   # rate step per success, as a share of the configured rate
+MAX_SPEEDUP     = 4.0    # max_rate = configured rate × this
+MAX_SLOWDOWN    = 8.0    # min_rate = configured rate / this
+MAX_RETRY_AFTER = 120.0  # longest Retry-After honoured, seconds
+
+
+def retry_after_seconds(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostThrottle:
+    """Token bucket + in-flight cap for one host; use as a context manager
+    around each request and report the outcome with feedback()."""
+
+    def __init__(self, max_inflight, rate, burst=1):
+        self.base_rate     = rate
+        self.rate          = rate
+        self.max_rate      = rate * MAX_SPEEDUP
+        self.min_rate      = rate / MAX_SLOWDOWN
+        self.burst         = burst
+        self.tokens        = float(burst)
+        self.blocked_until = 0.0
+        self.throttled     = 0          # 429s seen this run
+        self._updated      = time.monotonic()
+        self._slots        = threading.BoundedSemaphore(max_inflight)
+        self._lock         = threading.Lock()
+
+    def _reserve(self):
+        """Takes a token; returns seconds to wait before sending.  Tokens may
+        go negative — the deficit is the queue already waiting."""
+        with self._lock:
+            now           = time.monotonic()
+            self.tokens   = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens  -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def __enter__(self):
+        self._slots.acquire()
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return self
+
+    def __exit__(self, *exc):
+        self._slots.release()
+
+    def feedback(self, status, retry_after=None):
+        """Adapts the rate to a response status (None = no response)."""
+        with self._lock:
+            if status == 429 or (status == 503 and retry_after is not None):
+                self.rate      = max(self.min_rate, self.rate * DECREASE)
+                self.throttled += 1
+                pause = retry_after if retry_after is not None else 1 / self.rate
+                self.blocked_until = max(self.blocked_until, time.monotonic() + min(pause, MAX_RETRY_AFTER))
+            elif status is not None and status < 400:
+                self.rate = min(self.max_rate, self.rate + self.base_rate * INCREASE)
+
+
+class Throttles:
+    """HostThrottle per host, created on first use from `limits`
+    {host: (max_inflight, rate, burst)} or `default`."""
+
+    def __init__(self, limits, default):
+        self.limits  = limits
+        self.default = default
+        self._hosts  = {}
+        self._saved  = {}
+        self._lock   = threading.Lock()
+
+    def get(self, host):
+        with self._lock:
+            t = self._hosts.get(host)
+            if t is None:
+                t = self._hosts[host] = HostThrottle(*self.limits.get(host, self.default))
+                if host in self._saved:
+                    t.rate = min(t.max_rate, max(t.min_rate, self._saved[host]))
+            return t
+
+    def load_state(self, path):
+        """Starting rates learned by an earlier run (missing file = none)."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._saved = {h: float(r) for h, r in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            self._saved = {}
+
+    def save_state(self, path):
+        with self._lock:
+            rates = dict(self._saved)
+            rates.update({h: round(t.rate, 4) for h, t in self._hosts.items()})
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(rates, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+
+    def rates(self):
+        with self._lock:
+            return {h: (t.rate, t.throttled) for h, t in self._hosts.items()}
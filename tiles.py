@@ -0,0 +1,61 @@
+"""
+tiles.py  –  Zoom tiles: higher-resolution slices of the downsampled charts.
+The payload carries each date axis at its LTTB overview budget.  For zooming
+in, the full daily frames behind those axes are cut into one tile per
+calendar year at two levels:
+  - weekly: LTTB at two points per week (spikes survive, flat weeks shrink)
+  - daily:  every day
+The page picks a level from the visible window on plotly_relayout and
+fetches only the tiles (years) it overlaps.  Tiles are encoded like the
+payload (payload.encode_payload) with their axis under "x", newest-first.
+"""
+
+import math
+
+from downsample import downsample_frame
+from payload import encode_payload
+from timeseries import day_to_str
+
+# (level name, points kept per day — None keeps every day)
+LEVELS = [
+    ("weekly", 2 / 7),
+    ("daily",  None),
+]
+
+
+def tile_name(axis, level, year):
+    return f"{axis}-{level}-{year}"
+
+
+def _years(frame):
+    """(year, frame slice) per calendar year of an oldest-first frame."""
+    out, start = [], 0
+    for i in range(1, len(frame) + 1):
+        if i == len(frame) or day_to_str(frame.days[i])[:4] != day_to_str(frame.days[start])[:4]:
+            out.append((int(day_to_str(frame.days[start])[:4]), frame.take(range(start, i))))
+            start = i
+    return out
+
+
+def build_tiles(daily):
+    """`daily` maps payload axis key → full-resolution frame whose columns are
+    named after the payload series on that axis.  Returns (index, tiles):
+    index[axis] = {"series": [...], "levels": {level: [years]}} for the page,
+    tiles maps tile_name(...) → encoded tile."""
+    index, tiles = {}, {}
+    for axis, frame in daily.items():
+        if not len(frame):
+            continue
+        entry = index[axis] = {"series": frame.names, "levels": {}}
+        for level, per_day in LEVELS:
+            years = []
+            for year, part in _years(frame):
+                if per_day is not None:
+                    part = downsample_frame(part, max(3, math.ceil(len(part) * per_day)))
+                view = part.reversed()
+                tiles[tile_name(axis, level, year)] = encode_payload(
+                    {"x": view.dates(), **{name: view[name] for name in frame.names}}
+                )
+                years.append(year)
+            entry["levels"][level] = years
+    return index, tiles
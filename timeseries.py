@@ -0,0 +1,283 @@
+"""
+timeseries.py  –  Compact daily time-series container shared by the fetchers.
+A TimeSeriesFrame is one sorted index of epoch days (days since 1970-01-01)
+plus named float columns, each an array('d') with a bytearray validity mask.
+Timestamps become days by integer division, and 'YYYY-MM-DD' strings are
+only produced when a frame is written out (dates()).  every() and reversed()
+slice memoryviews, so they share the underlying arrays instead of copying.
+DailyGroupSum folds many frames into per-group daily totals as they arrive.
+Many per-entity frames become one wide frame with a single align() call
+(one union index, each frame reindexed once) instead of a join per entity.
+"""
+
+from array import array
+from datetime import date, timedelta
+
+DAY_SECONDS = 86_400
+_EPOCH      = date(1970, 1, 1)
+_date_strs  = {}
+
+
+def day_to_str(day):
+    s = _date_strs.get(day)
+    if s is None:
+        s = _date_strs[day] = (_EPOCH + timedelta(days=day)).isoformat()
+    return s
+
+
+def str_to_day(s):
+    return (date.fromisoformat(s[:10]) - _EPOCH).days
+
+
+def ts_to_day(ts, unit=1):
+    """Epoch day of a UTC timestamp in seconds (unit=1) or milliseconds (unit=1000)."""
+    return int(ts) // (DAY_SECONDS * unit)
+
+
+def month_start(day):
+    d = _EPOCH + timedelta(days=day)
+    return (date(d.year, d.month, 1) - _EPOCH).days
+
+
+class TimeSeriesFrame:
+    """Epoch-day index plus named (values, mask) columns of the same length."""
+
+    __slots__ = ("days", "_cols")
+
+    def __init__(self, days=()):
+        self.days  = days if isinstance(days, (array, memoryview)) else array("l", days)
+        self._cols = {}
+
+    # ── Construction ──────────────────────────────────────────────────────────
+    @classmethod
+    def from_points(cls, points, name="value", unit=1):
+        """Frame from (timestamp, value) pairs; a later point for a day wins."""
+        by_day = {}
+        for ts, v in points:
+            by_day[int(ts) // (DAY_SECONDS * unit)] = v
+        days  = sorted(by_day)
+        frame = cls(days)
+        frame[name] = [by_day[d] for d in days]
+        return frame
+
+    @classmethod
+    def from_dict(cls, by_date, name="value"):
+        """Frame from a {'YYYY-MM-DD': value} dict."""
+        return cls.from_points(
+            ((str_to_day(d) * DAY_SECONDS, v) for d, v in by_date.items()), name
+        )
+
+    def __setitem__(self, name, values):
+        """Adds a column from a list with None for missing values."""
+        vals = array("d")
+        mask = bytearray()
+        for v in values:
+            if v is None:
+                vals.append(0.0); mask.append(0)
+            else:
+                vals.append(v);   mask.append(1)
+        if len(vals) != len(self.days):
+            raise ValueError(f"column {name!r} has {len(vals)} values for {len(self.days)} days")
+        self._cols[name] = (vals, mask)
+
+    # ── Access ────────────────────────────────────────────────────────────────
+    def __len__(self):
+        return len(self.days)
+
+    def __contains__(self, name):
+        return name in self._cols
+
+    @property
+    def names(self):
+        return list(self._cols)
+
+    def column(self, name):
+        """(values, mask) for a column — the arrays themselves, not copies."""
+        return self._cols[name]
+
+    def __getitem__(self, name):
+        """Column as a list with None where the mask is unset."""
+        vals, mask = self._cols[name]
+        return [v if m else None for v, m in zip(vals, mask)]
+
+    def dates(self):
+        return [day_to_str(d) for d in self.days]
+
+    def first_day(self):
+        return self.days[0] if len(self.days) else None
+
+    def last_day(self):
+        return self.days[-1] if len(self.days) else None
+
+    def to_pandas(self, fill=None):
+        """pandas DataFrame on a DatetimeIndex, one column per column here;
+        masked values are NaN, or `fill`.  Only the Py scripts use pandas,
+        so it is imported here rather than by the module."""
+        import pandas as pd
+        df = pd.DataFrame(
+            {name: self[name] for name in self._cols},
+            index=pd.to_datetime(list(self.days), unit="D"),
+            dtype="float64",
+        )
+        return df if fill is None else df.fillna(fill)
+
+    # ── Reshaping ─────────────────────────────────────────────────────────────
+    def _view(self, key):
+        out = TimeSeriesFrame(memoryview(self.days)[key])
+        for name, (vals, mask) in self._cols.items():
+            out._cols[name] = (memoryview(vals)[key], memoryview(mask)[key])
+        return out
+
+    def reversed(self):
+        """Newest-first view; no data is copied."""
+        return self._view(slice(None, None, -1))
+
+    def every(self, n):
+        """Every n-th row starting with the first; no data is copied."""
+        return self._view(slice(None, None, n))
+
+    def since(self, day):
+        """Rows on or after `day` (frame must be oldest-first)."""
+        lo, hi = 0, len(self.days)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.days[mid] < day:
+                lo = mid + 1
+            else:
+                hi = mid
+        return self._view(slice(lo, None))
+
+    def rename(self, mapping):
+        """View with columns renamed per {old: new}; arrays are shared."""
+        out = TimeSeriesFrame(self.days)
+        out._cols = {mapping.get(k, k): v for k, v in self._cols.items()}
+        return out
+
+    def take(self, positions):
+        """New frame holding the rows at `positions`."""
+        out = TimeSeriesFrame(array("l", (self.days[i] for i in positions)))
+        for name, (vals, mask) in self._cols.items():
+            out._cols[name] = (
+                array("d", (vals[i] for i in positions)),
+                bytearray(mask[i] for i in positions),
+            )
+        return out
+
+    def reindex(self, days):
+        """New frame on `days`; rows missing here come back masked."""
+        pos = {d: i for i, d in enumerate(self.days)}
+        idx = [pos.get(d, -1) for d in days]
+        out = TimeSeriesFrame(days)
+        for name, (vals, mask) in self._cols.items():
+            out._cols[name] = (
+                array("d", (vals[i] if i >= 0 else 0.0 for i in idx)),
+                bytearray(mask[i] if i >= 0 else 0 for i in idx),
+            )
+        return out
+
+    def monthly(self, how="sum", skip_zero=False):
+        """One row per calendar month, indexed by the month's first day.
+        how='sum' adds the month's valid values, how='last' keeps the latest.
+        A month is valid for a column if it had any valid value (non-zero
+        ones when skip_zero is set)."""
+        row_month = [month_start(d) for d in self.days]
+        months    = sorted(set(row_month))
+        rank      = {m: r for r, m in enumerate(months)}
+        row_rank  = [rank[m] for m in row_month]
+        out       = TimeSeriesFrame(months)
+        for name, (vals, mask) in self._cols.items():
+            acc  = array("d", bytes(8 * len(months)))
+            seen = bytearray(len(months))
+            for r, v, ok in zip(row_rank, vals, mask):
+                if not ok or (skip_zero and v == 0):
+                    continue
+                acc[r]  = acc[r] + v if how == "sum" else v
+                seen[r] = 1
+            out._cols[name] = (acc, seen)
+        return out
+
+
+def align(frames, how="outer", on=None):
+    """Puts several frames on one day index and merges their columns into a
+    single frame.  The index is the union of their days for how='outer', the
+    intersection for how='inner', or the given `on` days."""
+    frames = list(frames)
+    if on is not None:
+        days = array("l", on)
+    elif not frames:
+        return TimeSeriesFrame()
+    else:
+        day_sets = [set(f.days) for f in frames]
+        if how == "inner":
+            days = set.intersection(*day_sets)
+        elif how == "outer":
+            days = set.union(*day_sets)
+        else:
+            raise ValueError(f"unknown alignment {how!r}")
+        days = array("l", sorted(days))
+    out = TimeSeriesFrame(days)
+    for f in frames:
+        same = len(f.days) == len(days) and all(a == b for a, b in zip(f.days, days))
+        src  = f if same else f.reindex(days)
+        out._cols.update(src._cols)
+    return out
+
+
+class DailyGroupSum:
+    """Date × group sums built one frame at a time: add() folds a frame
+    column into its group's row of daily totals as it arrives, so memory
+    is days × groups however many frames (or rows) go in.  The day range
+    starts as [first_day, last_day] when given and grows to fit."""
+
+    def __init__(self, first_day=None, last_day=None):
+        self.first = first_day
+        self.size  = 0 if first_day is None else last_day - first_day + 1
+        self._cols = {}
+
+    def _grow(self, lo, hi):
+        if self.first is None:
+            self.first, self.size = lo, hi - lo + 1
+            return
+        front = max(0, self.first - lo)
+        back  = max(0, hi - (self.first + self.size - 1))
+        if not front and not back:
+            return
+        for group, (acc, seen) in self._cols.items():
+            self._cols[group] = (
+                array("d", bytes(8 * front)) + acc + array("d", bytes(8 * back)),
+                bytearray(front) + seen + bytearray(back),
+            )
+        self.first -= front
+        self.size  += front + back
+
+    def add(self, group, frame, name="value"):
+        """Adds frame[name] (masked days skipped) to `group`'s daily sums."""
+        if not len(frame):
+            return
+        self._grow(frame.days[0], frame.days[-1])
+        col = self._cols.get(group)
+        if col is None:
+            col = self._cols[group] = (array("d", bytes(8 * self.size)), bytearray(self.size))
+        acc, seen  = col
+        first      = self.first
+        vals, mask = frame.column(name)
+        for d, v, ok in zip(frame.days, vals, mask):
+            if ok:
+                acc[d - first] += v
+                seen[d - first] = 1
+
+    @property
+    def groups(self):
+        return list(self._cols)
+
+    def to_frame(self):
+        """One column per group (in order of first add()) on the days where
+        any group has a value; a group's days without one are masked."""
+        out = TimeSeriesFrame(array("l", range(self.first or 0, (self.first or 0) + self.size)))
+        out._cols = dict(self._cols)
+        any_seen  = bytearray(self.size)
+        for _, seen in self._cols.values():
+            any_seen = bytes(a | b for a, b in zip(any_seen, seen))
+        if all(any_seen):
+            return out
+        return out.take([i for i, ok in enumerate(any_seen) if ok])